@@ -0,0 +1,161 @@
+"""A local HTTP server that behaves like the Azure Communication Email API.
+
+It implements the `:send` endpoint and the operation status API, with a
+configurable latency, rate of 429 responses and rate of server errors.
+The operations are running for `running_polls` polls before they reach
+`final_status`.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class FakeACSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0,
+        throttle_rate: float = 0,
+        error_rate: float = 0,
+        retry_after: int = 1,
+        running_polls: int = 0,
+        final_status: str = 'Succeeded',
+        port: int = 0,
+    ) -> None:
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.running_polls = running_polls
+        self.final_status = final_status
+        self.stats = Counter()
+        self.operation_ids = set()
+        self.operation_polls = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def connection_string(self) -> str:
+        # the access key must be valid base64 for the HMAC signature
+        return f'endpoint={self.endpoint}/;accesskey=ZmFrZS1rZXk='
+
+    def start(self) -> 'FakeACSServer':
+        self._thread = threading.Thread(
+            target=self.serve_forever,
+            kwargs={'poll_interval': 0.05},
+            name='fake-acs-server',
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def __enter__(self) -> 'FakeACSServer':
+        return self.start()
+
+    def __exit__(self, *args, **kwargs) -> None:  # noqa
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeACSServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args, **kwargs) -> None:  # noqa
+        pass
+
+    def do_POST(self) -> None:  # noqa
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urlsplit(self.path).path
+        if path != '/emails:send':
+            return self._respond(404, {'error': {'code': 'NotFound'}})
+
+        self.server.count('requests')
+        self.server.count('bytes', len(body))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        roll = random.random()
+        if roll < self.server.throttle_rate:
+            self.server.count('throttled')
+            return self._respond(
+                429,
+                {'error': {'code': 'TooManyRequests'}},
+                {'Retry-After': str(self.server.retry_after)},
+            )
+        if roll < self.server.throttle_rate + self.server.error_rate:
+            self.server.count('errors')
+            return self._respond(500, {'error': {'code': 'InternalError'}})
+
+        operation_id = self.headers.get('Operation-Id') or str(uuid.uuid4())
+        with self.server._lock:
+            duplicate = operation_id in self.server.operation_ids
+            self.server.operation_ids.add(operation_id)
+        self.server.count('duplicates' if duplicate else 'sent')
+
+        host = self.headers.get('Host')
+        self._respond(
+            202,
+            {'id': operation_id, 'status': 'Running'},
+            {
+                'Operation-Location': (
+                    f'http://{host}/emails/operations/{operation_id}'
+                    '?api-version=2025-09-01'
+                ),
+                'Retry-After': '0',
+            },
+        )
+
+    def do_GET(self) -> None:  # noqa
+        path = urlsplit(self.path).path
+        prefix = '/emails/operations/'
+        if not path.startswith(prefix):
+            return self._respond(404, {'error': {'code': 'NotFound'}})
+
+        self.server.count('polls')
+        operation_id = path[len(prefix):]
+        if operation_id not in self.server.operation_ids:
+            return self._respond(404, {'error': {'code': 'NotFound'}})
+        with self.server._lock:
+            self.server.operation_polls[operation_id] += 1
+            polls = self.server.operation_polls[operation_id]
+        if polls <= self.server.running_polls:
+            return self._respond(
+                200,
+                {'id': operation_id, 'status': 'Running'},
+                {'Retry-After': '0'},
+            )
+        body = {'id': operation_id, 'status': self.server.final_status}
+        if self.server.final_status == 'Failed':
+            body['error'] = {'code': 'Bounced'}
+        self._respond(200, body)
+
+    def _respond(self, status, payload, headers=None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,210 @@
+"""Measures the throughput, latency and memory of the send path against a
+local fake Azure Communication Email endpoint.
+
+    python -m benchmarks.run --messages 500 --latency 0.05 --max-workers 8
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+from django.conf import settings
+
+
+SCENARIOS = ['plain', 'html', 'attachment', 'recipients']
+
+
+def build_messages(scenario: str, count: int, options: argparse.Namespace):
+    from django.core.mail import EmailMessage, EmailMultiAlternatives
+
+    if scenario == 'plain':
+        return [
+            EmailMessage(
+                subject=f'Password reset {i}',
+                body='Follow the link to reset your password.',
+                from_email='Support <support@company.com>',
+                to=[f'User {i} <user{i}@company.com>'],
+            )
+            for i in range(count)
+        ]
+
+    if scenario == 'html':
+        html = '<p>' + 'Lorem ipsum dolor sit amet. ' * 700 + '</p>'
+        messages = []
+        for i in range(count):
+            message = EmailMultiAlternatives(
+                subject=f'Newsletter {i}',
+                body='Plain text version.',
+                from_email='News <news@company.com>',
+                to=[f'user{i}@company.com'],
+            )
+            message.attach_alternative(html, 'text/html')
+            messages.append(message)
+        return messages
+
+    if scenario == 'attachment':
+        content = os.urandom(options.attachment_size)
+        messages = []
+        for i in range(count):
+            message = EmailMessage(
+                subject=f'Invoice {i}',
+                body='Your invoice is attached.',
+                from_email='billing@company.com',
+                to=[f'user{i}@company.com'],
+            )
+            message.attach('invoice.pdf', content, 'application/pdf')
+            messages.append(message)
+        return messages
+
+    if scenario == 'recipients':
+        return [
+            EmailMessage(
+                subject=f'Announcement {i}',
+                body='Big news.',
+                from_email='news@company.com',
+                to=['news@company.com'],
+                bcc=[
+                    f'Subscriber {j} <subscriber{j}@company.com>'
+                    for j in range(options.recipients)
+                ],
+            )
+            for i in range(count)
+        ]
+
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+def run_scenario(
+    backend_factory: Callable[[], Any],
+    messages: List[Any],
+    *,
+    trace_memory: bool = False,
+) -> Dict[str, Optional[float]]:
+    """Sends the messages and returns the measurements."""
+    backend = backend_factory()
+    latencies = []
+    send_payload = backend._send_payload
+
+    def timed_send_payload(payload, *args):
+        start = time.perf_counter()
+        try:
+            send_payload(payload, *args)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    backend._send_payload = timed_send_payload
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    sent = backend.send_messages(messages)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'sent': sent,
+        'seconds': elapsed,
+        'per_second': sent / elapsed if elapsed else None,
+        'p50': _percentile(latencies, 50),
+        'p95': _percentile(latencies, 95),
+        'p99': _percentile(latencies, 99),
+        'peak_memory': peak,
+    }
+
+
+def _percentile(values: List[float], percent: int) -> Optional[float]:
+    if len(values) < 2:
+        return values[0] if values else None
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def _format(value: Optional[float], scale: float = 1, digits: int = 1) -> str:
+    return '-' if value is None else f'{value * scale:.{digits}f}'
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f'One of: {", ".join(SCENARIOS)} (default: all).')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the fake endpoint waits per request.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Share of requests answered with 429.')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of requests answered with 500.')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--max-workers', type=int, default=1)
+    parser.add_argument('--persistent-client', action='store_true')
+    parser.add_argument('--coalesce', action='store_true')
+    parser.add_argument('--attachment-size', type=int, default=1024 * 1024)
+    parser.add_argument('--recipients', type=int, default=50)
+    parser.add_argument('--memory', action='store_true',
+                        help='Trace the peak memory (slows the run down).')
+    options = parser.parse_args(argv)
+    if unknown := set(options.scenarios) - set(SCENARIOS):
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    if not settings.configured:
+        settings.configure()
+        django.setup()
+
+    from azure.core.pipeline.policies import RetryPolicy
+
+    from django_azure_communication_email import EmailBackend
+
+    from .fake_acs import FakeACSServer
+
+    server = FakeACSServer(
+        latency=options.latency,
+        throttle_rate=options.throttle_rate,
+        error_rate=options.error_rate,
+        retry_after=options.retry_after,
+    )
+
+    def backend_factory():
+        return EmailBackend(
+            connection_string=server.connection_string,
+            retry_policy=RetryPolicy(
+                retry_total=options.retries,
+                retry_backoff_factor=0.1,
+            ),
+            max_workers=options.max_workers,
+            persistent_client=options.persistent_client,
+            coalesce=options.coalesce,
+            fail_silently=True,
+        )
+
+    print(
+        f'{"scenario":<12}{"sent":>8}{"seconds":>10}{"msg/s":>10}'
+        f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"peak MB":>10}'
+    )
+    with server:
+        for scenario in options.scenarios or SCENARIOS:
+            messages = build_messages(scenario, options.messages, options)
+            result = run_scenario(
+                backend_factory,
+                messages,
+                trace_memory=options.memory,
+            )
+            print(
+                f'{scenario:<12}{result["sent"]:>8}'
+                f'{_format(result["seconds"], digits=2):>10}'
+                f'{_format(result["per_second"]):>10}'
+                f'{_format(result["p50"], 1000):>10}'
+                f'{_format(result["p95"], 1000):>10}'
+                f'{_format(result["p99"], 1000):>10}'
+                f'{_format(result["peak_memory"], 1 / 1024 / 1024):>10}'
+            )
+        print(f'server: {dict(server.stats)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,34 @@
+import importlib
+
+
 try:
     import importlib_metadata
 except ImportError:
     # Python >=3.8,<3.10
     import importlib.metadata as importlib_metadata
 
-from .backend import ACEmailBackend as EmailBackend
-
 
 __version__ = importlib_metadata.version(__name__)
+
+# the backends import the Azure SDK, so they're only imported on first use
+_BACKENDS = {
+    'EmailBackend': ('.backend', 'ACEmailBackend'),
+    'AsyncEmailBackend': ('.aio', 'AsyncACEmailBackend'),
+}
+
+
+def __getattr__(name):
+    try:
+        module, attribute = _BACKENDS[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}'
+        ) from None
+
+    value = getattr(importlib.import_module(module, __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return [*globals(), *_BACKENDS]
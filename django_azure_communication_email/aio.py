@@ -0,0 +1,329 @@
+import asyncio
+import copy
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync, sync_to_async
+from azure.communication.email.aio import EmailClient
+from azure.core.pipeline.policies import AsyncRetryPolicy, RetryPolicy
+
+from django.core.mail import EmailMessage
+
+from . import (
+    balancer, coalescing, credentials, deadline, delivery, idempotency,
+    instrumentation, lanes, routing, settings, throttle,
+)
+from .backend import ACEmailBackend, _get_messages, logger
+
+
+class AsyncACEmailBackend(ACEmailBackend):
+    """An asyncio flavour of `ACEmailBackend` that is built on top of
+    `azure.communication.email.aio.EmailClient`.
+
+    Requires the `aiohttp` package to be installed.
+
+    The outbox and background modes hand the messages over like the sync
+    backend does. Async clients are bound to their event loop, so each call
+    opens a client of its own, unless one was opened with `aopen()`, and
+    the persistent client doesn't apply.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+
+        self._max_concurrency = max_concurrency or settings.MAX_CONCURRENCY
+
+        self._async_client: EmailClient | None = None
+
+    async def aopen(self) -> None:
+        """Opens a client that the calls share until `aclose()`."""
+        if self._async_client is None:
+            self._async_client = self._open_async_client()
+
+    def _open_async_client(self) -> Optional[EmailClient]:
+        trace = instrumentation.OpenTrace(self) \
+            if instrumentation.is_enabled() else nullcontext()
+        try:
+            with trace:
+                return self._create_async_client()
+        except Exception as exc:  # noqa
+            if not self.fail_silently:
+                raise
+            logger.warning(
+                'Failed to open connection to Azure Communication Email.',
+                exc_info=exc,
+            )
+            return None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def send_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        *,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+    ) -> int:
+        return async_to_sync(self.asend_messages)(
+            email_messages,
+            timeout=timeout,
+            priority=priority,
+        )
+
+    async def asend_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        *,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+    ) -> int:
+        """
+        It's your responsibility to validate all data before sending an email.
+
+        The sends stop once `timeout` seconds are over, and the messages
+        that were not sent by then are reported with `DeadlineExceeded`.
+        The `priority` applies to the messages without a priority header.
+        """
+        if (email_messages := _get_messages(email_messages)) is None:
+            return 0
+        timeout = timeout or self._timeout
+        priority = lanes.check(priority or self._priority)
+        if not instrumentation.is_enabled():
+            return await self._asend_messages(
+                email_messages,
+                timeout,
+                priority,
+            )
+
+        with instrumentation.BatchTrace(self, email_messages) as trace:
+            trace.sent = await self._asend_messages(
+                email_messages,
+                timeout,
+                priority,
+            )
+        return trace.sent
+
+    async def _asend_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+    ) -> int:
+        if self._outbox:
+            return await sync_to_async(self._store_messages)(
+                email_messages,
+                priority,
+            )
+        if self._background:
+            # the queue may block while it's full
+            return await sync_to_async(
+                self._enqueue_messages,
+                thread_sensitive=False,
+            )(email_messages, priority)
+
+        if self._is_circuit_open():
+            return 0
+
+        until = time.monotonic() + timeout if timeout else None
+        email_messages = list(email_messages)
+        # a client opened with `aopen()` is left open for the other calls
+        client = self._async_client
+        if client is None and (client := self._open_async_client()) is None:
+            # failed silently
+            return 0
+
+        try:
+            if self._coalesce:
+                parts = coalescing.coalesce(
+                    email_messages,
+                    settings.MAX_RECIPIENTS,
+                )
+                results = coalescing.get_results(
+                    parts,
+                    await self._asend_all(
+                        [part.message for part in parts],
+                        client,
+                        priority,
+                        until,
+                    ),
+                    len(email_messages),
+                )
+            else:
+                results = await self._asend_all(
+                    email_messages,
+                    client,
+                    priority,
+                    until,
+                )
+        finally:
+            if client is not self._async_client:
+                await client.close()
+
+        if None in results:
+            self._report_unsent(email_messages, results)
+        return results.count(True)
+
+    async def _asend_all(
+        self,
+        email_messages: List[EmailMessage],
+        client: EmailClient,
+        priority: Optional[str],
+        until: Optional[float],
+    ) -> List[Optional[bool]]:
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def send(message: EmailMessage) -> bool:
+            async with semaphore:
+                return await self._asend(message, client, priority, until)
+
+        tasks = [asyncio.ensure_future(send(msg)) for msg in email_messages]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # pending sends are dropped if one of them failed loudly
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _asend(
+        self,
+        message: EmailMessage,
+        client: EmailClient,
+        priority: Optional[str] = None,
+        until: Optional[float] = None,
+    ) -> Optional[bool]:
+        try:
+            await self._asend_payload(
+                self._convert(message),
+                client,
+                priority,
+                until,
+            )
+        except Exception as exc:  # noqa
+            if deadline.is_over(until, exc):
+                # reported with the other unsent messages of the call
+                return None
+            if not self.fail_silently:
+                raise
+            logger.warning('Failed to send email.', exc_info=exc)
+            return False
+        return True
+
+    async def _asend_payload(
+        self,
+        payload: Dict[str, Any],
+        client: EmailClient,
+        priority: Optional[str] = None,
+        until: Optional[float] = None,
+    ) -> None:
+        # the async sends share the rate, not the connections of the lanes
+        lane, payload = lanes.prepare(
+            payload,
+            settings.PRIORITY_HEADER,
+            priority or self._priority,
+        )
+        operation_id, payload = idempotency.prepare(
+            payload,
+            settings.IDEMPOTENCY_HEADER,
+            self._idempotent,
+        )
+        if operation_id is not None and idempotency.is_accepted(operation_id):
+            logger.debug('Skipped already accepted email %s.', operation_id)
+            return
+        kwargs = self._get_send_options(operation_id, until)
+
+        with lanes.use(lane), self._guard():
+            if not instrumentation.is_enabled():
+                poller = await client.begin_send(payload, **kwargs)
+            else:
+                with instrumentation.SendTrace(self, payload) as trace:
+                    poller = await client.begin_send(
+                        payload, **kwargs, **trace.hooks,
+                    )
+
+        if operation_id is not None:
+            idempotency.accept(operation_id, settings.IDEMPOTENCY_TTL)
+        if self._track_delivery:
+            # polled with a sync client, from the tracker's threads
+            self._get_tracker().track(
+                await poller.result(),
+                delivery.describe(payload, settings.DELIVERY_REFERENCE_HEADER),
+            )
+
+    def _create_async_client(self) -> EmailClient:
+        if self._router is not None:
+            return routing.AsyncTenantClient(
+                self._router,
+                lambda resource: self._create_async_email_client(
+                    resource.options,
+                    self._get_resource_rate_limiter(resource),
+                ),
+                self._create_async_default_client,
+                self._get_resource_breaker,
+            )
+        return self._create_async_default_client()
+
+    def _create_async_default_client(self) -> EmailClient:
+        if self._balancer is not None:
+            return balancer.AsyncBalancedClient(
+                self._balancer,
+                lambda resource: self._create_async_email_client(
+                    resource.options,
+                    self._get_resource_rate_limiter(resource),
+                ),
+                self._get_resource_breaker,
+            )
+        return self._create_async_email_client(
+            self._get_credential_options(),
+            self._rate_limiter,
+        )
+
+    def _create_async_email_client(
+        self,
+        credential_options: Dict[str, Optional[str]],
+        rate_limiter: Optional[throttle.RateLimiter],
+    ) -> EmailClient:
+        endpoint, credential = credentials.get_credential(
+            **credential_options,
+            is_async=True,
+        )
+        per_retry_policies = [deadline.AsyncDeadlinePolicy()]
+        if rate_limiter is not None:
+            per_retry_policies.append(
+                throttle.AsyncThrottlePolicy(rate_limiter),
+            )
+        return EmailClient(
+            endpoint,
+            credential,
+            retry_policy=self._get_async_retry_policy(),
+            per_retry_policies=per_retry_policies,
+        )
+
+    def _get_async_retry_policy(self) -> Optional[AsyncRetryPolicy]:
+        """The async pipeline can't run a sync `RetryPolicy`, so an
+        `AsyncRetryPolicy` is built with the options of the configured one.
+        """
+        policy = self._retry_policy
+        if not isinstance(policy, RetryPolicy):
+            return copy.copy(policy)
+        return AsyncRetryPolicy(
+            retry_total=policy.total_retries,
+            retry_connect=policy.connect_retries,
+            retry_read=policy.read_retries,
+            retry_status=policy.status_retries,
+            retry_backoff_factor=policy.backoff_factor,
+            retry_backoff_max=policy.backoff_max,
+            retry_mode=policy.retry_mode,
+            timeout=policy.timeout,
+            # only kept privately, along with the default codes
+            retry_on_status_codes=policy._retry_on_status_codes,
+        )
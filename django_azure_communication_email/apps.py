@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class AzureCommunicationEmailConfig(AppConfig):
+    name = 'django_azure_communication_email'
+    label = 'azure_communication_email'
+    verbose_name = 'Azure Communication Email'
+
+    def ready(self):
+        from . import settings, warmup
+
+        # the processes that serve traffic opt in through the setting
+        if settings.WARM_UP:
+            warmup.start()
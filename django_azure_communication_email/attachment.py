@@ -1,11 +1,58 @@
-import base64
+import binascii
+import hashlib
+import os
 import re
+import threading
+from collections import OrderedDict
 from email.charset import Charset
 from email.mime.base import MIMEBase
-from typing import Tuple, Union
+from typing import IO, Optional, Tuple, Union
 
+from .utils import Registry
 
-Attachment = Union[MIMEBase, Tuple[str, Union[str, bytes], str]]
+
+Content = Union[str, bytes, bytearray, memoryview, os.PathLike, IO[bytes]]
+Attachment = Union[MIMEBase, Tuple[str, Content, str]]
+
+# a multiple of 3, so the chunks are encoded without padding in between
+_CHUNK_SIZE = 3 * 256 * 1024
+
+
+class EncodedContentCache:
+    """A bounded LRU cache of base64 encoded contents, keyed by the hash of
+    the raw content. It's limited by the total length of cached strings.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._items: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_encode(self, content: bytes) -> str:
+        key = hashlib.blake2b(content).digest()
+        with self._lock:
+            if (encoded := self._items.get(key)) is not None:
+                self._items.move_to_end(key)
+                return encoded
+
+        encoded = encode(content)
+        if len(encoded) > self.max_size:
+            return encoded
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = encoded
+                self.size += len(encoded)
+            while self.size > self.max_size:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+        return encoded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
 
 
 class BaseConverter:
@@ -19,8 +66,16 @@ class BaseConverter:
     def get_filetype(self) -> str:
         raise NotImplementedError
 
-    def get_content(self) -> str:
-        """Returns the base64 encoded string."""
+    def get_content(self, cache: Optional[EncodedContentCache] = None) -> str:
+        """Returns the base64 encoded string. Repeated contents are encoded
+        only once if a cache is given.
+        """
+        raise NotImplementedError
+
+    def get_encoded_size(self) -> Optional[int]:
+        """Returns the length of the base64 encoded string without encoding
+        the content, or None if it can't be known upfront.
+        """
         raise NotImplementedError
 
 
@@ -36,14 +91,26 @@ class MIMEBaseConverter(BaseConverter):
     def get_filetype(self) -> str:
         return self._RE_MIMETYPE.search(self.obj.get_content_type()).group(1)
 
-    def get_content(self) -> str:
+    def get_content(self, cache: Optional[EncodedContentCache] = None) -> str:
         payload = self.obj.get_payload()
 
         encoding = str(self.obj.get('content-transfer-encoding', '')).lower()
         if encoding == 'base64':
             return payload
 
-        return base64.b64encode(payload.encode(self.get_charset())).decode()
+        content = payload.encode(self.get_charset())
+        return cache.get_or_encode(content) if cache else encode(content)
+
+    def get_encoded_size(self) -> Optional[int]:
+        payload = self.obj.get_payload()
+
+        encoding = str(self.obj.get('content-transfer-encoding', '')).lower()
+        if encoding == 'base64':
+            return len(payload)
+
+        if payload.isascii():
+            return get_encoded_size(len(payload))
+        return get_encoded_size(len(payload.encode(self.get_charset())))
 
     def get_charset(self) -> str:
         charset = self.obj.get_charset()
@@ -59,7 +126,11 @@ class MIMEBaseConverter(BaseConverter):
 
 
 class TupleBaseConverter(BaseConverter):
-    """Class for attachments that are a triple of (name, type, content)."""
+    """Class for attachments that are a triple of (name, type, content).
+
+    The content can be a string, a bytes-like object, a path to a file or
+    a binary file-like object. Files are read and encoded in chunks.
+    """
 
     def get_filename(self) -> str:
         return self.obj[0]
@@ -67,12 +138,52 @@ class TupleBaseConverter(BaseConverter):
     def get_filetype(self) -> str:
         return self.obj[2]
 
-    def get_content(self) -> str:
+    def get_content(self, cache: Optional[EncodedContentCache] = None) -> str:
         content = self.obj[1]
         if isinstance(content, str):
             content = content.encode()
-
-        return base64.b64encode(content).decode()
+        elif isinstance(content, os.PathLike):
+            with open(content, 'rb') as file:
+                return self._get_file_content(file, cache)
+        elif hasattr(content, 'read'):
+            # the same file can be sent with several requests
+            seekable = hasattr(content, 'seekable') and content.seekable()
+            position = content.tell() if seekable else None
+            try:
+                return self._get_file_content(content, cache)
+            finally:
+                if position is not None:
+                    content.seek(position)
+
+        return cache.get_or_encode(content) if cache else encode(content)
+
+    def get_encoded_size(self) -> Optional[int]:
+        content = self.obj[1]
+        if isinstance(content, str):
+            size = len(content) if content.isascii() \
+                else len(content.encode())
+        elif isinstance(content, os.PathLike):
+            size = os.stat(content).st_size
+        elif hasattr(content, 'read'):
+            try:
+                position = content.tell()
+                size = content.seek(0, os.SEEK_END) - position
+                content.seek(position)
+            except (AttributeError, OSError, ValueError):
+                return None
+        else:
+            size = memoryview(content).nbytes
+
+        return get_encoded_size(size)
+
+    @staticmethod
+    def _get_file_content(
+        file: IO[bytes],
+        cache: Optional[EncodedContentCache],
+    ) -> str:
+        # hashing needs the whole content, so it's read at once
+        return cache.get_or_encode(file.read()) if cache \
+            else encode_file(file)
 
 
 def get_converter(attachment: Attachment) -> BaseConverter:
@@ -82,3 +193,55 @@ def get_converter(attachment: Attachment) -> BaseConverter:
         return TupleBaseConverter(attachment)
     else:
         raise TypeError(f'Unsupported attachment type: {type(attachment)}')
+
+
+def encode(content: Union[bytes, bytearray, memoryview]) -> str:
+    """Encodes any bytes-like object without copying it to `bytes` first.
+    """
+    return binascii.b2a_base64(content, newline=False).decode('ascii')
+
+
+def encode_file(file: IO[bytes]) -> str:
+    """Encodes the file in chunks, so the raw content is never held in
+    memory as a whole.
+    """
+    buffer = memoryview(bytearray(_CHUNK_SIZE))
+    chunks = []
+    while size := _read_into(file, buffer):
+        chunks.append(encode(buffer[:size]))
+    return ''.join(chunks)
+
+
+def get_encoded_size(size: int) -> int:
+    """Returns the length of the base64 encoded content of the given size.
+    """
+    return (size + 2) // 3 * 4
+
+
+def _read_into(file: IO[bytes], buffer: memoryview) -> int:
+    """Fills the buffer from the file, returns the number of bytes read."""
+    filled = 0
+    while filled < len(buffer):
+        if hasattr(file, 'readinto'):
+            size = file.readinto(buffer[filled:])
+        else:
+            data = file.read(len(buffer) - filled)
+            size = len(data)
+            buffer[filled:filled + size] = data
+        if not size:
+            break
+        filled += size
+    return filled
+
+
+_caches: Registry[EncodedContentCache] = Registry(keep_after_fork=True)
+
+
+def get_content_cache(max_size: int) -> Optional[EncodedContentCache]:
+    """Returns the process-wide cache of the given size, or None if the size
+    is 0.
+    """
+    if not max_size:
+        return None
+
+    return _caches.get(max_size, lambda: EncodedContentCache(max_size))
@@ -1,5 +1,13 @@
+import copy
+import functools
 import logging
-from typing import Any, Dict, Iterable, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import (
+    Any, Callable, ContextManager, Dict, Hashable, Iterable, List, Optional,
+    Sized,
+)
 
 from azure.communication.email import EmailClient
 from azure.core.pipeline.policies import RetryPolicy
@@ -7,8 +15,13 @@ from azure.core.pipeline.policies import RetryPolicy
 from django.core.exceptions import ImproperlyConfigured
 from django.core.mail import EmailMessage
 from django.core.mail.backends.base import BaseEmailBackend
+from django.utils.module_loading import import_string
 
-from . import attachment, settings, utils
+from . import (
+    attachment, balancer, circuit, clients, coalescing, credentials, deadline,
+    delivery, dispatcher, exceptions, idempotency, instrumentation, lanes,
+    metrics, routing, settings, streaming, throttle, utils,
+)
 
 
 logger = logging.getLogger('django_azure_communication_email')
@@ -26,7 +39,21 @@ class ACEmailBackend(BaseEmailBackend):
         client_secret: Optional[str] = None,
         endpoint: Optional[str] = None,
         key_credential: Optional[str] = None,
+        resources: Optional[List[Dict[str, Any]]] = None,
+        tenants: Optional[Dict[str, Dict[str, Any]]] = None,
+        tenant_resolver: Optional[routing.Resolver] = None,
         retry_policy: Optional[RetryPolicy] = None,
+        max_workers: Optional[int] = None,
+        rate_limit_per_minute: Optional[int] = None,
+        rate_limit_per_hour: Optional[int] = None,
+        persistent_client: Optional[bool] = None,
+        background: Optional[bool] = None,
+        outbox: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        idempotent: Optional[bool] = None,
+        track_delivery: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
         fail_silently=False,
         **kwargs,
     ) -> None:
@@ -40,39 +67,76 @@ class ACEmailBackend(BaseEmailBackend):
         self._endpoint = endpoint or settings.ENDPOINT
         self._key_credential = key_credential or settings.KEY_CREDENTIAL
         self._retry_policy = retry_policy or settings.RETRY_POLICY
+        self._max_workers = max_workers or settings.MAX_WORKERS
+        self._rate_limit_per_minute = rate_limit_per_minute \
+            or settings.RATE_LIMIT_PER_MINUTE
+        self._rate_limit_per_hour = rate_limit_per_hour \
+            or settings.RATE_LIMIT_PER_HOUR
+        self._rate_limiter = throttle.get_rate_limiter(
+            per_minute=self._rate_limit_per_minute,
+            per_hour=self._rate_limit_per_hour,
+            cache_alias=settings.RATE_LIMIT_CACHE,
+        )
+        self._balancer = None
+        if resources := resources or settings.RESOURCES:
+            self._balancer = balancer.get_balancer(
+                resources,
+                settings.FAILOVER_COOLDOWN,
+            )
+        self._router = None
+        tenant_resolver = tenant_resolver or settings.TENANT_RESOLVER
+        if isinstance(tenant_resolver, str):
+            tenant_resolver = import_string(tenant_resolver)
+        tenants = tenants or settings.TENANTS
+        if tenants or tenant_resolver:
+            self._router = routing.get_router(
+                tenants or {},
+                header=settings.TENANT_HEADER,
+                resolver=tenant_resolver,
+            )
+        # the balanced resources and the tenants have breakers of their own
+        self._circuit_breaker = None
+        if self._balancer is None and self._router is None:
+            self._circuit_breaker = self._get_resource_breaker(None)
+        self._persistent_client = settings.PERSISTENT_CLIENT \
+            if persistent_client is None else persistent_client
+        self._background = settings.BACKGROUND \
+            if background is None else background
+        self._outbox = settings.OUTBOX if outbox is None else outbox
+        self._coalesce = settings.COALESCE if coalesce is None else coalesce
+        self._idempotent = settings.IDEMPOTENT \
+            if idempotent is None else idempotent
+        self._track_delivery = settings.DELIVERY_TRACKING \
+            if track_delivery is None else track_delivery
+        self._timeout = timeout or settings.TIMEOUT
+        self._priority = lanes.check(priority or settings.PRIORITY)
+        self._attachment_cache = attachment.get_content_cache(
+            settings.ATTACHMENT_CACHE_SIZE,
+        )
+
+        if settings.METRICS:
+            metrics.install()
 
         self._client: EmailClient | None = None
 
     def open(self) -> None:
-        if self._client is not None:
-            return
+        if self._client is None:
+            self._client = self._open_client()
 
+    def _open_client(self) -> Optional[EmailClient]:
+        """Returns the pooled client if it's persistent, a new one
+        otherwise, or None if it failed silently.
+        """
+        trace = instrumentation.OpenTrace(self) \
+            if instrumentation.is_enabled() else nullcontext()
         try:
-            if conn_str := self._connection_string:
-                self._client = EmailClient.from_connection_string(
-                    conn_str,
-                    retry_policy=self._retry_policy
-                )
-            elif self._tenant_id and self._endpoint:
-                from azure.identity import DefaultAzureCredential
-                self._client = EmailClient(
-                    self._endpoint,
-                    DefaultAzureCredential(),  # type: ignore
-                    retry_policy=self._retry_policy
-                )
-            elif self._key_credential and self._endpoint:
-                from azure.core.credentials import AzureKeyCredential
-                self._client = EmailClient(
-                    self._endpoint,
-                    AzureKeyCredential(self._key_credential),
-                    retry_policy=self._retry_policy
-                )
-            else:
-                raise ImproperlyConfigured(
-                    'You must specify either a connection string,'
-                    ' or tenant ID & client ID & client secret & communication'
-                    ' endpoint, or key credential & communication endpoint.'
-                )
+            with trace:
+                if self._persistent_client:
+                    return clients.get_client(
+                        self._get_client_key(),
+                        self._create_client,
+                    )
+                return self._create_client()
         except Exception as exc:  # noqa
             if not self.fail_silently:
                 raise
@@ -80,56 +144,641 @@ class ACEmailBackend(BaseEmailBackend):
                 'Failed to open connection to Azure Communication Email.',
                 exc_info=exc,
             )
+            return None
 
     def close(self) -> None:
+        # a persistent client stays open in the registry for the next calls
         self._client = None
 
-    def send_messages(self, email_messages: Iterable[EmailMessage]) -> int:
+    def _create_client(self) -> EmailClient:
+        if self._router is not None:
+            return routing.TenantClient(
+                self._router,
+                self._hold_tenant_client,
+                self._get_default_client,
+                self._get_resource_breaker,
+            )
+        return self._create_default_client()
+
+    def _get_default_client(self) -> EmailClient:
+        """Returns the pooled client of the messages without a tenant."""
+        return clients.get_client(
+            (*self._get_client_key(), None),
+            self._create_default_client,
+        )
+
+    def _get_pooled_clients(self) -> List[EmailClient]:
+        """Returns the pooled `EmailClient` of every configured resource.
+        Raises `ImproperlyConfigured` if the sends don't reuse the client.
+        """
+        found = []
+        if self._router is not None:
+            found += map(
+                self._get_tenant_client,
+                self._router.resources.values(),
+            )
+        if self._balancer is not None:
+            found += map(self._get_resource_client, self._balancer.resources)
+        elif self._router is None:
+            if not self._persistent_client:
+                raise ImproperlyConfigured(
+                    'The sends only reuse the warm client with'
+                    ' AZURE_COMMUNICATION_PERSISTENT_CLIENT = True.'
+                )
+            found.append(clients.get_client(
+                self._get_client_key(),
+                self._create_client,
+            ))
+        elif any(self._get_credential_options().values()):
+            found.append(self._get_default_client())
+        return found
+
+    def _create_default_client(self) -> EmailClient:
+        if self._balancer is not None:
+            return balancer.BalancedClient(
+                self._balancer,
+                self._get_resource_client,
+                self._get_resource_breaker,
+            )
+        return self._create_email_client(
+            self._get_credential_options(),
+            self._rate_limiter,
+        )
+
+    def _create_email_client(
+        self,
+        credential_options: Dict[str, Optional[str]],
+        rate_limiter: Optional[throttle.RateLimiter],
+    ) -> EmailClient:
+        endpoint, credential = credentials.get_credential(
+            **credential_options,
+        )
+        per_retry_policies = [deadline.DeadlinePolicy()]
+        if rate_limiter is not None:
+            per_retry_policies.append(throttle.ThrottlePolicy(rate_limiter))
+        return EmailClient(
+            endpoint,
+            credential,
+            # a pipeline links its policies to the next ones, so the clients
+            # can't share a policy
+            retry_policy=copy.copy(self._retry_policy),
+            per_retry_policies=per_retry_policies,
+        )
+
+    def _get_resource_client(self, resource: balancer.Resource) -> EmailClient:
+        """Returns the pooled client of one of the balanced resources."""
+        rate_limiter = self._get_resource_rate_limiter(resource)
+        return clients.get_client(
+            (*resource.key, self._retry_policy, rate_limiter),
+            lambda: self._create_email_client(resource.options, rate_limiter),
+        )
+
+    def _get_tenant_client(self, resource: balancer.Resource) -> EmailClient:
+        with self._hold_tenant_client(resource) as client:
+            return client
+
+    def _hold_tenant_client(
+        self,
+        resource: balancer.Resource,
+    ) -> ContextManager[EmailClient]:
+        """Holds the client of a tenant, which is kept warm while the
+        tenant is among the recently used ones.
+        """
+        rate_limiter = self._get_resource_rate_limiter(resource)
+        return routing.hold_client(
+            (*resource.key, self._retry_policy, rate_limiter),
+            resource,
+            lambda: self._create_email_client(resource.options, rate_limiter),
+            max_size=settings.TENANT_CACHE_SIZE,
+            idle_timeout=settings.TENANT_IDLE_TIMEOUT,
+        )
+
+    def _get_resource_rate_limiter(
+        self,
+        resource: balancer.Resource,
+    ) -> Optional[throttle.RateLimiter]:
+        # each resource has a quota of its own
+        return throttle.get_rate_limiter(
+            per_minute=resource.rate_limit_per_minute
+            or self._rate_limit_per_minute,
+            per_hour=resource.rate_limit_per_hour or self._rate_limit_per_hour,
+            cache_alias=settings.RATE_LIMIT_CACHE,
+            name=resource.name,
+        )
+
+    def _get_resource_breaker(
+        self,
+        resource: Optional[balancer.Resource],
+    ) -> Optional[circuit.CircuitBreaker]:
+        """Returns the circuit breaker of a resource, or of the default one
+        for None, unless the default resources are balanced.
+        """
+        if resource is not None:
+            name = resource.name
+        elif self._balancer is None:
+            name = self._endpoint or self._connection_string or ''
+        else:
+            return None
+        return circuit.get_circuit_breaker(
+            name=name,
+            failure_threshold=settings.CIRCUIT_BREAKER_THRESHOLD,
+            failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            window=settings.CIRCUIT_BREAKER_WINDOW,
+            min_requests=settings.CIRCUIT_BREAKER_MIN_REQUESTS,
+            reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+            cache_alias=settings.CIRCUIT_BREAKER_CACHE,
+        )
+
+    def _get_credential_options(self) -> Dict[str, Optional[str]]:
+        return {
+            'connection_string': self._connection_string,
+            'tenant_id': self._tenant_id,
+            'client_id': self._client_id,
+            'client_secret': self._client_secret,
+            'endpoint': self._endpoint,
+            'key_credential': self._key_credential,
+        }
+
+    def _get_client_key(self) -> Hashable:
+        return (
+            *self._get_credential_options().values(),
+            self._retry_policy,
+            self._rate_limiter,
+            self._balancer,
+            self._router,
+        )
+
+    def send_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        *,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+    ) -> int:
         """
         It's your responsibility to validate all data before sending an email.
+
+        The sends stop once `timeout` seconds are over, and the messages
+        that were not sent by then are reported with `DeadlineExceeded`.
+        The `priority` applies to the messages without a priority header.
         """
-        if not email_messages:
+        if (email_messages := _get_messages(email_messages)) is None:
             return 0
+        timeout = timeout or self._timeout
+        priority = lanes.check(priority or self._priority)
+        if not instrumentation.is_enabled():
+            return self._send_messages(email_messages, timeout, priority)
 
-        self.open()
-        if self._client is None:
+        with instrumentation.BatchTrace(self, email_messages) as trace:
+            trace.sent = self._send_messages(
+                email_messages,
+                timeout,
+                priority,
+            )
+        return trace.sent
+
+    def stream_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        *,
+        progress: Optional[Callable[[int, int], Any]] = None,
+    ) -> int:
+        """Sends the messages of any iterable, like a generator or
+        `QuerySet.iterator()`, without holding them all in memory.
+
+        The messages are converted ahead of the sends, with at most
+        `STREAM_MAX_PENDING` of them waiting, and `progress(sent, failed)` is
+        called every `STREAM_CHUNK_SIZE` messages and at the end. The
+        messages are not coalesced, and the timeout doesn't apply.
+        """
+        if (email_messages := streaming.peek(email_messages)) is None:
+            return 0
+        if not instrumentation.is_enabled():
+            return self._stream_messages(email_messages, progress)
+
+        with instrumentation.BatchTrace(self, email_messages) as trace:
+            trace.sent = self._stream_messages(email_messages, progress)
+        return trace.sent
+
+    def _stream_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        progress: Optional[Callable[[int, int], Any]],
+    ) -> int:
+        counter = streaming.Progress(settings.STREAM_CHUNK_SIZE, progress)
+        if self._outbox or self._background:
+            # one INSERT or one hand-over per chunk
+            for chunk in streaming.chunked(
+                email_messages,
+                settings.STREAM_CHUNK_SIZE,
+            ):
+                sent = self._send_messages(chunk)
+                counter.add(sent, len(chunk) - sent)
+                counter.report()
+            counter.report(force=True)
+            return counter.sent
+
+        if self._is_circuit_open():
+            return 0
+        if (client := self._get_call_client()) is None:
+            # failed silently
+            return 0
+
+        try:
+            with nullcontext() if self._persistent_client else client:
+                streaming.send_all(
+                    email_messages,
+                    self._convert,
+                    lambda payload: self._send_payload(payload, None, client),
+                    self._handle_stream_error,
+                    workers=self._max_workers,
+                    max_pending=settings.STREAM_MAX_PENDING,
+                    progress=counter,
+                )
+        finally:
+            self._release_call_client(client)
+        return counter.sent
+
+    def _get_call_client(self) -> Optional[EmailClient]:
+        """Returns the client opened with `open()`, or one for the call
+        only, so the concurrent calls don't share the state of the backend.
+        """
+        if self._client is not None:
+            return self._client
+        return self._open_client()
+
+    def _release_call_client(self, client: EmailClient) -> None:
+        # a client opened with `open()` is dropped after the call, and a
+        # persistent client stays open in the registry for the next calls
+        if client is self._client:
+            self.close()
+
+    def _handle_stream_error(self, exc: Exception) -> None:
+        if not self.fail_silently:
+            raise exc
+        logger.warning('Failed to send email.', exc_info=exc)
+
+    def _send_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+    ) -> int:
+        if self._outbox:
+            return self._store_messages(email_messages, priority)
+        if self._background:
+            return self._enqueue_messages(email_messages, priority)
+
+        if self._is_circuit_open():
+            return 0
+
+        until = None
+        if timeout:
+            until = time.monotonic() + timeout
+            email_messages = list(email_messages)
+        if (client := self._get_call_client()) is None:
             # failed silently
             return 0
 
-        sent = 0
-        with self._client:
-            for message in email_messages:
-                try:
-                    self._client.begin_send(self.convert_message(message))
-                    sent += 1
-                except Exception as exc:  # noqa
-                    if not self.fail_silently:
-                        raise
-                    logger.warning('Failed to send email.', exc_info=exc)
+        try:
+            # a non-persistent client closes its HTTP session on exit
+            with nullcontext() if self._persistent_client else client:
+                if self._coalesce:
+                    email_messages = list(email_messages)
+                    parts = coalescing.coalesce(
+                        email_messages,
+                        settings.MAX_RECIPIENTS,
+                    )
+                    results = coalescing.get_results(
+                        parts,
+                        self._send_all(
+                            [part.message for part in parts],
+                            client,
+                            priority,
+                            until,
+                        ),
+                        len(email_messages),
+                    )
+                else:
+                    results = self._send_all(
+                        email_messages,
+                        client,
+                        priority,
+                        until,
+                    )
+        finally:
+            self._release_call_client(client)
+
+        if None in results:
+            self._report_unsent(email_messages, results)
+        return results.count(True)
+
+    def _report_unsent(
+        self,
+        email_messages: List[EmailMessage],
+        results: List[Optional[bool]],
+    ) -> None:
+        """Raises `DeadlineExceeded` with the messages that were skipped
+        because the deadline was over. The ones that failed otherwise were
+        raised or logged already.
+        """
+        unsent = [
+            message
+            for message, result in zip(email_messages, results)
+            if result is None
+        ]
+        exc = exceptions.DeadlineExceeded(
+            f'{len(unsent)} of {len(email_messages)} emails were not sent'
+            f' in time.',
+            sent=[
+                message
+                for message, result in zip(email_messages, results)
+                if result
+            ],
+            unsent=unsent,
+        )
+        if not self.fail_silently:
+            raise exc
+        logger.warning('Failed to send emails.', exc_info=exc)
+
+    def _is_circuit_open(self) -> bool:
+        """Fails fast, without opening the client, while the circuit breaker
+        holds the emails back.
+        """
+        if self._circuit_breaker is None:
+            return False
+
+        try:
+            self._circuit_breaker.check()
+        except exceptions.CircuitOpen as exc:
+            if not self.fail_silently:
+                raise
+            logger.warning('Failed to send emails.', exc_info=exc)
+            return True
+        return False
+
+    def _send_all(
+        self,
+        email_messages: Iterable[EmailMessage],
+        client: EmailClient,
+        priority: Optional[str] = None,
+        until: Optional[float] = None,
+    ) -> List[Optional[bool]]:
+        """Returns the result of each send: True if it was sent, False if it
+        failed silently, and None if the deadline was over.
+        """
+        if self._max_workers > 1:
+            return self._send_concurrently(
+                email_messages,
+                client,
+                priority,
+                until,
+            )
+        return [
+            self._send(message, client, priority, until)
+            for message in email_messages
+        ]
+
+    def _send(
+        self,
+        message: EmailMessage,
+        client: EmailClient,
+        priority: Optional[str] = None,
+        until: Optional[float] = None,
+    ) -> Optional[bool]:
+        try:
+            self._send_payload(self._convert(message), priority, client, until)
+        except Exception as exc:  # noqa
+            if deadline.is_over(until, exc):
+                # reported with the other unsent messages of the call
+                return None
+            if not self.fail_silently:
+                raise
+            logger.warning('Failed to send email.', exc_info=exc)
+            return False
+        return True
+
+    def _send_payload(
+        self,
+        payload: Dict[str, Any],
+        priority: Optional[str] = None,
+        client: Optional[EmailClient] = None,
+        until: Optional[float] = None,
+    ) -> None:
+        """Sends a converted message, in the lane of its priority header, or
+        of `priority`, or of the backend priority, through `client` or the
+        one opened with `open()`.
+        """
+        client = client or self._client
+        lane, payload = lanes.prepare(
+            payload,
+            settings.PRIORITY_HEADER,
+            priority or self._priority,
+        )
+        operation_id, payload = idempotency.prepare(
+            payload,
+            settings.IDEMPOTENCY_HEADER,
+            self._idempotent,
+        )
+        if operation_id is not None and idempotency.is_accepted(operation_id):
+            logger.debug('Skipped already accepted email %s.', operation_id)
+            return
+        kwargs = self._get_send_options(operation_id, until)
+
+        with self._hold_slot(lane), lanes.use(lane), self._guard():
+            if not instrumentation.is_enabled():
+                poller = client.begin_send(payload, **kwargs)
+            else:
+                with instrumentation.SendTrace(self, payload) as trace:
+                    poller = client.begin_send(
+                        payload, **kwargs, **trace.hooks,
+                    )
+
+        if operation_id is not None:
+            idempotency.accept(operation_id, settings.IDEMPOTENCY_TTL)
+        if self._track_delivery:
+            self._get_tracker().track(
+                poller.result(),
+                delivery.describe(payload, settings.DELIVERY_REFERENCE_HEADER),
+            )
+
+    def _get_send_options(
+        self,
+        operation_id: Optional[str],
+        until: Optional[float],
+    ) -> Dict[str, Any]:
+        # the poller would poll in a thread of its own, the deliveries are
+        # tracked in batches instead
+        options = {'polling': False, **deadline.get_options(until)}
+        if operation_id is not None:
+            options['operation_id'] = operation_id
+        if self._track_delivery:
+            options['cls'] = delivery.get_location
+        return options
+
+    def _get_tracker(self) -> delivery.Tracker:
+        key = self._get_client_key()
+        return delivery.get_tracker(key, lambda: delivery.Tracker(
+            lambda: clients.get_client(key, self._create_client),
+            sender=type(self),
+            workers=settings.DELIVERY_POLL_WORKERS,
+            interval=settings.DELIVERY_POLL_INTERVAL,
+            max_interval=settings.DELIVERY_POLL_INTERVAL_MAX,
+            timeout=settings.DELIVERY_TIMEOUT,
+        ))
+
+    @staticmethod
+    def _hold_slot(lane: str) -> ContextManager:
+        """Holds one of the connections shared by the priority lanes."""
+        if not settings.PRIORITY_LANES:
+            return nullcontext()
+        return lanes.get_lanes(
+            settings.PRIORITY_LANES,
+            settings.PRIORITY_CONNECTIONS,
+        ).slot(lane)
+
+    def _guard(self) -> ContextManager:
+        return circuit.guard(self._circuit_breaker)
+
+    def _send_concurrently(
+        self,
+        email_messages: Iterable[EmailMessage],
+        client: EmailClient,
+        priority: Optional[str] = None,
+        until: Optional[float] = None,
+    ) -> List[Optional[bool]]:
+        """Fans the messages out over a bounded pool of threads that share
+        the same client.
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix='django_azure_communication_email',
+        )
+        futures = [
+            executor.submit(self._send, msg, client, priority, until)
+            for msg in email_messages
+        ]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            # pending sends are dropped if one of them failed loudly
+            executor.shutdown(cancel_futures=True)
+
+    def _enqueue_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        priority: Optional[str] = None,
+    ) -> int:
+        """Converts the messages and hands them over to the background
+        dispatcher of their priority without waiting for them to be sent.
+        """
+        queued = 0
+        for message in email_messages:
+            try:
+                payload = self._convert(message)
+                lane = lanes.prepare(
+                    payload,
+                    settings.PRIORITY_HEADER,
+                    priority or self._priority,
+                )[0]
+                queued += dispatcher.get_dispatcher(
+                    (*self._get_client_key(), lane),
+                    functools.partial(self._create_dispatcher, lane),
+                ).put(payload)
+            except Exception as exc:  # noqa
+                if not self.fail_silently:
+                    raise
+                logger.warning('Failed to queue email.', exc_info=exc)
+        return queued
+
+    def _create_dispatcher(self, lane: str) -> dispatcher.Dispatcher:
+        sender = copy.copy(self)
+        sender._client = None
+        sender._priority = lane
+        sender._background = False
+        sender._persistent_client = True
+        sender.fail_silently = False
+
+        def send(payload: Dict[str, Any]) -> None:
+            sender.open()
+            sender._send_payload(payload)
+
+        return dispatcher.Dispatcher(
+            send,
+            workers=settings.BACKGROUND_WORKERS,
+            queue_size=settings.BACKGROUND_QUEUE_SIZE,
+            full_policy=settings.BACKGROUND_QUEUE_FULL_POLICY,
+        )
+
+    def _store_messages(
+        self,
+        email_messages: Iterable[EmailMessage],
+        priority: Optional[str] = None,
+    ) -> int:
+        """Converts the messages and stores them in the database outbox with
+        one INSERT, the `drain_email_outbox` command sends them later. The
+        rank of the priority is stored for the claims, and a priority other
+        than the default is kept in the header for the lanes.
+        """
+        from .outbox.models import OutboxMessage
+
+        rows = []
+        for message in email_messages:
+            try:
+                payload = self._convert(message)
+                lane = lanes.prepare(
+                    payload,
+                    settings.PRIORITY_HEADER,
+                    priority or self._priority,
+                )[0]
+                if lane != settings.PRIORITY:
+                    payload = lanes.mark(
+                        payload,
+                        settings.PRIORITY_HEADER,
+                        lane,
+                    )
+                rows.append(OutboxMessage(
+                    payload=payload,
+                    priority=lanes.rank(lane),
+                ))
+            except Exception as exc:  # noqa
+                if not self.fail_silently:
+                    raise
+                logger.warning('Failed to store email.', exc_info=exc)
+
+        try:
+            OutboxMessage.objects.bulk_create(rows)
+        except Exception as exc:  # noqa
+            if not self.fail_silently:
+                raise
+            logger.warning('Failed to store emails.', exc_info=exc)
+            return 0
+        return len(rows)
+
+    def _convert(self, message: EmailMessage) -> Dict[str, Any]:
+        if not instrumentation.is_enabled():
+            return self.convert_message(message)
 
-        self.close()
-        return sent
+        with instrumentation.ConvertTrace(self, message) as trace:
+            trace.payload = self.convert_message(message)
+        return trace.payload
 
     def convert_message(self, message: EmailMessage) -> Dict[str, Any]:
         """Converts the EmailMessage object to dictionary."""
+        self._check_payload_size(message)
+
         msg = {
             'senderAddress': utils.get_name_and_email(message.from_email)[1],
             'content': {'subject': message.subject},
-            'recipients': {},
+            'recipients': utils.get_message_recipients(message),
         }
         if message.body:
             msg['content']['plainText'] = message.body
         if html_msg := utils.get_html_message(message):
             msg['content']['html'] = html_msg
-        if message.to:
-            msg['recipients']['to'] = self._build_recipients(message.to)
-        if message.cc:
-            msg['recipients']['cc'] = self._build_recipients(message.cc)
-        if message.bcc:
-            msg['recipients']['bcc'] = self._build_recipients(message.bcc)
         if message.attachments:
             msg['attachments'] = [
-                self._build_attachment(file)
+                self._build_attachment(file, self._attachment_cache)
                 for file in message.attachments
             ]
         if message.extra_headers:
@@ -141,18 +790,50 @@ class ACEmailBackend(BaseEmailBackend):
 
         return msg
 
+    @staticmethod
+    def _check_payload_size(message: EmailMessage) -> None:
+        """Rejects the message before any encoding or network work if it's
+        over the size limit.
+        """
+        if not (limit := settings.MAX_PAYLOAD_SIZE):
+            return
+
+        size = len(message.subject) + len(message.body) \
+            + len(utils.get_html_message(message))
+        for file in message.attachments:
+            size += attachment.get_converter(file).get_encoded_size() or 0
+
+        if size > limit:
+            raise exceptions.PayloadTooLarge(
+                f'The email is about {size} bytes long, which is over'
+                f' the limit of {limit} bytes.'
+            )
+
     @staticmethod
     def _build_recipients(recipients: Iterable[str]) -> List[Dict[str, str]]:
-        return [
-            {'displayName': name, 'address': email}
-            for name, email in map(utils.get_name_and_email, recipients)
-        ]
+        return utils.get_recipients(recipients)
 
     @staticmethod
-    def _build_attachment(file: attachment.Attachment) -> Dict[str, str]:
+    def _build_attachment(
+        file: attachment.Attachment,
+        cache: Optional[attachment.EncodedContentCache] = None,
+    ) -> Dict[str, str]:
         converter = attachment.get_converter(file)
         return {
             'name': converter.get_filename(),
             'contentType': converter.get_filetype(),
-            'contentInBase64': converter.get_content(),
+            'contentInBase64': converter.get_content(cache),
         }
+
+
+def _get_messages(
+    email_messages: Iterable[EmailMessage],
+) -> Optional[Iterable[EmailMessage]]:
+    """Returns the messages to send, or None if there are none. Iterators,
+    which are always true, are peeked at.
+    """
+    if not email_messages:
+        return None
+    if isinstance(email_messages, Sized):
+        return email_messages
+    return streaming.peek(email_messages)
@@ -0,0 +1,252 @@
+"""Spreads the sends over several Azure Communication Services resources by
+weight, and fails over to the other resources when one of them is
+throttling or failing. Each resource has a circuit breaker of its own,
+and the resources with an open circuit are skipped.
+
+The throttled and failed requests are only retried on the last resource
+tried, the others fail over on the first 429 or 5xx response.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from . import circuit, credentials
+from .exceptions import CircuitOpen
+from .utils import Registry
+
+
+RESOURCE_OPTIONS = (
+    'connection_string', 'tenant_id', 'client_id', 'client_secret',
+    'endpoint', 'key_credential',
+)
+_OPTIONS = (
+    *RESOURCE_OPTIONS, 'weight', 'rate_limit_per_minute',
+    'rate_limit_per_hour',
+)
+
+
+class Resource:
+    """An Azure Communication Services resource and its share of the sends.
+    """
+
+    def __init__(
+        self,
+        *,
+        weight: int = 1,
+        rate_limit_per_minute: Optional[int] = None,
+        rate_limit_per_hour: Optional[int] = None,
+        **options: Optional[str],
+    ) -> None:
+        if unknown := set(options) - set(RESOURCE_OPTIONS):
+            raise ValueError(
+                f'Unknown resource options: {", ".join(sorted(unknown))}.'
+            )
+        if weight < 1:
+            raise ValueError('The resource weight must be at least 1.')
+
+        self.options = {name: options.get(name) for name in RESOURCE_OPTIONS}
+        self.weight = weight
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.rate_limit_per_hour = rate_limit_per_hour
+        self.unhealthy_until = 0.0
+        self._current_weight = 0
+
+    @property
+    def name(self) -> str:
+        return self.options['endpoint'] \
+            or self.options['connection_string'] or ''
+
+    @property
+    def endpoint(self) -> str:
+        if connection_string := self.options['connection_string']:
+            return credentials.parse_connection_string(connection_string)[0]
+        return self.options['endpoint'] or ''
+
+    @property
+    def key(self) -> Hashable:
+        return tuple(self.options.values())
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+
+class Balancer:
+    """Picks the resource of each send with a smooth weighted round-robin,
+    so the resources of equal weight simply take turns.
+    """
+
+    def __init__(self, resources: Iterable[Resource], cooldown: float) -> None:
+        self.resources = list(resources)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def get_resources(self) -> List[Resource]:
+        """Returns the resources in the order to try them: the picked one,
+        the other healthy ones, then the unhealthy ones.
+        """
+        with self._lock:
+            healthy = [
+                resource for resource in self.resources
+                if resource.is_healthy()
+            ]
+            if healthy:
+                total = sum(resource.weight for resource in healthy)
+                for resource in healthy:
+                    resource._current_weight += resource.weight
+                picked = max(healthy, key=lambda r: r._current_weight)
+                picked._current_weight -= total
+                healthy.remove(picked)
+                healthy.insert(0, picked)
+
+        unhealthy = sorted(
+            (resource for resource in self.resources
+             if resource not in healthy),
+            key=lambda resource: resource.unhealthy_until,
+        )
+        return healthy + unhealthy
+
+    def mark_failed(self, resource: Resource) -> None:
+        resource.unhealthy_until = time.monotonic() + self.cooldown
+
+
+BreakerGetter = Callable[[Resource], Optional[circuit.CircuitBreaker]]
+
+
+def _no_breaker(resource: Resource) -> None:
+    return None
+
+
+def _can_fail_over(exc: Exception) -> bool:
+    return isinstance(exc, CircuitOpen) or circuit.is_failure(exc)
+
+
+def _get_options(
+    resource: Resource,
+    resources: List[Resource],
+    kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    if resource is resources[-1]:
+        return kwargs
+    # read by the retry policy of the request
+    return {**kwargs, 'retry_status': 0}
+
+
+class BalancedClient:
+    """Looks like an `EmailClient`, and sends through the resources of the
+    balancer. The clients of the resources are pooled, so closing this
+    one doesn't close them.
+    """
+
+    def __init__(
+        self,
+        balancer: Balancer,
+        get_client: Callable[[Resource], Any],
+        get_breaker: Optional[BreakerGetter] = None,
+    ) -> None:
+        self.balancer = balancer
+        self.get_client = get_client
+        self.get_breaker = get_breaker or _no_breaker
+
+    def begin_send(self, message: Dict[str, Any], **kwargs) -> Any:
+        resources = self.balancer.get_resources()
+        for resource in resources:
+            try:
+                with circuit.guard(self.get_breaker(resource)):
+                    return self.get_client(resource).begin_send(
+                        message,
+                        **_get_options(resource, resources, kwargs),
+                    )
+            except Exception as exc:  # noqa
+                if resource is resources[-1] or not _can_fail_over(exc):
+                    raise
+                if not isinstance(exc, CircuitOpen):
+                    self.balancer.mark_failed(resource)
+
+    def send_request(self, request: Any, **kwargs) -> Any:
+        """Sends the request through the resource it's addressed to, like
+        the operation URLs returned by `begin_send`.
+        """
+        host = urlsplit(request.url).netloc
+        for resource in self.balancer.resources:
+            if urlsplit(resource.endpoint).netloc == host:
+                return self.get_client(resource).send_request(
+                    request, **kwargs,
+                )
+        raise ValueError(f'No resource matches {request.url}.')
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'BalancedClient':
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:  # noqa
+        self.close()
+
+
+class AsyncBalancedClient:
+    """An async version of the `BalancedClient`. Async clients are bound to
+    their event loop, so it owns and closes the clients of the resources.
+    """
+
+    def __init__(
+        self,
+        balancer: Balancer,
+        create_client: Callable[[Resource], Any],
+        get_breaker: Optional[BreakerGetter] = None,
+    ) -> None:
+        self.balancer = balancer
+        self.create_client = create_client
+        self.get_breaker = get_breaker or _no_breaker
+        self._clients: Dict[Hashable, Any] = {}
+
+    async def begin_send(self, message: Dict[str, Any], **kwargs) -> Any:
+        resources = self.balancer.get_resources()
+        for resource in resources:
+            try:
+                with circuit.guard(self.get_breaker(resource)):
+                    return await self._get_client(resource).begin_send(
+                        message,
+                        **_get_options(resource, resources, kwargs),
+                    )
+            except Exception as exc:  # noqa
+                if resource is resources[-1] or not _can_fail_over(exc):
+                    raise
+                if not isinstance(exc, CircuitOpen):
+                    self.balancer.mark_failed(resource)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+    def _get_client(self, resource: Resource) -> Any:
+        if (client := self._clients.get(resource.key)) is None:
+            client = self._clients[resource.key] = \
+                self.create_client(resource)
+        return client
+
+
+_balancers: Registry[Balancer] = Registry(keep_after_fork=True)
+
+
+def get_balancer(
+    resources: Iterable[Dict[str, Any]],
+    cooldown: float,
+) -> Balancer:
+    """Returns the process-wide balancer of the resources, which are given
+    as dictionaries of `Resource` options.
+    """
+    resources = list(resources)
+    key = (
+        tuple(
+            tuple(resource.get(name) for name in _OPTIONS)
+            for resource in resources
+        ),
+        cooldown,
+    )
+    return _balancers.get(key, lambda: Balancer(
+        [Resource(**resource) for resource in resources],
+        cooldown,
+    ))
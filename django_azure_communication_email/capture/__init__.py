@@ -0,0 +1,10 @@
+def __getattr__(name):
+    # the backend imports the Azure SDK, so it's only imported on first use
+    if name != 'EmailBackend':
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}'
+        )
+
+    from .backend import CaptureEmailBackend
+    globals()[name] = CaptureEmailBackend
+    return CaptureEmailBackend
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CaptureConfig(AppConfig):
+    name = 'django_azure_communication_email.capture'
+    label = 'azure_communication_email_capture'
+    verbose_name = 'Azure Communication Email capture'
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional
+
+from .. import instrumentation, lanes, settings
+from ..backend import ACEmailBackend
+from . import writer
+
+
+class CaptureEmailBackend(ACEmailBackend):
+    """Converts the messages like `ACEmailBackend`, and writes the payloads
+    to JSONL files instead of sending them to Azure.
+    """
+
+    def __init__(
+        self,
+        *,
+        capture_dir: Optional[str] = None,
+        capture_max_bytes: Optional[int] = None,
+        capture_max_age: Optional[float] = None,
+        capture_gzip: Optional[bool] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+
+        self._capture_dir = capture_dir or settings.CAPTURE_DIR
+        self._capture_max_bytes = capture_max_bytes \
+            or settings.CAPTURE_MAX_BYTES
+        self._capture_max_age = capture_max_age or settings.CAPTURE_MAX_AGE
+        self._capture_gzip = settings.CAPTURE_GZIP \
+            if capture_gzip is None else capture_gzip
+
+        # the payloads are always written right away, and the writers are
+        # pooled by the `writer` module
+        self._background = False
+        self._outbox = False
+        self._persistent_client = False
+        self._circuit_breaker = None
+        self._track_delivery = False
+
+    def _send_payload(
+        self,
+        payload: Dict[str, Any],
+        priority: Optional[str] = None,
+        client: Optional[Any] = None,
+        until: Optional[float] = None,
+    ) -> None:
+        """Writes the payload before the priority and idempotency steps, so
+        their headers are kept for the replay, and repeated payloads are
+        all written. The priority of the call is kept in the header.
+        """
+        priority = priority or self._priority
+        if priority != settings.PRIORITY:
+            payload = lanes.mark(payload, settings.PRIORITY_HEADER, priority)
+
+        client = client or self._client
+        if not instrumentation.is_enabled():
+            client.begin_send(payload)
+            return
+        with instrumentation.SendTrace(self, payload):
+            client.begin_send(payload)
+
+    def _create_client(self) -> '_CaptureClient':
+        if not self._capture_dir:
+            raise ValueError('The capture directory is not set.')
+        return _CaptureClient(writer.get_writer(
+            self._capture_dir,
+            max_bytes=self._capture_max_bytes,
+            max_age=self._capture_max_age,
+            compress=self._capture_gzip,
+        ))
+
+
+class _CaptureClient:
+    """Looks like an `EmailClient`, and writes the payloads."""
+
+    def __init__(self, jsonl_writer: writer.JsonlWriter) -> None:
+        self.writer = jsonl_writer
+
+    def begin_send(self, message: Dict[str, Any], **kwargs) -> None:
+        self.writer.write(message)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> '_CaptureClient':
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:  # noqa
+        self.close()
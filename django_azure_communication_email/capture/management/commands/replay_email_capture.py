@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from ... import replay
+
+
+class Command(BaseCommand):
+    help = (
+        'Sends the emails captured in JSONL files through Azure'
+        ' Communication Email.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            metavar='path',
+            help='JSONL capture files, gzipped or not.',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Maximum number of emails sent per second.',
+        )
+
+    def handle(self, *args, **options):
+        sent, failed = replay.replay(options['paths'], rate=options['rate'])
+        self.stdout.write(f'Sent {sent} emails, {failed} failed.')
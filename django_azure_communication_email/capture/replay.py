@@ -0,0 +1,73 @@
+import gzip
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..backend import ACEmailBackend
+from ..throttle import TokenBucket
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+# payloads read ahead of the sends, so large captures aren't loaded at once
+_CHUNK_SIZE = 1000
+
+
+def read_payloads(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yields the payloads of the JSONL capture files, gzipped or not."""
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def replay(
+    paths: Iterable[str],
+    *,
+    rate: Optional[float] = None,
+    backend: Optional[ACEmailBackend] = None,
+) -> Tuple[int, int]:
+    """Sends the captured payloads through the backend, at most `rate` per
+    second if set. Returns the number of sent and failed messages.
+    """
+    if backend is None:
+        backend = ACEmailBackend(
+            outbox=False,
+            background=False,
+            persistent_client=True,
+        )
+    bucket = TokenBucket(1, 1 / rate) if rate else None
+
+    backend.fail_silently = False
+    backend.open()
+
+    def send(payload: Dict[str, Any]) -> bool:
+        if bucket is not None and (delay := bucket.reserve()) > 0:
+            time.sleep(delay)
+        try:
+            backend._send_payload(payload)
+        except Exception as exc:  # noqa
+            logger.warning('Failed to send email.', exc_info=exc)
+            return False
+        return True
+
+    sent = failed = 0
+    payloads = read_payloads(paths)
+    try:
+        with ThreadPoolExecutor(
+            max_workers=backend._max_workers,
+            thread_name_prefix='django_azure_communication_email',
+        ) as executor:
+            while chunk := list(itertools.islice(payloads, _CHUNK_SIZE)):
+                for result in executor.map(send, chunk):
+                    sent += result
+                    failed += not result
+    finally:
+        backend.close()
+
+    return sent, failed
@@ -0,0 +1,160 @@
+"""Process-wide JSONL writers of the captured payloads, keyed by their
+configuration. Each process writes files of its own, and the buffers are
+flushed before forking and at interpreter exit.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional
+
+from ..utils import Registry
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+_BUFFER_SIZE = 1024 * 1024
+
+
+class JsonlWriter:
+    """Appends the payloads to JSONL files in the directory, and starts a new
+    file once the current one holds `max_bytes` of JSON or is `max_age`
+    seconds old.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        compress: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.path: Optional[str] = None
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def write(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, separators=(',', ':')).encode() + b'\n'
+        with self._lock:
+            if self._file is None or self._is_full():
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _is_full(self) -> bool:
+        return (
+            self.max_bytes is not None and self._size >= self.max_bytes
+        ) or (
+            self.max_age is not None
+            and time.monotonic() - self._opened_at >= self.max_age
+        )
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        name = (
+            f'emails-{time.strftime("%Y%m%dT%H%M%S")}'
+            f'-{os.getpid()}-{self._sequence}.jsonl'
+        )
+        if self.compress:
+            self.path = os.path.join(self.directory, f'{name}.gz')
+            self._file = gzip.open(self.path, 'ab')
+        else:
+            self.path = os.path.join(self.directory, name)
+            self._file = open(self.path, 'ab', buffering=_BUFFER_SIZE)
+        self._size = 0
+        self._opened_at = time.monotonic()
+
+
+# dropped in forked children by `_reset_after_fork`, once the files are
+# detached
+_writers: Registry[JsonlWriter] = Registry(keep_after_fork=True)
+
+
+def get_writer(
+    directory: str,
+    *,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[float] = None,
+    compress: bool = False,
+) -> JsonlWriter:
+    key = (directory, max_bytes, max_age, compress)
+    return _writers.get(key, lambda: JsonlWriter(
+        directory,
+        max_bytes=max_bytes,
+        max_age=max_age,
+        compress=compress,
+    ))
+
+
+def close_writers() -> None:
+    """Closes every registered writer and empties the registry."""
+    for writer in _writers.clear():
+        try:
+            writer.close()
+        except Exception as exc:  # noqa
+            logger.warning('Failed to close capture file.', exc_info=exc)
+
+
+def _before_fork() -> None:
+    # the buffers are flushed and the writes held until the fork is over,
+    # so the child never writes the parent's buffers again
+    _writers.lock.acquire()
+    for writer in _writers.objects.values():
+        writer._lock.acquire()
+        try:
+            if writer._file is not None:
+                writer._file.flush()
+        except Exception as exc:  # noqa
+            logger.warning('Failed to flush capture file.', exc_info=exc)
+
+
+def _after_fork_in_parent() -> None:
+    for writer in _writers.objects.values():
+        writer._lock.release()
+    _writers.lock.release()
+
+
+def _reset_after_fork() -> None:
+    # the registry renewed its lock already
+    for writer in _writers.objects.values():
+        if isinstance(writer._file, gzip.GzipFile):
+            # closing it would write a gzip trailer into the parent's file
+            writer._file.fileobj = None
+        writer._file = None
+        writer._lock = threading.Lock()
+    _writers.objects.clear()
+
+
+atexit.register(close_writers)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_reset_after_fork,
+    )
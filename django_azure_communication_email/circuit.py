@@ -0,0 +1,243 @@
+"""A circuit breaker that fails the sends fast while Azure Communication
+Services is down or throttling heavily, instead of running each of them
+through the whole retry policy.
+"""
+import contextlib
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import ContextManager, Deque, Iterator, Optional, Tuple
+
+from azure.core.exceptions import AzureError, HttpResponseError
+
+from .exceptions import CircuitOpen
+from .utils import Registry
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_CACHE_KEY = 'django_azure_communication_email:circuit:{}:{}'
+_MESSAGE = (
+    'Azure Communication Email is failing, the emails are held back for now.'
+)
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` failures in a row, or once
+    `failure_rate` of at least `min_requests` sends in the last `window`
+    seconds failed. While open, the sends raise `CircuitOpen`. After
+    `reset_timeout` seconds, a single probe send is let through, which
+    closes the circuit if it succeeds and opens it again otherwise.
+
+    The open state and the probe are shared with other processes through
+    the Django cache if `cache_alias` is set, the failures are counted by
+    each process.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str = '',
+        failure_threshold: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        window: float = 60,
+        min_requests: int = 20,
+        reset_timeout: float = 30,
+        cache_alias: Optional[str] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.cache_alias = cache_alias
+        self._key = hashlib.blake2b(name.encode(), digest_size=16).hexdigest()
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._results: Deque[Tuple[float, bool]] = deque()
+        self._failed_results = 0
+        self._opened_until = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        opened_until = self._get_opened_until()
+        if not opened_until:
+            return CLOSED
+        return OPEN if time.time() < opened_until else HALF_OPEN
+
+    def check(self) -> None:
+        """Raises `CircuitOpen` while the sends are held back and no probe
+        is due.
+        """
+        if self.state == OPEN:
+            raise CircuitOpen(_MESSAGE)
+
+    def before_send(self) -> bool:
+        """Raises `CircuitOpen` if the send must not go through, returns
+        True if the send is a probe.
+        """
+        opened_until = self._get_opened_until()
+        if not opened_until:
+            return False
+        if time.time() < opened_until or not self._start_probe():
+            raise CircuitOpen(_MESSAGE)
+        return True
+
+    def record(self, *, failed: bool, probe: bool = False) -> None:
+        if probe:
+            if failed:
+                self._open()
+            else:
+                self._close()
+            self._end_probe()
+            return
+
+        now = time.time()
+        with self._lock:
+            self._failures = self._failures + 1 if failed else 0
+            self._results.append((now, failed))
+            self._failed_results += failed
+            while self._results and self._results[0][0] < now - self.window:
+                self._failed_results -= self._results.popleft()[1]
+
+            trip = (
+                self.failure_threshold is not None
+                and self._failures >= self.failure_threshold
+            ) or (
+                self.failure_rate is not None
+                and len(self._results) >= self.min_requests
+                and self._failed_results / len(self._results)
+                >= self.failure_rate
+            )
+        if trip:
+            self._open()
+
+    @contextlib.contextmanager
+    def guard(self) -> Iterator[None]:
+        """Wraps a send, and records its outcome."""
+        probe = self.before_send()
+        # None while the outcome tells nothing about the service, like a
+        # cancelled send or a message Azure rejected
+        failed = None
+        try:
+            yield
+            failed = False
+        except Exception as exc:
+            if is_failure(exc):
+                failed = True
+            raise
+        finally:
+            if failed is not None:
+                self.record(failed=failed, probe=probe)
+            elif probe:
+                # the circuit stays half-open for the next probe
+                self._end_probe()
+
+    def _open(self) -> None:
+        opened_until = time.time() + self.reset_timeout
+        with self._lock:
+            self._opened_until = opened_until
+            self._failures = 0
+            self._results.clear()
+            self._failed_results = 0
+        if self.cache_alias:
+            # kept after the reset timeout, so it can be seen as half-open
+            self._get_cache().set(
+                _CACHE_KEY.format(self._key, 'opened_until'),
+                opened_until,
+                timeout=None,
+            )
+
+    def _close(self) -> None:
+        with self._lock:
+            self._opened_until = 0.0
+        if self.cache_alias:
+            self._get_cache().delete(
+                _CACHE_KEY.format(self._key, 'opened_until'),
+            )
+
+    def _get_opened_until(self) -> float:
+        if self.cache_alias:
+            return self._get_cache().get(
+                _CACHE_KEY.format(self._key, 'opened_until'),
+            ) or 0.0
+        return self._opened_until
+
+    def _start_probe(self) -> bool:
+        if self.cache_alias:
+            # the key expires in case the probing process dies
+            return self._get_cache().add(
+                _CACHE_KEY.format(self._key, 'probe'),
+                True,
+                timeout=int(self.reset_timeout) + 1,
+            )
+
+        with self._lock:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def _end_probe(self) -> None:
+        if self.cache_alias:
+            self._get_cache().delete(_CACHE_KEY.format(self._key, 'probe'))
+        with self._lock:
+            self._probing = False
+
+    def _get_cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+
+def is_failure(exc: BaseException) -> bool:
+    """Tells whether the error means that the service is degraded, rather
+    than that something is wrong with the message.
+    """
+    if isinstance(exc, HttpResponseError) and exc.status_code is not None:
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, AzureError)
+
+
+def guard(breaker: Optional[CircuitBreaker]) -> ContextManager:
+    """Wraps a send with the breaker, if there is one."""
+    if breaker is None:
+        return contextlib.nullcontext()
+    return breaker.guard()
+
+
+_breakers: Registry[CircuitBreaker] = Registry(keep_after_fork=True)
+
+
+def get_circuit_breaker(
+    *,
+    name: str = '',
+    failure_threshold: Optional[int] = None,
+    failure_rate: Optional[float] = None,
+    window: float = 60,
+    min_requests: int = 20,
+    reset_timeout: float = 30,
+    cache_alias: Optional[str] = None,
+) -> Optional[CircuitBreaker]:
+    """Returns the process-wide circuit breaker for the options, or None if
+    neither a failure threshold nor a failure rate is set.
+    """
+    if not failure_threshold and not failure_rate:
+        return None
+
+    key = (
+        name, failure_threshold, failure_rate, window, min_requests,
+        reset_timeout, cache_alias,
+    )
+    return _breakers.get(key, lambda: CircuitBreaker(
+        name=name,
+        failure_threshold=failure_threshold,
+        failure_rate=failure_rate,
+        window=window,
+        min_requests=min_requests,
+        reset_timeout=reset_timeout,
+        cache_alias=cache_alias,
+    ))
@@ -0,0 +1,38 @@
+"""Process-wide registry of long-lived `EmailClient` instances, keyed by
+their configuration. It is dropped in forked children, so HTTP sessions
+are never shared between processes.
+"""
+import atexit
+import logging
+from typing import Callable, Hashable
+
+from azure.communication.email import EmailClient
+
+from .utils import Registry
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+_clients: Registry[EmailClient] = Registry()
+
+
+def get_client(
+    key: Hashable,
+    factory: Callable[[], EmailClient],
+) -> EmailClient:
+    """Returns the client registered under the key, creating it with the
+    factory on first use.
+    """
+    return _clients.get(key, factory)
+
+
+def close_clients() -> None:
+    """Closes every registered client and empties the registry."""
+    for client in _clients.clear():
+        try:
+            client.close()
+        except Exception as exc:  # noqa
+            logger.warning('Failed to close Email client.', exc_info=exc)
+
+
+atexit.register(close_clients)
@@ -0,0 +1,132 @@
+"""Groups messages that differ only in their recipients into as few Azure
+requests as possible, and splits the recipient lists that are over the
+per-request limit.
+"""
+import copy
+from typing import Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from django.core.mail import EmailMessage
+
+from . import utils
+
+
+class Part(NamedTuple):
+    """A message to send and the indexes of the messages it stands for."""
+    message: EmailMessage
+    sources: Tuple[int, ...]
+
+
+def coalesce(
+    email_messages: Iterable[EmailMessage],
+    max_recipients: int,
+) -> List[Part]:
+    """Returns the parts to send instead of the messages.
+
+    The recipients of merged messages are put in BCC, so they don't see
+    each other. Messages with CC recipients are never merged.
+    """
+    messages = list(email_messages)
+
+    groups = {}
+    for index, message in enumerate(messages):
+        key = get_group_key(message)
+        groups.setdefault(index if key is None else key, []).append(index)
+
+    parts = []
+    for indexes in groups.values():
+        message = messages[indexes[0]]
+        if len(indexes) == 1:
+            recipients = [
+                (field, address, indexes[0])
+                for field in ('to', 'cc', 'bcc')
+                for address in getattr(message, field)
+            ]
+        else:
+            recipients = [
+                ('bcc', address, index)
+                for index in indexes
+                for address in (*messages[index].to, *messages[index].bcc)
+            ]
+
+        if len(recipients) <= max_recipients and len(indexes) == 1:
+            parts.append(Part(message, tuple(indexes)))
+            continue
+
+        for start in range(0, len(recipients), max_recipients):
+            chunk = recipients[start:start + max_recipients]
+            parts.append(Part(
+                _copy_with_recipients(message, chunk),
+                tuple(sorted({index for _, _, index in chunk})),
+            ))
+
+    return parts
+
+
+def get_sent(
+    parts: List[Part],
+    results: Iterable[Optional[bool]],
+) -> Set[int]:
+    """Returns the indexes of the messages whose parts were all sent."""
+    found, failed = set(), set()
+    for part, result in zip(parts, results):
+        found.update(part.sources)
+        if not result:
+            failed.update(part.sources)
+    return found - failed
+
+
+def get_results(
+    parts: List[Part],
+    results: List[Optional[bool]],
+    count: int,
+) -> List[Optional[bool]]:
+    """Returns the result of each of the `count` messages from the results
+    of their parts: True if they were all sent, False if one of them
+    failed, and None if one of them was skipped otherwise.
+    """
+    sent = get_sent(parts, results)
+    failed = {
+        index
+        for part, result in zip(parts, results) if result is False
+        for index in part.sources
+    }
+    return [
+        True if index in sent else False if index in failed else None
+        for index in range(count)
+    ]
+
+
+def get_group_key(message: EmailMessage) -> Optional[Hashable]:
+    """Returns what the message shares with the messages it can be merged
+    with, or None if it can't be merged.
+    """
+    if message.cc:
+        return None
+
+    key = (
+        type(message),
+        message.from_email,
+        message.subject,
+        message.body,
+        utils.get_html_message(message),
+        tuple(message.reply_to),
+        tuple(sorted(message.extra_headers.items())),
+        tuple(message.attachments),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _copy_with_recipients(
+    message: EmailMessage,
+    recipients: List[Tuple[str, str, int]],
+) -> EmailMessage:
+    part = copy.copy(message)
+    for field in ('to', 'cc', 'bcc'):
+        setattr(part, field, [
+            address for name, address, _ in recipients if name == field
+        ])
+    return part
@@ -0,0 +1,195 @@
+"""Process-wide registry that resolves every auth method to an endpoint
+and a shared credential. AAD access tokens are cached and refreshed ahead
+of their expiry.
+"""
+import functools
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from azure.core.credentials import AccessToken, AzureKeyCredential
+
+from django.core.exceptions import ImproperlyConfigured
+
+from . import settings
+from .utils import Registry
+
+
+class CachedTokenCredential:
+    """Wraps a `TokenCredential` and caches its access tokens until
+    `refresh_margin` seconds before they expire.
+    """
+
+    def __init__(self, credential: Any, refresh_margin: int) -> None:
+        self.credential = credential
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._tokens: Dict[Hashable, AccessToken] = {}
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        if kwargs.get('claims'):
+            # claims challenges always need a fresh token
+            return self.credential.get_token(*scopes, **kwargs)
+
+        key = (scopes, tuple(sorted(kwargs.items())))
+        if (token := self.get_cached_token(key)) is not None:
+            return token
+
+        with self._lock:
+            if (token := self.get_cached_token(key)) is not None:
+                return token
+
+            try:
+                token = self.credential.get_token(*scopes, **kwargs)
+            except Exception:  # noqa
+                # the old token is still usable until it actually expires
+                old_token = self._tokens.get(key)
+                if old_token is None or old_token.expires_on <= time.time():
+                    raise
+                return old_token
+
+            self._tokens[key] = token
+            return token
+
+    def get_cached_token(self, key: Hashable) -> Optional[AccessToken]:
+        """Returns the cached token unless it's due to be refreshed."""
+        token = self._tokens.get(key)
+        if token and token.expires_on - self.refresh_margin > time.time():
+            return token
+        return None
+
+    def close(self) -> None:
+        self.credential.close()
+
+
+class AsyncCachedTokenCredential:
+    """Exposes a `CachedTokenCredential` to the async clients. Cached tokens
+    are returned right away, new ones are fetched in a worker thread.
+    """
+
+    def __init__(self, credential: CachedTokenCredential) -> None:
+        self.credential = credential
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        if not kwargs.get('claims'):
+            key = (scopes, tuple(sorted(kwargs.items())))
+            if (token := self.credential.get_cached_token(key)) is not None:
+                return token
+
+        return await sync_to_async(
+            self.credential.get_token,
+            thread_sensitive=False,
+        )(*scopes, **kwargs)
+
+    async def close(self) -> None:
+        # the wrapped credential is shared and closed with the registry
+        pass
+
+
+_credentials: Registry[Tuple[str, Any]] = Registry()
+
+
+def get_credential(
+    *,
+    connection_string: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    client_secret: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    key_credential: Optional[str] = None,
+    is_async: bool = False,
+) -> Tuple[str, Any]:
+    """Returns the endpoint and the shared credential for the configuration.
+    """
+    key = (
+        connection_string,
+        tenant_id,
+        client_id,
+        client_secret,
+        endpoint,
+        key_credential,
+    )
+    endpoint, credential = _credentials.get(key, functools.partial(
+        _create_credential,
+        connection_string=connection_string,
+        tenant_id=tenant_id,
+        client_id=client_id,
+        client_secret=client_secret,
+        endpoint=endpoint,
+        key_credential=key_credential,
+    ))
+    if is_async and isinstance(credential, CachedTokenCredential):
+        credential = AsyncCachedTokenCredential(credential)
+    return endpoint, credential
+
+
+def clear_credentials() -> None:
+    """Closes every registered credential and empties the registry."""
+    for _, credential in _credentials.clear():
+        if isinstance(credential, CachedTokenCredential):
+            credential.close()
+
+
+def parse_connection_string(connection_string: str) -> Tuple[str, str]:
+    """Returns the endpoint and the access key from the connection string.
+    """
+    options = {}
+    for element in connection_string.split(';'):
+        key, _, value = element.partition('=')
+        options[key.strip().lower()] = value.strip()
+
+    endpoint = options.get('endpoint', '').rstrip('/')
+    access_key = options.get('accesskey')
+    if not endpoint or not access_key:
+        raise ValueError(
+            'Invalid connection string. The format should be as follows:'
+            ' endpoint=https://<ResourceUrl>/;accesskey=<KeyValue>'
+        )
+    return endpoint, access_key
+
+
+def _create_credential(
+    *,
+    connection_string: Optional[str],
+    tenant_id: Optional[str],
+    client_id: Optional[str],
+    client_secret: Optional[str],
+    endpoint: Optional[str],
+    key_credential: Optional[str],
+) -> Tuple[str, Any]:
+    if connection_string:
+        endpoint, access_key = parse_connection_string(connection_string)
+        return endpoint, AzureKeyCredential(access_key)
+    elif tenant_id and endpoint:
+        return endpoint, CachedTokenCredential(
+            _create_token_credential(tenant_id, client_id, client_secret),
+            refresh_margin=settings.TOKEN_REFRESH_MARGIN,
+        )
+    elif key_credential and endpoint:
+        return endpoint, AzureKeyCredential(key_credential)
+    else:
+        raise ImproperlyConfigured(
+            'You must specify either a connection string,'
+            ' or tenant ID & client ID & client secret & communication'
+            ' endpoint, or key credential & communication endpoint.'
+        )
+
+
+def _create_token_credential(
+    tenant_id: str,
+    client_id: Optional[str],
+    client_secret: Optional[str],
+) -> Any:
+    if client_id and client_secret:
+        from azure.identity import ClientSecretCredential
+        return ClientSecretCredential(tenant_id, client_id, client_secret)
+    elif client_id or client_secret:
+        raise ImproperlyConfigured(
+            'You must specify both the client ID and the client secret,'
+            ' or neither of them to use the environment variables.'
+        )
+
+    # the client is configured through the environment variables
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
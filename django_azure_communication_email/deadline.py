@@ -0,0 +1,107 @@
+"""Time budgets of the sends. The deadline is passed down to the pipeline
+with the other options of `begin_send`, so the attempts, the retries and
+the waits of a send stop once it's over.
+"""
+import time
+from typing import Any, Dict, Optional
+
+from azure.core.exceptions import (
+    ServiceRequestTimeoutError, ServiceResponseTimeoutError,
+)
+from azure.core.pipeline import PipelineRequest, PipelineResponse
+from azure.core.pipeline.policies import AsyncHTTPPolicy, HTTPPolicy
+
+from .exceptions import DeadlineExceeded
+
+
+# the responses whose Retry-After the retry policy sleeps for
+_RETRY_AFTER_STATUSES = (429, 503)
+
+
+def get_options(deadline: Optional[float]) -> Dict[str, Any]:
+    """Returns the `begin_send` options of the deadline, a
+    `time.monotonic()` timestamp.
+    """
+    if deadline is None:
+        return {}
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded('The email ran out of time before its send.')
+    return {
+        'deadline': deadline,
+        # the retry policy stops retrying after `timeout` seconds, and no
+        # single attempt may wait longer than that
+        'timeout': remaining,
+        'connection_timeout': remaining,
+        'read_timeout': remaining,
+    }
+
+
+def get_deadline(request: PipelineRequest) -> Optional[float]:
+    """Returns the deadline of the send, kept out of the transport options.
+    """
+    if 'deadline' in request.context.options:
+        request.context['deadline'] = request.context.options.pop('deadline')
+    return request.context.get('deadline')
+
+
+def is_over(deadline: Optional[float], exc: BaseException) -> bool:
+    """Tells whether the send failed because it ran out of time."""
+    return deadline is not None and (
+        isinstance(exc, (
+            DeadlineExceeded,
+            ServiceRequestTimeoutError,
+            ServiceResponseTimeoutError,
+        ))
+        # whatever failed once it was over, like a retry cut short
+        or time.monotonic() >= deadline
+    )
+
+
+def check(deadline: Optional[float], delay: float = 0) -> None:
+    """Raises `DeadlineExceeded` if the deadline is over after the delay."""
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise DeadlineExceeded('The email ran out of time.')
+
+
+class DeadlinePolicy(HTTPPolicy):
+    """Stops the attempts of a send once its deadline is over, instead of
+    waiting for a Retry-After that ends after it.
+    """
+
+    def send(self, request: PipelineRequest) -> PipelineResponse:
+        deadline = get_deadline(request)
+        check(deadline)
+
+        response = self.next.send(request)
+        _check_retry_after(deadline, response)
+        return response
+
+
+class AsyncDeadlinePolicy(AsyncHTTPPolicy):
+    """An async version of the `DeadlinePolicy`."""
+
+    async def send(self, request: PipelineRequest) -> PipelineResponse:
+        deadline = get_deadline(request)
+        check(deadline)
+
+        response = await self.next.send(request)
+        _check_retry_after(deadline, response)
+        return response
+
+
+def _check_retry_after(
+    deadline: Optional[float],
+    response: PipelineResponse,
+) -> None:
+    http_response = response.http_response
+    if deadline is None \
+            or http_response.status_code not in _RETRY_AFTER_STATUSES \
+            or not ({'retry-after', 'retry-after-ms'} & {
+                name.lower() for name in http_response.headers
+            }):
+        return
+
+    from .throttle import get_retry_after
+    check(deadline, get_retry_after(response))
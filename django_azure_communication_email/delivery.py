@@ -0,0 +1,287 @@
+"""Delivery tracking: the operations accepted by Azure are polled in batches
+by one scheduler thread per client, with intervals growing while they're
+running, and their final status is sent with the `delivery_status` signal.
+The trackers are stopped at interpreter exit and dropped in forked children.
+"""
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.dispatch import Signal
+
+from . import instrumentation, utils
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+SUCCEEDED = 'Succeeded'
+FAILED = 'Failed'
+CANCELED = 'Canceled'
+# reported when the operation is still running once the timeout is over
+TIMED_OUT = 'TimedOut'
+
+_FINAL_STATUSES = (SUCCEEDED, FAILED, CANCELED)
+# the operations polled at once by the workers
+_BATCH_SIZE = 100
+# further operations are dropped, so a stuck Azure can't exhaust the memory
+_MAX_TRACKED = 100000
+
+# args: operation_id, status, error, duration, and the recipients, subject
+# and reference of the message
+delivery_status = Signal()
+
+
+def get_location(pipeline_response: Any, body: Any, headers: Dict) -> str:
+    """The `cls` of `begin_send`, so the poller's result is the URL of the
+    operation.
+    """
+    return headers['Operation-Location']
+
+
+def describe(payload: Dict[str, Any], reference_header: str) -> Dict[str, Any]:
+    """Returns what the receivers need to match a status to its message:
+    the addresses of the recipients, the subject, and the value of the
+    reference header, or None.
+    """
+    return {
+        'recipients': [
+            recipient['address']
+            for field in ('to', 'cc', 'bcc')
+            for recipient in payload['recipients'].get(field, ())
+        ],
+        'subject': payload['content']['subject'],
+        'reference': utils.pop_header(payload, reference_header)[0],
+    }
+
+
+class _Operation:
+    __slots__ = (
+        'location', 'operation_id', 'accepted_at', 'interval', 'details',
+    )
+
+    def __init__(
+        self,
+        location: str,
+        interval: float,
+        details: Dict[str, Any],
+    ) -> None:
+        self.location = location
+        self.operation_id = urlsplit(location).path.rsplit('/', 1)[-1]
+        self.accepted_at = time.monotonic()
+        self.interval = interval
+        self.details = details
+
+
+class Tracker:
+    """Polls the status of the accepted operations from a single scheduler
+    thread, `workers` of them at once, and reports their final status.
+
+    An operation is first polled after `interval` seconds, and the interval
+    is doubled up to `max_interval` while it's running.
+    """
+
+    def __init__(
+        self,
+        get_client: Callable[[], Any],
+        *,
+        sender: Any = None,
+        workers: int,
+        interval: float,
+        max_interval: float,
+        timeout: float,
+    ) -> None:
+        self._get_client = get_client
+        self._sender = sender
+        self._workers = workers
+        self._interval = interval
+        self._max_interval = max_interval
+        self._timeout = timeout
+        self._heap: List[Tuple[float, int, _Operation]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def track(
+        self,
+        location: str,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Schedules the polls of the operation at the URL, returns False if
+        too many operations are tracked already. The `details` of the
+        message, from `describe`, are sent along with its status.
+        """
+        operation = _Operation(location, self._interval, details or {})
+        with self._condition:
+            if len(self._heap) >= _MAX_TRACKED:
+                logger.warning(
+                    'Dropped delivery tracking of %s, too many emails are'
+                    ' tracked.',
+                    operation.operation_id,
+                )
+                return False
+            self._schedule(operation, operation.interval)
+            self._start()
+            self._condition.notify()
+        return True
+
+    def stop(self) -> None:
+        """Stops polling, the pending operations are not reported."""
+        with self._condition:
+            self._stopped = True
+            self._heap.clear()
+            self._condition.notify()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule(self, operation: _Operation, delay: float) -> None:
+        heapq.heappush(
+            self._heap,
+            (time.monotonic() + delay, next(self._sequence), operation),
+        )
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._workers,
+            thread_name_prefix='django_azure_communication_email_delivery',
+        )
+        self._thread = threading.Thread(
+            target=self._run,
+            name='django_azure_communication_email_delivery',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped and (
+                    not self._heap
+                    or (wait := self._heap[0][0] - time.monotonic()) > 0
+                ):
+                    self._condition.wait(wait if self._heap else None)
+                if self._stopped:
+                    return
+
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now \
+                        and len(due) < _BATCH_SIZE:
+                    due.append(heapq.heappop(self._heap)[2])
+
+            try:
+                results = list(self._executor.map(self._poll, due))
+            except (CancelledError, RuntimeError):
+                # the executor was shut down by `stop`
+                return
+
+            # the receivers run without holding up the new operations
+            with self._condition:
+                finished = [
+                    (operation, status, error)
+                    for operation, (status, error, retry_after)
+                    in zip(due, results)
+                    if not self._reschedule(operation, status, retry_after)
+                ]
+            for operation, status, error in finished:
+                self._report(operation, status, error)
+
+    def _poll(
+        self,
+        operation: _Operation,
+    ) -> Tuple[Optional[str], Optional[Dict], Optional[float]]:
+        from azure.core.rest import HttpRequest
+
+        try:
+            response = self._get_client().send_request(
+                HttpRequest('GET', operation.location),
+            )
+            body = response.json() if response.content else {}
+        except Exception as exc:  # noqa
+            logger.warning(
+                'Failed to poll the delivery of %s.',
+                operation.operation_id,
+                exc_info=exc,
+            )
+            return None, None, None
+
+        if response.status_code == 404:
+            return FAILED, body.get('error'), None
+        if response.status_code != 200:
+            return None, None, _get_retry_after(response)
+        return body.get('status'), body.get('error'), \
+            _get_retry_after(response)
+
+    def _reschedule(
+        self,
+        operation: _Operation,
+        status: Optional[str],
+        retry_after: Optional[float],
+    ) -> bool:
+        """Schedules the next poll of a running operation, returns False if
+        it's finished or timed out.
+        """
+        if status in _FINAL_STATUSES \
+                or time.monotonic() - operation.accepted_at >= self._timeout:
+            return False
+
+        operation.interval = min(operation.interval * 2, self._max_interval)
+        self._schedule(operation, max(operation.interval, retry_after or 0))
+        return True
+
+    def _report(
+        self,
+        operation: _Operation,
+        status: Optional[str],
+        error: Optional[Dict],
+    ) -> None:
+        instrumentation.send_robust(
+            delivery_status,
+            sender=self._sender,
+            operation_id=operation.operation_id,
+            status=status if status in _FINAL_STATUSES else TIMED_OUT,
+            error=error,
+            duration=time.monotonic() - operation.accepted_at,
+            **operation.details,
+        )
+
+
+def _get_retry_after(response: Any) -> Optional[float]:
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+# the scheduler threads don't survive forks, and the operations are still
+# tracked by the parent process
+_trackers: utils.Registry[Tracker] = utils.Registry()
+
+
+def get_tracker(key: Hashable, factory: Callable[[], Tracker]) -> Tracker:
+    """Returns the tracker registered under the key, creating it with the
+    factory on first use.
+    """
+    return _trackers.get(key, factory)
+
+
+def stop_trackers() -> None:
+    """Stops every registered tracker and empties the registry."""
+    for tracker in _trackers.clear():
+        tracker.stop()
+
+
+atexit.register(stop_trackers)
@@ -0,0 +1,155 @@
+"""Fire-and-forget sending: converted messages are put on a bounded queue
+and sent by background threads. The queues are flushed at interpreter exit
+and dropped in forked children.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from . import settings
+from .exceptions import QueueFull
+from .utils import Registry
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+BLOCK = 'block'
+DROP = 'drop'
+RAISE = 'raise'
+
+_STOP = object()
+
+
+class Dispatcher:
+    """Sends payloads from a bounded queue in background worker threads."""
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Any],
+        *,
+        workers: int,
+        queue_size: int,
+        full_policy: str,
+    ) -> None:
+        if full_policy not in (BLOCK, DROP, RAISE):
+            raise ValueError(f'Unsupported queue full policy: {full_policy}')
+
+        self._send = send
+        self._workers = workers
+        self._full_policy = full_policy
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def put(self, payload: Dict[str, Any]) -> bool:
+        """Queues the payload, returns False if it was dropped."""
+        self._start()
+
+        if self._full_policy == BLOCK:
+            self._queue.put(payload)
+            return True
+
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            if self._full_policy == RAISE:
+                raise QueueFull('The email dispatcher queue is full.')
+            logger.warning('Dropped email, the dispatcher queue is full.')
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until the queued payloads are sent, returns False if the
+        timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    self._queue.all_tasks_done.wait()
+                elif (remaining := deadline - time.monotonic()) > 0:
+                    self._queue.all_tasks_done.wait(remaining)
+                else:
+                    return False
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """Flushes the queue and stops the worker threads."""
+        flushed = self.flush(timeout)
+
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(0 if not flushed else timeout)
+
+        if not flushed:
+            logger.warning(
+                'Failed to flush %d queued emails.',
+                self._queue.qsize(),
+            )
+        return flushed
+
+    def _start(self) -> None:
+        if len(self._threads) >= self._workers:
+            return
+
+        with self._lock:
+            while len(self._threads) < self._workers:
+                thread = threading.Thread(
+                    target=self._run,
+                    name='django_azure_communication_email_dispatcher',
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            payload = self._queue.get()
+            try:
+                if payload is _STOP:
+                    return
+                self._send(payload)
+            except Exception as exc:  # noqa
+                logger.warning('Failed to send email.', exc_info=exc)
+            finally:
+                self._queue.task_done()
+
+
+# the worker threads don't survive forks, and the queued messages are still
+# sent by the parent process
+_dispatchers: Registry[Dispatcher] = Registry()
+
+
+def get_dispatcher(
+    key: Hashable,
+    factory: Callable[[], Dispatcher],
+) -> Dispatcher:
+    """Returns the dispatcher registered under the key, creating it with
+    the factory on first use.
+    """
+    return _dispatchers.get(key, factory)
+
+
+def shutdown_dispatchers(timeout: Optional[float] = None) -> None:
+    """Flushes and stops every registered dispatcher."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for found in _dispatchers.clear():
+        remaining = None if deadline is None \
+            else max(deadline - time.monotonic(), 0)
+        found.shutdown(remaining)
+
+
+def _shutdown_at_exit() -> None:
+    shutdown_dispatchers(settings.BACKGROUND_FLUSH_TIMEOUT)
+
+
+atexit.register(_shutdown_at_exit)
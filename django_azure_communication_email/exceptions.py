@@ -0,0 +1,25 @@
+class ACEmailError(Exception):
+    """Base class for the errors raised by this package."""
+
+
+class QueueFull(ACEmailError):
+    """The background dispatcher queue is full."""
+
+
+class PayloadTooLarge(ACEmailError):
+    """The message is over the Azure Communication Email size limit."""
+
+
+class CircuitOpen(ACEmailError):
+    """The circuit breaker holds the emails back while Azure is failing."""
+
+
+class DeadlineExceeded(ACEmailError):
+    """The time budget of the send ran out. `sent` and `unsent` hold the
+    messages of the call that were sent and the ones that were not.
+    """
+
+    def __init__(self, *args, sent=(), unsent=()) -> None:
+        super().__init__(*args)
+        self.sent = list(sent)
+        self.unsent = list(unsent)
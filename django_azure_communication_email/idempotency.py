@@ -0,0 +1,82 @@
+"""Stable operation ids, so Azure drops the retries of messages it already
+accepted, and a short-lived process-wide record of the accepted ids, so they
+are skipped before touching the network.
+"""
+import collections
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from . import utils
+
+
+_NAMESPACE = uuid.UUID('6f1c5e0e-3c8a-4d6b-9a55-2f0b8c1d7e42')
+# the oldest ids are forgotten first if many are accepted within the TTL
+_MAX_ACCEPTED = 100000
+
+
+def prepare(
+    payload: Dict[str, Any],
+    header: str,
+    derive: bool = False,
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Returns the operation id of the payload and the payload to send.
+
+    The id comes from the header, which is left out of the email, or from
+    the whole payload if `derive` is set. Otherwise it's None.
+    """
+    key, payload = utils.pop_header(payload, header)
+    if key is not None:
+        # the recipients are part of the id, so the parts of a split message
+        # don't drop each other
+        return str(uuid.uuid5(
+            _NAMESPACE,
+            f'{key}\n{_dumps(payload["recipients"])}',
+        )), payload
+
+    if derive:
+        digest = hashlib.blake2b(_dumps(payload).encode(), digest_size=16)
+        return str(uuid.UUID(bytes=digest.digest(), version=4)), payload
+
+    return None, payload
+
+
+def is_accepted(operation_id: str) -> bool:
+    """Tells whether Azure accepted the operation within its TTL."""
+    expires = _accepted.objects.get(operation_id)
+    return expires is not None and expires > time.monotonic()
+
+
+def accept(operation_id: str, ttl: float) -> None:
+    """Records that Azure accepted the operation, for `ttl` seconds."""
+    if ttl <= 0:
+        return
+
+    now = time.monotonic()
+    with _accepted.lock:
+        accepted = _accepted.objects
+        accepted.pop(operation_id, None)
+        accepted[operation_id] = now + ttl
+        while accepted and (
+            len(accepted) > _MAX_ACCEPTED
+            or next(iter(accepted.values())) <= now
+        ):
+            accepted.popitem(last=False)
+
+
+def clear() -> None:
+    """Forgets every accepted operation."""
+    _accepted.clear()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+# the accepted ids are still valid in forked children
+_accepted: utils.Registry[float] = utils.Registry(
+    collections.OrderedDict(),
+    keep_after_fork=True,
+)
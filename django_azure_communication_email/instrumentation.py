@@ -0,0 +1,262 @@
+"""Signals and optional OpenTelemetry spans around opening the client,
+converting the messages and sending them. Nothing is measured unless a
+signal has receivers or `AZURE_COMMUNICATION_OPENTELEMETRY` is enabled.
+"""
+import functools
+import logging
+import time
+from collections.abc import Sized
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from django.dispatch import Signal
+
+from . import settings
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+# sent with `backend` and `duration`
+client_opened = Signal()
+# sent with `backend`, `message`, `payload`, `duration`, `attachment_size`,
+# `recipient_count` and `exception`, which is None if the conversion
+# succeeded
+message_converted = Signal()
+# sent with `backend`, `payload`, `duration`, `payload_size`, `retries`,
+# `throttled`, `operation_id` and `exception`, which is None if the send
+# succeeded
+message_sent = Signal()
+# sent with `backend`, `size`, `sent`, `duration` and `exception` once a
+# `send_messages` call is over
+batch_sent = Signal()
+
+
+def send_robust(signal: Signal, **kwargs) -> None:
+    """Sends the signal to all its receivers, and logs the errors they raise
+    instead of failing the email.
+    """
+    for receiver, result in signal.send_robust(**kwargs):
+        if isinstance(result, Exception):
+            logger.warning(
+                'Signal receiver %r failed.',
+                receiver,
+                exc_info=result,
+            )
+
+
+def is_enabled() -> bool:
+    return bool(
+        _get_trace() is not None
+        or client_opened.has_listeners()
+        or message_converted.has_listeners()
+        or message_sent.has_listeners()
+        or batch_sent.has_listeners()
+    )
+
+
+def _get_trace() -> Any:
+    """Returns `opentelemetry.trace` if OpenTelemetry is enabled and
+    installed, otherwise None.
+    """
+    return _import_trace() if settings.OPENTELEMETRY else None
+
+
+@functools.lru_cache(maxsize=None)
+def _import_trace() -> Any:
+    # imported on first use, so the processes without spans don't pay for it
+    try:
+        from opentelemetry import trace
+    except ImportError:  # pragma: no cover
+        return None
+    return trace
+
+
+class _Trace:
+    """Measures a block of code, and wraps it in a span if OpenTelemetry is
+    enabled.
+    """
+    name = ''
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+        self.duration = 0.0
+        self.span = None
+        self._span_context = None
+        self._started_at = 0.0
+
+    def __enter__(self):
+        if (trace := _get_trace()) is not None:
+            tracer = trace.get_tracer('django_azure_communication_email')
+            self._span_context = tracer.start_as_current_span(
+                f'azure_communication_email.{self.name}',
+                kind=trace.SpanKind.CLIENT,
+            )
+            self.span = self._span_context.__enter__()
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._started_at
+        try:
+            self.finish(exc)
+        finally:
+            if self._span_context is not None:
+                self.span.set_attributes({
+                    key: value
+                    for key, value in self.get_attributes().items()
+                    if value is not None
+                })
+                self._span_context.__exit__(exc_type, exc, tb)
+
+    def finish(self, exc: Optional[BaseException]) -> None:
+        raise NotImplementedError
+
+    def get_attributes(self) -> Dict[str, Any]:
+        return {'email.duration': self.duration}
+
+
+class OpenTrace(_Trace):
+    name = 'open'
+
+    def finish(self, exc: Optional[BaseException]) -> None:
+        if exc is None:
+            send_robust(
+                client_opened,
+                sender=type(self.backend),
+                backend=self.backend,
+                duration=self.duration,
+            )
+
+
+class ConvertTrace(_Trace):
+    name = 'convert_message'
+
+    def __init__(self, backend: Any, message: Any) -> None:
+        super().__init__(backend)
+        self.message = message
+        self.payload: Optional[Dict[str, Any]] = None
+
+    @property
+    def attachment_size(self) -> Optional[int]:
+        if self.payload is None:
+            return None
+        return sum(
+            len(file['contentInBase64'])
+            for file in self.payload.get('attachments', ())
+        )
+
+    @property
+    def recipient_count(self) -> Optional[int]:
+        if self.payload is None:
+            return None
+        return sum(map(len, self.payload['recipients'].values()))
+
+    def finish(self, exc: Optional[BaseException]) -> None:
+        send_robust(
+            message_converted,
+            sender=type(self.backend),
+            backend=self.backend,
+            message=self.message,
+            payload=self.payload,
+            duration=self.duration,
+            attachment_size=self.attachment_size,
+            recipient_count=self.recipient_count,
+            exception=exc,
+        )
+
+    def get_attributes(self) -> Dict[str, Any]:
+        return {
+            **super().get_attributes(),
+            'email.attachment_size': self.attachment_size,
+            'email.recipient_count': self.recipient_count,
+        }
+
+
+class SendTrace(_Trace):
+    """Collects the payload size, the retries and the operation id of a
+    `begin_send` call from the HTTP pipeline hooks.
+    """
+    name = 'begin_send'
+
+    def __init__(self, backend: Any, payload: Dict[str, Any]) -> None:
+        super().__init__(backend)
+        self.payload = payload
+        self.payload_size: Optional[int] = None
+        self.attempts = 0
+        self.throttled = 0
+        self.operation_id: Optional[str] = None
+        self.hooks = {
+            'raw_request_hook': self.on_request,
+            'raw_response_hook': self.on_response,
+        }
+
+    @property
+    def retries(self) -> int:
+        return max(self.attempts - 1, 0)
+
+    def on_request(self, request: Any) -> None:
+        http_request = request.http_request
+        if http_request.method == 'POST' and http_request.body is not None:
+            self.payload_size = len(http_request.body)
+
+    def on_response(self, response: Any) -> None:
+        if response.http_request.method != 'POST':
+            return
+
+        self.attempts += 1
+        if response.http_response.status_code == 429:
+            self.throttled += 1
+        headers = response.http_response.headers
+        if location := headers.get('Operation-Location'):
+            self.operation_id = urlsplit(location).path.rsplit('/', 1)[-1]
+
+    def finish(self, exc: Optional[BaseException]) -> None:
+        send_robust(
+            message_sent,
+            sender=type(self.backend),
+            backend=self.backend,
+            payload=self.payload,
+            duration=self.duration,
+            payload_size=self.payload_size,
+            retries=self.retries,
+            throttled=self.throttled,
+            operation_id=self.operation_id,
+            exception=exc,
+        )
+
+    def get_attributes(self) -> Dict[str, Any]:
+        return {
+            **super().get_attributes(),
+            'email.payload_size': self.payload_size,
+            'email.retries': self.retries,
+            'email.throttled': self.throttled,
+            'email.operation_id': self.operation_id,
+        }
+
+
+class BatchTrace(_Trace):
+    name = 'send_messages'
+
+    def __init__(self, backend: Any, email_messages: Iterable[Any]) -> None:
+        super().__init__(backend)
+        self.size = len(email_messages) \
+            if isinstance(email_messages, Sized) else None
+        self.sent = 0
+
+    def finish(self, exc: Optional[BaseException]) -> None:
+        send_robust(
+            batch_sent,
+            sender=type(self.backend),
+            backend=self.backend,
+            size=self.size,
+            sent=self.sent,
+            duration=self.duration,
+            exception=exc,
+        )
+
+    def get_attributes(self) -> Dict[str, Any]:
+        return {
+            **super().get_attributes(),
+            'email.batch_size': self.size,
+            'email.sent': self.sent,
+        }
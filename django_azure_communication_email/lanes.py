@@ -0,0 +1,140 @@
+"""Priority lanes: the sends of a higher priority get the first claim on the
+rate and connection budgets, so password resets are not held up behind a
+newsletter. The priority of the current send is kept in a context variable,
+where the throttle policies read it.
+"""
+import contextlib
+import contextvars
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from . import utils
+
+
+HIGH = 'high'
+NORMAL = 'normal'
+BULK = 'bulk'
+# from the highest to the lowest
+PRIORITIES = (HIGH, NORMAL, BULK)
+
+_current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    'django_azure_communication_email_priority',
+    default=None,
+)
+
+
+def check(priority: str) -> str:
+    """Returns the priority, raises ValueError if it's unknown."""
+    if priority not in PRIORITIES:
+        raise ValueError(
+            f'Unknown priority {priority!r}, use one of'
+            f' {", ".join(PRIORITIES)}.'
+        )
+    return priority
+
+
+def rank(priority: str) -> int:
+    """Returns 0 for the highest priority, and more for the lower ones."""
+    return PRIORITIES.index(priority)
+
+
+def prepare(
+    payload: Dict[str, Any],
+    header: str,
+    default: str,
+) -> Tuple[str, Dict[str, Any]]:
+    """Returns the priority of the payload, from the header or the default,
+    and the payload to send without the header.
+    """
+    priority, payload = utils.pop_header(payload, header)
+    return check(priority.lower() if priority else default), payload
+
+
+def mark(
+    payload: Dict[str, Any],
+    header: str,
+    priority: str,
+) -> Dict[str, Any]:
+    """Returns the payload with the priority in the header, unless it has
+    one already, so the priority is kept while it waits to be sent.
+    """
+    if utils.pop_header(payload, header)[0] is not None:
+        return payload
+    headers = {**payload.get('headers', {}), header: priority}
+    return {**payload, 'headers': headers}
+
+
+def get_current() -> Optional[str]:
+    """Returns the priority of the current send, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use(priority: str) -> Iterator[None]:
+    """Sets the priority of the sends in the block."""
+    token = _current.set(priority)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class Lanes:
+    """Shares `connections` concurrent sends between the priorities, each
+    within a budget of its own. A send waits while a send of a higher
+    priority is waiting too, so the lower priorities only use the slots the
+    higher ones leave.
+    """
+
+    def __init__(self, budgets: Dict[str, int], connections: int) -> None:
+        self.budgets = {
+            check(priority): budget for priority, budget in budgets.items()
+        }
+        self.connections = connections
+        self._running = dict.fromkeys(PRIORITIES, 0)
+        self._waiting = dict.fromkeys(PRIORITIES, 0)
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self, priority: str) -> Iterator[None]:
+        """Waits for a free slot of the priority and holds it in the block.
+        """
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                self._condition.wait_for(lambda: self._can_start(priority))
+            finally:
+                self._waiting[priority] -= 1
+                # the lower priorities may start along with this one
+                self._condition.notify_all()
+            self._running[priority] += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running[priority] -= 1
+                self._condition.notify_all()
+
+    def _can_start(self, priority: str) -> bool:
+        return self._has_budget(priority) \
+            and sum(self._running.values()) < self.connections \
+            and not any(
+                # waiting for a connection, not for its own budget
+                self._waiting[higher] and self._has_budget(higher)
+                for higher in PRIORITIES[:rank(priority)]
+            )
+
+    def _has_budget(self, priority: str) -> bool:
+        return self._running[priority] \
+            < self.budgets.get(priority, self.connections)
+
+
+# the sends of the parent don't hold slots in forked children
+_lanes: utils.Registry[Lanes] = utils.Registry()
+
+
+def get_lanes(budgets: Dict[str, int], connections: int) -> Lanes:
+    """Returns the process-wide lanes of the budgets."""
+    key = (tuple(sorted(budgets.items())), connections)
+    return _lanes.get(key, lambda: Lanes(budgets, connections))
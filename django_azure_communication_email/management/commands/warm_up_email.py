@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Opens the Azure Communication Email clients, and fails if they'
+        ' are not usable.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            help='Seconds to wait for the clients to answer.',
+        )
+
+    def handle(self, *args, **options):
+        if not warmup.warm_up(timeout=options['timeout']):
+            raise CommandError('Failed to warm up Azure Communication Email.')
+        self.stdout.write('Warmed up Azure Communication Email.')
@@ -0,0 +1,136 @@
+"""Prometheus metrics fed by the instrumentation signals.
+
+Requires the `prometheus_client` package to be installed. In multiprocess
+servers, set `PROMETHEUS_MULTIPROC_DIR` as described by `prometheus_client`
+so the values of all the workers are aggregated.
+"""
+from typing import Any, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+
+from . import instrumentation
+from .utils import Registry
+
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+
+_PREFIX = 'azure_communication_email'
+_SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 10485760,
+    float('inf'),
+)
+_BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000, float('inf'))
+
+
+class Metrics:
+    """Counters and histograms registered in a Prometheus registry."""
+
+    def __init__(self, registry: Any) -> None:
+        kwargs = {'registry': registry}
+        self.sent = prometheus_client.Counter(
+            f'{_PREFIX}_sent', 'Emails accepted by Azure.', **kwargs,
+        )
+        self.failed = prometheus_client.Counter(
+            f'{_PREFIX}_failed', 'Emails that failed to send.',
+            ['exception'], **kwargs,
+        )
+        self.throttled = prometheus_client.Counter(
+            f'{_PREFIX}_throttled', 'Send requests answered with 429.',
+            **kwargs,
+        )
+        self.send_duration = prometheus_client.Histogram(
+            f'{_PREFIX}_send_duration_seconds',
+            'Time spent sending an email, retries included.', **kwargs,
+        )
+        self.payload_size = prometheus_client.Histogram(
+            f'{_PREFIX}_payload_size_bytes', 'Size of the send requests.',
+            buckets=_SIZE_BUCKETS, **kwargs,
+        )
+        self.batch_size = prometheus_client.Histogram(
+            f'{_PREFIX}_batch_size', 'Emails per send_messages call.',
+            buckets=_BATCH_BUCKETS, **kwargs,
+        )
+        self.open_duration = prometheus_client.Histogram(
+            f'{_PREFIX}_open_duration_seconds',
+            'Time spent opening the client.', **kwargs,
+        )
+        self.convert_duration = prometheus_client.Histogram(
+            f'{_PREFIX}_convert_duration_seconds',
+            'Time spent converting an email.', **kwargs,
+        )
+
+    def connect(self) -> None:
+        instrumentation.client_opened.connect(self.on_client_opened)
+        instrumentation.message_converted.connect(self.on_message_converted)
+        instrumentation.message_sent.connect(self.on_message_sent)
+        instrumentation.batch_sent.connect(self.on_batch_sent)
+
+    def disconnect(self) -> None:
+        instrumentation.client_opened.disconnect(self.on_client_opened)
+        instrumentation.message_converted.disconnect(
+            self.on_message_converted,
+        )
+        instrumentation.message_sent.disconnect(self.on_message_sent)
+        instrumentation.batch_sent.disconnect(self.on_batch_sent)
+
+    def on_client_opened(self, duration: float, **kwargs) -> None:
+        self.open_duration.observe(duration)
+
+    def on_message_converted(
+        self,
+        duration: float,
+        exception: Optional[BaseException],
+        **kwargs,
+    ) -> None:
+        if exception is not None:
+            self.failed.labels(type(exception).__name__).inc()
+        self.convert_duration.observe(duration)
+
+    def on_message_sent(
+        self,
+        duration: float,
+        payload_size: Optional[int],
+        throttled: int,
+        exception: Optional[BaseException],
+        **kwargs,
+    ) -> None:
+        if exception is None:
+            self.sent.inc()
+        else:
+            self.failed.labels(type(exception).__name__).inc()
+        if throttled:
+            self.throttled.inc(throttled)
+        self.send_duration.observe(duration)
+        if payload_size is not None:
+            self.payload_size.observe(payload_size)
+
+    def on_batch_sent(self, size: Optional[int], **kwargs) -> None:
+        if size is not None:
+            self.batch_size.observe(size)
+
+
+_metrics: Registry[Metrics] = Registry(keep_after_fork=True)
+
+
+def install(registry: Any = None) -> Metrics:
+    """Registers the metrics in the registry, the default one if None, and
+    starts collecting them. Calling it again returns the same metrics.
+    """
+    if prometheus_client is None:
+        raise ImproperlyConfigured(
+            'The prometheus_client package is required for the metrics.'
+        )
+    if registry is None:
+        registry = prometheus_client.REGISTRY
+
+    return _metrics.get(registry, lambda: _create_metrics(registry))
+
+
+def _create_metrics(registry: Any) -> Metrics:
+    found = Metrics(registry)
+    found.connect()
+    return found
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    name = 'django_azure_communication_email.outbox'
+    label = 'azure_communication_email_outbox'
+    verbose_name = 'Azure Communication Email outbox'
+    default_auto_field = 'django.db.models.BigAutoField'
@@ -0,0 +1,130 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .. import settings
+from ..backend import ACEmailBackend
+from ..exceptions import CircuitOpen
+from .models import OutboxMessage
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+
+def drain(
+    *,
+    batch_size: Optional[int] = None,
+    backend: Optional[ACEmailBackend] = None,
+) -> Tuple[int, int]:
+    """Claims a batch of due outbox messages, the highest priorities first,
+    and sends them concurrently.
+
+    The rows are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` in a short
+    transaction, which leases them to the drainer for `OUTBOX_LEASE` seconds,
+    so several drainers never claim the same message, and no transaction is
+    held open during the sends. The messages of a drainer that died are sent
+    again once their lease runs out. Returns the number of sent and failed
+    messages.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    if backend is None:
+        backend = ACEmailBackend(
+            outbox=False,
+            background=False,
+            persistent_client=True,
+        )
+
+    messages = _claim(batch_size)
+    if not messages:
+        return 0, 0
+
+    errors = _send(backend, messages)
+
+    sent_ids, failed = [], []
+    for message, error in zip(messages, errors):
+        if error is None:
+            sent_ids.append(message.pk)
+        else:
+            _schedule_retry(message, error)
+            failed.append(message)
+
+    with transaction.atomic():
+        OutboxMessage.objects.filter(pk__in=sent_ids).delete()
+        OutboxMessage.objects.bulk_update(
+            failed,
+            ['attempts', 'next_attempt_at', 'last_error', 'failed'],
+        )
+
+    return len(sent_ids), len(failed)
+
+
+def _claim(batch_size: int) -> List[OutboxMessage]:
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(failed=False, next_attempt_at__lte=now)
+            .order_by('priority', 'next_attempt_at')[:batch_size]
+        )
+        OutboxMessage.objects.filter(
+            pk__in=[message.pk for message in messages],
+        ).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE),
+        )
+    return messages
+
+
+def _send(
+    backend: ACEmailBackend,
+    messages: List[OutboxMessage],
+) -> List[Optional[Exception]]:
+    backend.fail_silently = False
+    backend.open()
+
+    def send(message: OutboxMessage) -> Optional[Exception]:
+        try:
+            backend._send_payload(message.payload)
+        except Exception as exc:  # noqa
+            logger.warning('Failed to send email.', exc_info=exc)
+            return exc
+        return None
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=backend._max_workers,
+            thread_name_prefix='django_azure_communication_email',
+        ) as executor:
+            return list(executor.map(send, messages))
+    finally:
+        backend.close()
+
+
+def _schedule_retry(message: OutboxMessage, error: Exception) -> None:
+    message.last_error = repr(error)
+    if isinstance(error, CircuitOpen):
+        # never sent, so it doesn't use up an attempt
+        message.next_attempt_at = timezone.now() + timedelta(
+            seconds=settings.OUTBOX_RETRY_DELAY,
+        )
+        return
+
+    message.attempts += 1
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.failed = True
+        logger.error(
+            'Gave up sending email %s after %d attempts.',
+            message.pk,
+            message.attempts,
+        )
+        return
+
+    delay = min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1),
+        settings.OUTBOX_RETRY_DELAY_MAX,
+    )
+    message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
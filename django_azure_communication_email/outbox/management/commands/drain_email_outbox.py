@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ... import drain
+
+
+class Command(BaseCommand):
+    help = 'Sends the emails stored in the Azure Communication Email outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of messages claimed at once.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep draining the outbox instead of exiting once empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the outbox is empty (with --loop).',
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = drain.drain(batch_size=options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+
+            if not sent and not failed:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(
+            f'Sent {total_sent} emails, {total_failed} failed.'
+        )
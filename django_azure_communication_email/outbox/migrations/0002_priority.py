@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('azure_communication_email_outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='outboxmessage',
+            options={'ordering': ['priority', 'next_attempt_at']},
+        ),
+        migrations.RemoveIndex(
+            model_name='outboxmessage',
+            name='outbox_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=1, help_text='The rank of the priority, 0 is the highest.'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['failed', 'priority', 'next_attempt_at'], name='outbox_pending_idx'),
+        ),
+    ]
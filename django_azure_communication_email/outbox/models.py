@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """A converted message waiting to be sent by the outbox drainer."""
+
+    payload = models.JSONField()
+    priority = models.PositiveSmallIntegerField(
+        default=1,
+        help_text='The rank of the priority, 0 is the highest.',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    failed = models.BooleanField(
+        default=False,
+        help_text='Set once the message ran out of attempts.',
+    )
+
+    class Meta:
+        ordering = ['priority', 'next_attempt_at']
+        indexes = [
+            models.Index(
+                fields=['failed', 'priority', 'next_attempt_at'],
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.payload.get('content', {}).get('subject', '')
@@ -0,0 +1,300 @@
+"""Routes each message to the Azure Communication Services resource of its
+tenant, picked from a header, a resolver or the sender domain, and keeps
+the clients of the recently used tenants in an LRU registry. The idle
+clients are closed once no send holds them, and the registry is dropped in
+forked children.
+"""
+import atexit
+import collections
+import contextlib
+import logging
+import time
+from typing import (
+    Any, Callable, ContextManager, Dict, Hashable, Iterable, Iterator,
+    Optional, Tuple, Union,
+)
+from urllib.parse import urlsplit
+
+from . import circuit, utils
+from .balancer import Resource
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+Resolver = Callable[[Dict[str, Any]], Union[str, Dict[str, Any], None]]
+# returns the breaker of a tenant, or of the default resource for None
+BreakerGetter = Callable[
+    [Optional[Resource]], Optional[circuit.CircuitBreaker],
+]
+
+
+class Router:
+    """Picks the resource of a payload: the tenant named by the header
+    comes first, then the tenant returned by the resolver, then the tenant
+    of the sender domain. None means the default resource.
+
+    A tenant is given as the options of a `Resource`, with the `domains`
+    it sends from. The resolver gets the payload, and returns the name of
+    a tenant, the options of a resource, or None.
+    """
+
+    def __init__(
+        self,
+        tenants: Dict[str, Dict[str, Any]],
+        *,
+        header: Optional[str] = None,
+        resolver: Optional[Resolver] = None,
+    ) -> None:
+        self.resources: Dict[str, Resource] = {}
+        self.domains: Dict[str, str] = {}
+        for name, options in tenants.items():
+            options = dict(options)
+            for domain in options.pop('domains', ()):
+                self.domains[domain.lower()] = name
+            self.resources[name] = Resource(**options)
+        self.header = header
+        self.resolver = resolver
+
+    def route(
+        self,
+        payload: Dict[str, Any],
+    ) -> Tuple[Optional[Resource], Dict[str, Any]]:
+        """Returns the resource of the payload and the payload to send,
+        without the tenant header.
+        """
+        name = None
+        if self.header is not None:
+            name, payload = utils.pop_header(payload, self.header)
+        if name is None and self.resolver is not None:
+            if isinstance(found := self.resolver(payload), dict):
+                return Resource(**found), payload
+            name = found
+        if name is None:
+            domain = payload['senderAddress'].rpartition('@')[2].lower()
+            name = self.domains.get(domain)
+        if name is None:
+            return None, payload
+
+        try:
+            return self.resources[name], payload
+        except KeyError:
+            raise ValueError(f'Unknown tenant {name!r}.') from None
+
+
+class TenantClient:
+    """Looks like an `EmailClient`, and sends through the client of the
+    resource of each message, which `hold_client` holds during the send.
+    The clients are pooled, so closing this one doesn't close them.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        hold_client: Callable[[Resource], ContextManager[Any]],
+        get_default_client: Callable[[], Any],
+        get_breaker: Optional[BreakerGetter] = None,
+    ) -> None:
+        self.router = router
+        self.hold_client = hold_client
+        self.get_default_client = get_default_client
+        self.get_breaker = get_breaker or _no_breaker
+
+    def begin_send(self, message: Dict[str, Any], **kwargs) -> Any:
+        resource, message = self.router.route(message)
+        held = contextlib.nullcontext(self.get_default_client()) \
+            if resource is None else self.hold_client(resource)
+        with held as client, circuit.guard(self.get_breaker(resource)):
+            return client.begin_send(message, **kwargs)
+
+    def send_request(self, request: Any, **kwargs) -> Any:
+        """Sends the request through the client of the tenant it's
+        addressed to, or through the default client.
+        """
+        with find_client(urlsplit(request.url).netloc) as client:
+            return (client or self.get_default_client()).send_request(
+                request,
+                **kwargs,
+            )
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'TenantClient':
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:  # noqa
+        self.close()
+
+
+class AsyncTenantClient:
+    """An async version of the `TenantClient`. Async clients are bound to
+    their event loop, so it owns and closes the clients of the resources.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        create_client: Callable[[Resource], Any],
+        create_default_client: Callable[[], Any],
+        get_breaker: Optional[BreakerGetter] = None,
+    ) -> None:
+        self.router = router
+        self.create_client = create_client
+        self.create_default_client = create_default_client
+        self.get_breaker = get_breaker or _no_breaker
+        self._clients: Dict[Hashable, Any] = {}
+
+    async def begin_send(self, message: Dict[str, Any], **kwargs) -> Any:
+        resource, message = self.router.route(message)
+        client = self._get_client(resource)
+        with circuit.guard(self.get_breaker(resource)):
+            return await client.begin_send(message, **kwargs)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+    def _get_client(self, resource: Optional[Resource]) -> Any:
+        key = None if resource is None else resource.key
+        if (client := self._clients.get(key)) is None:
+            client = self._clients[key] = self.create_default_client() \
+                if resource is None else self.create_client(resource)
+        return client
+
+
+def _no_breaker(resource: Optional[Resource]) -> None:
+    return None
+
+
+class _Entry:
+    __slots__ = ('resource', 'client', 'used_at', 'users', 'evicted')
+
+    def __init__(self, resource: Resource, client: Any) -> None:
+        self.resource = resource
+        self.client = client
+        self.used_at = time.monotonic()
+        # the sends holding the client, which is closed once evicted and
+        # released by all of them
+        self.users = 0
+        self.evicted = False
+
+
+_clients: utils.Registry[_Entry] = utils.Registry(collections.OrderedDict())
+
+
+@contextlib.contextmanager
+def hold_client(
+    key: Hashable,
+    resource: Resource,
+    factory: Callable[[], Any],
+    *,
+    max_size: int,
+    idle_timeout: Optional[float] = None,
+) -> Iterator[Any]:
+    """Holds the client registered under the key in the block, creating it
+    with the factory on first use. The least recently used clients over
+    `max_size`, and the clients unused for `idle_timeout` seconds, are
+    evicted, and closed once no block holds them.
+    """
+    now = time.monotonic()
+    with _clients.lock:
+        entries = _clients.objects
+        if (entry := entries.get(key)) is None:
+            entry = entries[key] = _Entry(resource, factory())
+        else:
+            entries.move_to_end(key)
+            entry.used_at = now
+        entry.users += 1
+
+        # the held client is the most recently used, so it's kept
+        unused = []
+        while len(entries) > 1 and (
+            len(entries) > max_size
+            or idle_timeout is not None
+            and now - next(iter(entries.values())).used_at >= idle_timeout
+        ):
+            evicted = entries.popitem(last=False)[1]
+            evicted.evicted = True
+            if not evicted.users:
+                unused.append(evicted)
+
+    _close(unused)
+    try:
+        yield entry.client
+    finally:
+        _release(entry)
+
+
+@contextlib.contextmanager
+def find_client(host: str) -> Iterator[Optional[Any]]:
+    """Holds the registered client of a resource at the host in the block,
+    or gives None.
+    """
+    with _clients.lock:
+        for entry in _clients.objects.values():
+            if urlsplit(entry.resource.endpoint).netloc == host:
+                entry.users += 1
+                break
+        else:
+            entry = None
+
+    if entry is None:
+        yield None
+        return
+    try:
+        yield entry.client
+    finally:
+        _release(entry)
+
+
+def _release(entry: _Entry) -> None:
+    with _clients.lock:
+        entry.users -= 1
+        unused = entry.evicted and not entry.users
+    if unused:
+        _close([entry])
+
+
+def close_clients() -> None:
+    """Closes every registered client and empties the registry."""
+    _close(_clients.clear())
+
+
+def _close(entries: Iterable[_Entry]) -> None:
+    for entry in entries:
+        try:
+            entry.client.close()
+        except Exception as exc:  # noqa
+            logger.warning('Failed to close Email client.', exc_info=exc)
+
+
+_routers: utils.Registry[Router] = utils.Registry(keep_after_fork=True)
+
+
+def get_router(
+    tenants: Dict[str, Dict[str, Any]],
+    *,
+    header: Optional[str] = None,
+    resolver: Optional[Resolver] = None,
+) -> Router:
+    """Returns the process-wide router of the tenants."""
+    key = (_freeze(tenants), header, resolver)
+    return _routers.get(key, lambda: Router(
+        tenants,
+        header=header,
+        resolver=resolver,
+    ))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (name, _freeze(item)) for name, item in value.items()
+        ))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+atexit.register(close_clients)
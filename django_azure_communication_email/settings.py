@@ -1,19 +1,165 @@
+"""The settings of the package, read from the Django settings on first
+access and read again once they change, so `override_settings` is seen.
+"""
 from django.conf import settings
+from django.core.signals import setting_changed
 
 
-CONNECTION_STRING = getattr(
-    settings, 'AZURE_COMMUNICATION_CONNECTION_STRING', None,
-)
-TENANT_ID = getattr(settings, 'AZURE_TENANT_ID', None)
-CLIENT_ID = getattr(settings, 'AZURE_CLIENT_ID', None)
-CLIENT_SECRET = getattr(settings, 'AZURE_CLIENT_SECRET', None)
-ENDPOINT = getattr(settings, 'AZURE_COMMUNICATION_ENDPOINT', None)
-KEY_CREDENTIAL = getattr(settings, 'AZURE_KEY_CREDENTIAL', None)
+# name: (Django setting, default)
+_SETTINGS = {
+    'CONNECTION_STRING': ('AZURE_COMMUNICATION_CONNECTION_STRING', None),
+    'TENANT_ID': ('AZURE_TENANT_ID', None),
+    'CLIENT_ID': ('AZURE_CLIENT_ID', None),
+    'CLIENT_SECRET': ('AZURE_CLIENT_SECRET', None),
+    'ENDPOINT': ('AZURE_COMMUNICATION_ENDPOINT', None),
+    'KEY_CREDENTIAL': ('AZURE_KEY_CREDENTIAL', None),
 
-TRACKING_DISABLED = getattr(
-    settings, 'AZURE_COMMUNICATION_TRACKING_DISABLED', False,
-)
+    'RESOURCES': ('AZURE_COMMUNICATION_RESOURCES', None),
+    'FAILOVER_COOLDOWN': ('AZURE_COMMUNICATION_FAILOVER_COOLDOWN', 30),
 
-RETRY_POLICY = getattr(
-    settings, 'AZURE_COMMUNICATION_RETRY_POLICY', None,
-)
+    'TENANTS': ('AZURE_COMMUNICATION_TENANTS', None),
+    'TENANT_HEADER': ('AZURE_COMMUNICATION_TENANT_HEADER', 'X-Email-Tenant'),
+    'TENANT_RESOLVER': ('AZURE_COMMUNICATION_TENANT_RESOLVER', None),
+    'TENANT_CACHE_SIZE': ('AZURE_COMMUNICATION_TENANT_CACHE_SIZE', 100),
+    'TENANT_IDLE_TIMEOUT': ('AZURE_COMMUNICATION_TENANT_IDLE_TIMEOUT', 600),
+
+    'TRACKING_DISABLED': ('AZURE_COMMUNICATION_TRACKING_DISABLED', False),
+
+    'RETRY_POLICY': ('AZURE_COMMUNICATION_RETRY_POLICY', None),
+
+    'TIMEOUT': ('AZURE_COMMUNICATION_TIMEOUT', None),
+
+    'MAX_WORKERS': ('AZURE_COMMUNICATION_MAX_WORKERS', 1),
+    'MAX_CONCURRENCY': ('AZURE_COMMUNICATION_MAX_CONCURRENCY', 100),
+
+    'PRIORITY': ('AZURE_COMMUNICATION_PRIORITY', 'normal'),
+    'PRIORITY_HEADER': (
+        'AZURE_COMMUNICATION_PRIORITY_HEADER', 'X-Email-Priority',
+    ),
+    'PRIORITY_LANES': ('AZURE_COMMUNICATION_PRIORITY_LANES', None),
+    'PRIORITY_CONNECTIONS': ('AZURE_COMMUNICATION_PRIORITY_CONNECTIONS', 10),
+
+    'STREAM_MAX_PENDING': ('AZURE_COMMUNICATION_STREAM_MAX_PENDING', 1000),
+    'STREAM_CHUNK_SIZE': ('AZURE_COMMUNICATION_STREAM_CHUNK_SIZE', 1000),
+
+    'PERSISTENT_CLIENT': ('AZURE_COMMUNICATION_PERSISTENT_CLIENT', False),
+
+    'WARM_UP': ('AZURE_COMMUNICATION_WARM_UP', False),
+    'WARM_UP_TIMEOUT': ('AZURE_COMMUNICATION_WARM_UP_TIMEOUT', 10),
+
+    'TOKEN_REFRESH_MARGIN': ('AZURE_COMMUNICATION_TOKEN_REFRESH_MARGIN', 300),
+
+    'BACKGROUND': ('AZURE_COMMUNICATION_BACKGROUND', False),
+    'BACKGROUND_WORKERS': ('AZURE_COMMUNICATION_BACKGROUND_WORKERS', 2),
+    'BACKGROUND_QUEUE_SIZE': (
+        'AZURE_COMMUNICATION_BACKGROUND_QUEUE_SIZE', 1000,
+    ),
+    'BACKGROUND_QUEUE_FULL_POLICY': (
+        'AZURE_COMMUNICATION_BACKGROUND_QUEUE_FULL_POLICY', 'block',
+    ),
+    'BACKGROUND_FLUSH_TIMEOUT': (
+        'AZURE_COMMUNICATION_BACKGROUND_FLUSH_TIMEOUT', 30,
+    ),
+
+    'OUTBOX': ('AZURE_COMMUNICATION_OUTBOX', False),
+    'OUTBOX_BATCH_SIZE': ('AZURE_COMMUNICATION_OUTBOX_BATCH_SIZE', 100),
+    'OUTBOX_MAX_ATTEMPTS': ('AZURE_COMMUNICATION_OUTBOX_MAX_ATTEMPTS', 10),
+    'OUTBOX_RETRY_DELAY': ('AZURE_COMMUNICATION_OUTBOX_RETRY_DELAY', 60),
+    'OUTBOX_RETRY_DELAY_MAX': (
+        'AZURE_COMMUNICATION_OUTBOX_RETRY_DELAY_MAX', 3600,
+    ),
+    'OUTBOX_LEASE': ('AZURE_COMMUNICATION_OUTBOX_LEASE', 300),
+
+    'RATE_LIMIT_PER_MINUTE': (
+        'AZURE_COMMUNICATION_RATE_LIMIT_PER_MINUTE', None,
+    ),
+    'RATE_LIMIT_PER_HOUR': ('AZURE_COMMUNICATION_RATE_LIMIT_PER_HOUR', None),
+    'RATE_LIMIT_CACHE': ('AZURE_COMMUNICATION_RATE_LIMIT_CACHE', None),
+
+    'ATTACHMENT_CACHE_SIZE': ('AZURE_COMMUNICATION_ATTACHMENT_CACHE_SIZE', 0),
+
+    'MAX_PAYLOAD_SIZE': (
+        'AZURE_COMMUNICATION_MAX_PAYLOAD_SIZE', 10 * 1024 * 1024,
+    ),
+
+    'COALESCE': ('AZURE_COMMUNICATION_COALESCE', False),
+    'MAX_RECIPIENTS': ('AZURE_COMMUNICATION_MAX_RECIPIENTS', 50),
+
+    'IDEMPOTENT': ('AZURE_COMMUNICATION_IDEMPOTENT', False),
+    'IDEMPOTENCY_TTL': ('AZURE_COMMUNICATION_IDEMPOTENCY_TTL', 300),
+    'IDEMPOTENCY_HEADER': (
+        'AZURE_COMMUNICATION_IDEMPOTENCY_HEADER', 'Idempotency-Key',
+    ),
+
+    'DELIVERY_TRACKING': ('AZURE_COMMUNICATION_DELIVERY_TRACKING', False),
+    'DELIVERY_POLL_INTERVAL': (
+        'AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL', 1,
+    ),
+    'DELIVERY_POLL_INTERVAL_MAX': (
+        'AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL_MAX', 60,
+    ),
+    'DELIVERY_POLL_WORKERS': ('AZURE_COMMUNICATION_DELIVERY_POLL_WORKERS', 4),
+    'DELIVERY_TIMEOUT': ('AZURE_COMMUNICATION_DELIVERY_TIMEOUT', 3600),
+    'DELIVERY_REFERENCE_HEADER': (
+        'AZURE_COMMUNICATION_DELIVERY_REFERENCE_HEADER', 'X-Email-Reference',
+    ),
+
+    'OPENTELEMETRY': ('AZURE_COMMUNICATION_OPENTELEMETRY', False),
+    'METRICS': ('AZURE_COMMUNICATION_METRICS', False),
+
+    'CIRCUIT_BREAKER_THRESHOLD': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_THRESHOLD', None,
+    ),
+    'CIRCUIT_BREAKER_FAILURE_RATE': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_FAILURE_RATE', None,
+    ),
+    'CIRCUIT_BREAKER_WINDOW': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_WINDOW', 60,
+    ),
+    'CIRCUIT_BREAKER_MIN_REQUESTS': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_MIN_REQUESTS', 20,
+    ),
+    'CIRCUIT_BREAKER_RESET_TIMEOUT': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_RESET_TIMEOUT', 30,
+    ),
+    'CIRCUIT_BREAKER_CACHE': (
+        'AZURE_COMMUNICATION_CIRCUIT_BREAKER_CACHE', None,
+    ),
+
+    'CAPTURE_DIR': ('AZURE_COMMUNICATION_CAPTURE_DIR', None),
+    'CAPTURE_MAX_BYTES': (
+        'AZURE_COMMUNICATION_CAPTURE_MAX_BYTES', 100 * 1024 * 1024,
+    ),
+    'CAPTURE_MAX_AGE': ('AZURE_COMMUNICATION_CAPTURE_MAX_AGE', None),
+    'CAPTURE_GZIP': ('AZURE_COMMUNICATION_CAPTURE_GZIP', False),
+}
+
+_cache = {}
+
+
+def __getattr__(name):
+    try:
+        return _cache[name]
+    except KeyError:
+        pass
+
+    try:
+        setting, default = _SETTINGS[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}'
+        ) from None
+    _cache[name] = value = getattr(settings, setting, default)
+    return value
+
+
+def __dir__():
+    return [*globals(), *_SETTINGS]
+
+
+def _clear_cache(*, setting, **kwargs):
+    if setting.startswith('AZURE_'):
+        _cache.clear()
+
+
+setting_changed.connect(_clear_cache)
@@ -0,0 +1,145 @@
+"""Sends the messages of iterables of any length with bounded memory. The
+messages are converted in the calling thread ahead of the sends, which run
+in worker threads, with at most `max_pending` converted messages waiting
+in between.
+"""
+import itertools
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+def peek(iterable: Iterable[T]) -> Optional[Iterator[T]]:
+    """Returns an iterator over the items, or None if there are none."""
+    iterator = iter(iterable)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return None
+    return itertools.chain((first,), iterator)
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Progress:
+    """Counts the sent and failed messages, and reports the counts to the
+    callback every `chunk_size` messages.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        callback: Optional[Callable[[int, int], Any]] = None,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self.callback = callback
+        self.sent = 0
+        self.failed = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed
+
+    def add(self, sent: int, failed: int = 0) -> None:
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+
+    def report(self, force: bool = False) -> None:
+        """Calls the callback if a chunk of messages is done since the last
+        report, or if `force` is set.
+        """
+        done = self.done
+        if self.callback is None or done == self._reported:
+            return
+        if not force and \
+                done // self.chunk_size == self._reported // self.chunk_size:
+            return
+        self._reported = done
+        self.callback(self.sent, self.failed)
+
+
+def send_all(
+    items: Iterable[T],
+    convert: Callable[[T], Any],
+    send: Callable[[Any], Any],
+    on_error: Callable[[Exception], None],
+    *,
+    workers: int,
+    max_pending: int,
+    progress: Progress,
+) -> None:
+    """Converts the items in this thread, and sends them from `workers`
+    threads.
+
+    `on_error` is called with the errors of the conversions and the sends,
+    and the stream stops if it raises. The error is raised again once the
+    workers are done. The progress is reported from this thread.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def work() -> None:
+        while (payload := pending.get()) is not _DONE:
+            if stop.is_set():
+                # the converted messages are dropped once the stream stopped
+                continue
+            try:
+                send(payload)
+            except Exception as exc:  # noqa
+                try:
+                    on_error(exc)
+                except BaseException as error:  # noqa
+                    errors.append(error)
+                    stop.set()
+                progress.add(0, 1)
+            else:
+                progress.add(1)
+
+    threads = [
+        threading.Thread(
+            target=work,
+            name='django_azure_communication_email_stream',
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for item in items:
+            if stop.is_set():
+                break
+            try:
+                payload = convert(item)
+            except Exception as exc:  # noqa
+                on_error(exc)
+                progress.add(0, 1)
+            else:
+                pending.put(payload)
+            progress.report()
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for _ in threads:
+            pending.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    progress.report(force=True)
@@ -0,0 +1,331 @@
+"""Client-side rate limiting of the send requests, so the processes stay
+right at the Azure Communication Services quota instead of running into
+429s.
+"""
+import asyncio
+import contextlib
+import email.utils
+import hashlib
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from azure.core.pipeline import PipelineRequest, PipelineResponse
+from azure.core.pipeline.policies import AsyncHTTPPolicy, HTTPPolicy
+
+from . import deadline, lanes
+from .utils import Registry
+
+
+_CACHE_KEY = 'django_azure_communication_email:paused_until'
+_WINDOW_CACHE_KEY = 'django_azure_communication_email:requests'
+_DEFAULT_RETRY_AFTER = 60
+
+
+class TokenBucket:
+    """Allows `limit` requests per `period` seconds. Callers reserve a
+    token and wait for the returned delay, so requests are paced evenly
+    once the bucket runs dry.
+    """
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.capacity = limit
+        self.rate = limit / period
+        self._tokens = float(limit)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token, returns the seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0)
+
+    def get_delay(self) -> float:
+        """Returns the seconds until a token is left, without taking it."""
+        with self._lock:
+            self._refill()
+            return max((1 - self._tokens) / self.rate, 0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.rate,
+        )
+        self._updated_at = now
+
+
+class SharedWindow:
+    """Allows `limit` requests per fixed window of `period` seconds to all
+    the processes sharing the Django cache, which counts the requests.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        cache_alias: str,
+        key: str,
+    ) -> None:
+        self.limit = limit
+        self.period = period
+        self.cache_alias = cache_alias
+        self.key = key
+
+    def reserve(self) -> float:
+        """Counts a request, returns 0 if it's within the limit, or the
+        seconds until the next window otherwise.
+        """
+        from django.core.cache import caches
+
+        cache = caches[self.cache_alias]
+        now = time.time()
+        window = int(now // self.period)
+        key = f'{self.key}:{window}'
+        timeout = int(self.period) + 1
+        cache.add(key, 0, timeout=timeout)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # expired in between
+            cache.add(key, 1, timeout=timeout)
+            count = 1
+        if count <= self.limit:
+            return 0
+        return (window + 1) * self.period - now
+
+
+class RateLimiter:
+    """Paces the send requests of the whole process and pauses them when
+    Azure asks to retry after some time. If `cache_alias` is set, the
+    requests of all the processes are also counted against the limits in
+    fixed windows, and the pause is shared, through the Django cache under
+    the `name` of the resource.
+
+    The sends with a priority only take the tokens left, and not while a
+    send of a higher priority of the process waits for one.
+    """
+
+    def __init__(
+        self,
+        *,
+        per_minute: Optional[int] = None,
+        per_hour: Optional[int] = None,
+        cache_alias: Optional[str] = None,
+        name: str = '',
+    ) -> None:
+        self.buckets: List[TokenBucket] = []
+        if per_minute:
+            self.buckets.append(TokenBucket(per_minute, 60))
+        if per_hour:
+            self.buckets.append(TokenBucket(per_hour, 3600))
+        self.cache_alias = cache_alias
+        suffix = ''
+        if name:
+            digest = hashlib.blake2b(name.encode(), digest_size=16)
+            suffix = f':{digest.hexdigest()}'
+        self._cache_key = _CACHE_KEY + suffix
+        self.windows: List[SharedWindow] = []
+        if cache_alias:
+            self.windows = [
+                SharedWindow(
+                    limit,
+                    period,
+                    cache_alias,
+                    f'{_WINDOW_CACHE_KEY}{suffix}:{period}',
+                )
+                for limit, period in ((per_minute, 60), (per_hour, 3600))
+                if limit
+            ]
+        self._paused_until = 0.0
+        self._waiting = dict.fromkeys(lanes.PRIORITIES, 0)
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Returns the seconds to wait before the next request."""
+        delay = max([bucket.reserve() for bucket in self.buckets] or [0])
+        return max(delay, self.get_pause())
+
+    def take(self, lane: str) -> float:
+        """Takes a token for a send of the priority if one is left and no
+        send of a higher priority waits for one. Returns 0 if it did, or
+        the seconds to wait before trying again.
+        """
+        if (pause := self.get_pause()) > 0:
+            return pause
+
+        with self._lock:
+            delay = max(
+                [bucket.get_delay() for bucket in self.buckets] or [0],
+            )
+            if delay == 0 and not any(
+                self._waiting[higher]
+                for higher in lanes.PRIORITIES[:lanes.rank(lane)]
+            ):
+                for bucket in self.buckets:
+                    bucket.reserve()
+                return 0
+        # the token is left to the higher priority for now
+        return delay or min(1 / bucket.rate for bucket in self.buckets)
+
+    def reserve_shared(self) -> float:
+        """Counts the request against the limits of all the processes,
+        returns 0 if it's within them, or the seconds to wait before trying
+        again.
+        """
+        for window in self.windows:
+            if (delay := window.reserve()) > 0:
+                return delay
+        return 0
+
+    def wait(self, until: Optional[float] = None) -> None:
+        """Waits for the next request, raises `DeadlineExceeded` if that's
+        after the `until` deadline.
+        """
+        if (lane := lanes.get_current()) is not None:
+            with self._queue(lane):
+                while (delay := self.take(lane)) > 0:
+                    deadline.check(until, delay)
+                    time.sleep(delay)
+        elif (delay := self.reserve()) > 0:
+            deadline.check(until, delay)
+            time.sleep(delay)
+
+        while (delay := self.reserve_shared()) > 0:
+            deadline.check(until, delay)
+            time.sleep(delay)
+
+    async def await_(self, until: Optional[float] = None) -> None:
+        if (lane := lanes.get_current()) is not None:
+            with self._queue(lane):
+                while (delay := self.take(lane)) > 0:
+                    deadline.check(until, delay)
+                    await asyncio.sleep(delay)
+        elif (delay := self.reserve()) > 0:
+            deadline.check(until, delay)
+            await asyncio.sleep(delay)
+
+        while (delay := self.reserve_shared()) > 0:
+            deadline.check(until, delay)
+            await asyncio.sleep(delay)
+
+    @contextlib.contextmanager
+    def _queue(self, lane: str) -> Iterator[None]:
+        with self._lock:
+            self._waiting[lane] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Holds back the requests of the process for some seconds."""
+        self._paused_until = max(self._paused_until, time.time() + seconds)
+        if self.cache_alias:
+            self._get_cache().set(
+                self._cache_key,
+                self._paused_until,
+                timeout=int(seconds) + 1,
+            )
+
+    def get_pause(self) -> float:
+        paused_until = self._paused_until
+        if self.cache_alias:
+            paused_until = max(
+                paused_until,
+                self._get_cache().get(self._cache_key) or 0,
+            )
+        return max(paused_until - time.time(), 0)
+
+    def _get_cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+
+class ThrottlePolicy(HTTPPolicy):
+    """Runs every send attempt, SDK retries included, through the rate
+    limiter, and pauses it on 429 responses.
+    """
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        super().__init__()
+        self.limiter = limiter
+
+    def send(self, request: PipelineRequest) -> PipelineResponse:
+        is_send = request.http_request.method == 'POST'
+        if is_send:
+            self.limiter.wait(deadline.get_deadline(request))
+
+        response = self.next.send(request)
+        if is_send and response.http_response.status_code == 429:
+            self.limiter.pause(get_retry_after(response))
+        return response
+
+
+class AsyncThrottlePolicy(AsyncHTTPPolicy):
+    """An async version of the `ThrottlePolicy`."""
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        super().__init__()
+        self.limiter = limiter
+
+    async def send(self, request: PipelineRequest) -> PipelineResponse:
+        is_send = request.http_request.method == 'POST'
+        if is_send:
+            await self.limiter.await_(deadline.get_deadline(request))
+
+        response = await self.next.send(request)
+        if is_send and response.http_response.status_code == 429:
+            self.limiter.pause(get_retry_after(response))
+        return response
+
+
+def get_retry_after(response: PipelineResponse) -> float:
+    """Returns the delay in seconds that the response asks to wait for."""
+    headers = response.http_response.headers
+    if retry_after_ms := headers.get('retry-after-ms'):
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return _DEFAULT_RETRY_AFTER
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return _DEFAULT_RETRY_AFTER
+    return max(date.timestamp() - time.time(), 0)
+
+
+_limiters: Registry[RateLimiter] = Registry(keep_after_fork=True)
+
+
+def get_rate_limiter(
+    *,
+    per_minute: Optional[int] = None,
+    per_hour: Optional[int] = None,
+    cache_alias: Optional[str] = None,
+    name: str = '',
+) -> Optional[RateLimiter]:
+    """Returns the process-wide limiter for the limits, or None if there
+    are no limits.
+    """
+    if not per_minute and not per_hour:
+        return None
+
+    key = (per_minute, per_hour, cache_alias, name)
+    return _limiters.get(key, lambda: RateLimiter(
+        per_minute=per_minute,
+        per_hour=per_hour,
+        cache_alias=cache_alias,
+        name=name,
+    ))
@@ -1,20 +1,80 @@
+import email.utils
+import functools
+import os
 import re
-from typing import Tuple
+import threading
+from email.header import decode_header, make_header
+from typing import (
+    Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple,
+    TypeVar,
+)
 
 from django.core.mail import EmailMessage, EmailMultiAlternatives
 
 
-_RE_SENDER_NAME = re.compile(r'^([^<>]+)\s<([^<>]+)>$')
+T = TypeVar('T')
+
+_ADDRESS_CACHE_SIZE = 10000
+# addresses that need no RFC 5322 parsing, like "Name <user@company.com>"
+_RE_SIMPLE_ADDRESS = re.compile(
+    r'\s*(?:([^<>"(),;:\\@=]*)<)?'
+    r'([^\s<>"(),;:\\@]+@[^\x00-\x20\x7f-\U0010ffff<>"(),;:\\@]+)'
+    r'(?(1)>|)\s*'
+)
 
 
 def get_name_and_email(address) -> Tuple[str, str]:
     """Returns the name and email from addresses like
-    "Contact <contact@company.com>".
+    "Contact <contact@company.com>" or '"Doe, John" <john@company.com>'.
+    The domain is IDNA-encoded.
+    """
+    return _parse_address(str(address))
+
+
+def get_recipients(addresses: Iterable[str]) -> List[Dict[str, str]]:
+    """Converts the addresses to the Azure Communication Email format."""
+    return [
+        {'displayName': name, 'address': address}
+        for name, address in map(get_name_and_email, addresses)
+    ]
+
+
+def get_message_recipients(
+    message: EmailMessage,
+) -> Dict[str, List[Dict[str, str]]]:
+    """Returns the non-empty to, cc and bcc recipients of the message in the
+    Azure Communication Email format.
     """
-    if custom_sender_name := _RE_SENDER_NAME.search(address):
-        return custom_sender_name.groups()  # type: ignore
-    else:
+    return {
+        field: get_recipients(addresses)
+        for field in ('to', 'cc', 'bcc')
+        if (addresses := getattr(message, field))
+    }
+
+
+@functools.lru_cache(maxsize=_ADDRESS_CACHE_SIZE)
+def _parse_address(address: str) -> Tuple[str, str]:
+    if simple := _RE_SIMPLE_ADDRESS.fullmatch(address):
+        return (simple.group(1) or '').strip(), simple.group(2)
+
+    parsed = email.utils.getaddresses([address])
+    if len(parsed) != 1 or '@' not in parsed[0][1]:
+        # left to Azure to reject
         return '', address
+    name, email_address = parsed[0]
+
+    if '=?' in name:
+        name = str(make_header(decode_header(name)))
+
+    local_part, _, domain = email_address.rpartition('@')
+    if not domain.isascii():
+        try:
+            domain = domain.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+        else:
+            email_address = f'{local_part}@{domain}'
+    return name, email_address
 
 
 def get_html_message(message: EmailMessage) -> str:
@@ -26,3 +86,74 @@ def get_html_message(message: EmailMessage) -> str:
             if msg_type == 'text/html':
                 return alt_msg
     return ''
+
+
+def pop_header(
+    payload: Dict[str, Any],
+    name: str,
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Returns the value of the header, matched case-insensitively, and the
+    payload without it.
+    """
+    headers = payload.get('headers') or {}
+    found = next(
+        (header for header in headers if header.lower() == name.lower()),
+        None,
+    )
+    if found is None:
+        return None, payload
+
+    payload = {
+        **payload,
+        'headers': {k: v for k, v in headers.items() if k != found},
+    }
+    if not payload['headers']:
+        del payload['headers']
+    return headers[found], payload
+
+
+class Registry(Generic[T]):
+    """Process-wide objects shared by key, created on first use. The lock is
+    renewed in forked children, which drop the objects unless
+    `keep_after_fork` is set.
+    """
+
+    def __init__(
+        self,
+        objects: Optional[Dict[Hashable, T]] = None,
+        *,
+        keep_after_fork: bool = False,
+    ) -> None:
+        self.lock = threading.Lock()
+        self.objects: Dict[Hashable, T] = {} if objects is None else objects
+        self.keep_after_fork = keep_after_fork
+        after_fork(self._reset_after_fork)
+
+    def get(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Returns the object registered under the key, creating it with
+        the factory on first use.
+        """
+        if (found := self.objects.get(key)) is None:
+            with self.lock:
+                if (found := self.objects.get(key)) is None:
+                    found = self.objects[key] = factory()
+        return found
+
+    def clear(self) -> List[T]:
+        """Empties the registry, and returns the objects it held."""
+        with self.lock:
+            found = list(self.objects.values())
+            self.objects.clear()
+        return found
+
+    def _reset_after_fork(self) -> None:
+        self.lock = threading.Lock()
+        if not self.keep_after_fork:
+            self.objects.clear()
+
+
+def after_fork(func: Callable[[], Any]) -> Callable[[], Any]:
+    """Registers the function to be called in forked children."""
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=func)
+    return func
@@ -0,0 +1,94 @@
+"""Warm-up of the pooled clients before the first email: each client sends
+a request through its pipeline, which fetches the access token, resolves
+the endpoint and opens a keep-alive connection. Whether it succeeded is
+kept for the readiness checks, and dropped in forked children, which don't
+inherit the connections.
+"""
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from django.dispatch import Signal
+
+from . import instrumentation, settings, utils
+
+
+logger = logging.getLogger('django_azure_communication_email')
+
+# an operation that doesn't exist, a 404 means the resource is reachable
+_PATH = '/emails/operations/warm-up'
+# the responses that tell the clients are not usable
+_FAILED_STATUSES = (401, 403)
+
+# sent with `ready`, `duration` and `exception`, which is None if the
+# warm-up succeeded
+warmed_up = Signal()
+
+_ready = False
+
+
+def is_ready() -> bool:
+    """Tells whether the last warm-up of the process succeeded."""
+    return _ready
+
+
+def warm_up(backend: Any = None, timeout: Optional[float] = None) -> bool:
+    """Opens the pooled clients of every configured resource, and returns
+    whether all of them answered within the timeout.
+    """
+    from azure.core.exceptions import HttpResponseError
+    from azure.core.rest import HttpRequest
+
+    from . import deadline
+    from .backend import ACEmailBackend
+
+    global _ready
+
+    started_at = time.monotonic()
+    until = started_at + (timeout or settings.WARM_UP_TIMEOUT)
+    error = None
+    try:
+        if backend is None:
+            backend = ACEmailBackend()
+        for client in backend._get_pooled_clients():
+            response = client.send_request(
+                HttpRequest('GET', _PATH),
+                **deadline.get_options(until),
+            )
+            if response.status_code in _FAILED_STATUSES \
+                    or response.status_code >= 500:
+                raise HttpResponseError(response=response)
+    except Exception as exc:  # noqa
+        logger.warning(
+            'Failed to warm up Azure Communication Email.',
+            exc_info=exc,
+        )
+        error = exc
+
+    _ready = error is None
+    instrumentation.send_robust(
+        warmed_up,
+        sender=type(backend) if backend is not None else ACEmailBackend,
+        ready=_ready,
+        duration=time.monotonic() - started_at,
+        exception=error,
+    )
+    return _ready
+
+
+def start() -> threading.Thread:
+    """Warms up in a background thread, so the startup isn't held up."""
+    thread = threading.Thread(
+        target=warm_up,
+        name='django_azure_communication_email_warm_up',
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+@utils.after_fork
+def _reset_after_fork() -> None:
+    global _ready
+    _ready = False
@@ -4,7 +4,11 @@ from django.core.management import call_command
 
 
 settings.configure(
-    INSTALLED_APPS=[],
+    INSTALLED_APPS=[
+        'django_azure_communication_email',
+        'django_azure_communication_email.outbox',
+        'django_azure_communication_email.capture',
+    ],
     DATABASES={
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
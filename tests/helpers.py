@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from azure.core.pipeline import PipelineContext
+from azure.core.pipeline.policies import RetryPolicy
+
+from django.core.mail import EmailMessage
+
+from benchmarks.fake_acs import FakeACSServer
+from django_azure_communication_email import EmailBackend, clients, lanes
+
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# the async clients send through aiohttp
+requires_aiohttp = skipUnless(aiohttp, 'requires aiohttp')
+
+
+class EmailClientStub:
+    """Behaves like `azure.communication.email.EmailClient`, and records
+    the priority of each send. The sends wait for the `block` event, if
+    any, and those with the subject 'fail' raise.
+    """
+
+    def __init__(self, block=None):
+        self.messages = []
+        self.priorities = []
+        self.block = block
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):  # noqa
+        self.close()
+
+    def close(self):
+        self.closed = True
+
+    def begin_send(self, message, **kwargs):
+        if self.block is not None:
+            self.block.wait()
+        if message['content']['subject'] == 'fail':
+            raise RuntimeError('Failed to send')
+        self.messages.append(message)
+        self.priorities.append(lanes.get_current())
+
+
+class NextPolicyStub:
+    """The next policy of a pipeline, which responds with the status."""
+
+    def __init__(self, status_code=202, headers=None):
+        self.response = SimpleNamespace(http_response=SimpleNamespace(
+            status_code=status_code,
+            headers=headers or {},
+        ))
+        self.requests = []
+
+    def send(self, request):
+        self.requests.append(request)
+        return self.response
+
+
+def make_request(method='POST', **options):
+    return SimpleNamespace(
+        http_request=SimpleNamespace(method=method),
+        context=PipelineContext(None, **options),
+    )
+
+
+def make_messages(count, **kwargs):
+    return [
+        EmailMessage(
+            subject=f'Subject {i}',
+            body='Body',
+            from_email='sender@company.com',
+            to=['to@company.com'],
+            **kwargs,
+        )
+        for i in range(count)
+    ]
+
+
+class FakeACSMixin:
+    """Runs a `FakeACSServer` for each test, and closes the pooled clients
+    after it.
+    """
+
+    retry_policy = RetryPolicy.no_retries()
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = self.start_server()
+        self.addCleanup(clients.close_clients)
+
+    def start_server(self) -> FakeACSServer:
+        server = FakeACSServer().start()
+        self.addCleanup(server.stop)
+        return server
+
+    def make_backend(self, backend_class=EmailBackend, **kwargs):
+        kwargs.setdefault('connection_string', self.server.connection_string)
+        kwargs.setdefault('retry_policy', self.retry_policy)
+        return backend_class(**kwargs)
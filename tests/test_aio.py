@@ -0,0 +1,172 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from azure.core.pipeline.policies import AsyncRetryPolicy, RetryPolicy
+
+from django.core.mail import EmailMessage
+from django.test import TestCase
+
+from django_azure_communication_email import AsyncEmailBackend
+from django_azure_communication_email.outbox.models import OutboxMessage
+
+
+class AsyncEmailClientStub:
+    """Behaves like `azure.communication.email.aio.EmailClient`."""
+
+    def __init__(self):
+        self.messages = []
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    async def begin_send(self, message, **kwargs):
+        await asyncio.sleep(0)
+        if self.closed:
+            raise RuntimeError('The client is closed')
+        if message['content']['subject'] == 'fail':
+            raise RuntimeError('Failed to send')
+        self.messages.append(message)
+
+
+def _make_messages(*subjects):
+    return [
+        EmailMessage(
+            subject=subject,
+            body='plain text',
+            from_email='Support <support@company.com>',
+            to=['Foo <foo@company.com>'],
+        )
+        for subject in subjects
+    ]
+
+
+class TestAsyncEmailBackend(TestCase):
+    """aio.AsyncACEmailBackend()"""
+
+    def setUp(self) -> None:
+        self.backend = AsyncEmailBackend(max_concurrency=2)
+        self.client = AsyncEmailClientStub()
+        self.backend._create_async_client = lambda: self.client
+
+    async def test_fail_silent(self):
+        backend = AsyncEmailBackend(fail_silently=True)
+        await backend.aopen()
+        self.assertIsNone(backend._async_client)
+
+    async def test_fail_not_silent(self):
+        backend = AsyncEmailBackend(fail_silently=False)
+        with self.assertRaises(Exception):
+            await backend.aopen()
+
+    async def test_asend_messages(self):
+        messages = _make_messages(*[f'Subject {i}' for i in range(10)])
+
+        self.assertEqual(await self.backend.asend_messages(messages), 10)
+        self.assertEqual(len(self.client.messages), 10)
+        self.assertDictEqual(
+            self.client.messages[0],
+            {
+                'senderAddress': 'support@company.com',
+                'recipients': {
+                    'to': [
+                        {'displayName': 'Foo', 'address': 'foo@company.com'},
+                    ],
+                },
+                'content': {
+                    'subject': 'Subject 0',
+                    'plainText': 'plain text',
+                },
+            },
+        )
+        self.assertTrue(self.client.closed)
+        self.assertIsNone(self.backend._async_client)
+
+    async def test_asend_messages_fail_silently(self):
+        backend = AsyncEmailBackend(fail_silently=True)
+        client = backend._async_client = AsyncEmailClientStub()
+        messages = _make_messages('ok', 'fail', 'ok')
+
+        self.assertEqual(await backend.asend_messages(messages), 2)
+        self.assertEqual(len(client.messages), 2)
+
+    async def test_asend_messages_fail_not_silently(self):
+        with self.assertRaises(RuntimeError):
+            await self.backend.asend_messages(_make_messages('ok', 'fail'))
+        self.assertTrue(self.client.closed)
+
+    async def test_opened_client_is_kept(self):
+        await self.backend.aopen()
+
+        await self.backend.asend_messages(_make_messages('ok'))
+        self.assertFalse(self.client.closed)
+
+        await self.backend.aclose()
+        self.assertTrue(self.client.closed)
+
+    async def test_concurrent_calls(self):
+        created = []
+
+        def create_client():
+            created.append(AsyncEmailClientStub())
+            return created[-1]
+
+        self.backend._create_async_client = create_client
+
+        results = await asyncio.gather(
+            self.backend.asend_messages(_make_messages('a', 'b'), timeout=60),
+            self.backend.asend_messages(_make_messages('c', 'd', 'e')),
+        )
+
+        self.assertEqual(results, [2, 3])
+        self.assertEqual([len(client.messages) for client in created], [2, 3])
+        self.assertTrue(all(client.closed for client in created))
+
+    async def test_coalesce(self):
+        backend = AsyncEmailBackend(coalesce=True)
+        backend._async_client = self.client
+
+        self.assertEqual(
+            await backend.asend_messages(_make_messages('a', 'a', 'a')),
+            3,
+        )
+        self.assertEqual(len(self.client.messages), 1)
+
+    async def test_outbox(self):
+        backend = AsyncEmailBackend(outbox=True)
+
+        self.assertEqual(
+            await backend.asend_messages(_make_messages('a', 'b')),
+            2,
+        )
+        # Manager.acount() needs Django 4.1
+        count = await sync_to_async(OutboxMessage.objects.count)()
+        self.assertEqual(count, 2)
+
+    async def test_background(self):
+        backend = AsyncEmailBackend(background=True)
+        queued = []
+        backend._enqueue_messages = \
+            lambda messages, priority: queued.extend(messages) or 2
+
+        self.assertEqual(
+            await backend.asend_messages(_make_messages('a', 'b')),
+            2,
+        )
+        self.assertEqual(len(queued), 2)
+
+    def test_send_messages(self):
+        self.assertEqual(self.backend.send_messages(_make_messages('ok')), 1)
+        self.assertEqual(len(self.client.messages), 1)
+
+    def test_async_retry_policy(self):
+        backend = AsyncEmailBackend(retry_policy=RetryPolicy(
+            retry_total=3,
+            retry_backoff_factor=0.1,
+            retry_on_status_codes=[418],
+        ))
+        retry_policy = backend._get_async_retry_policy()
+        self.assertIsInstance(retry_policy, AsyncRetryPolicy)
+        self.assertEqual(retry_policy.total_retries, 3)
+        self.assertEqual(retry_policy.backoff_factor, 0.1)
+        self.assertIn(418, retry_policy._retry_on_status_codes)
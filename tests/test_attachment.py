@@ -1,5 +1,9 @@
 import base64
+import io
+import os
+import tempfile
 from email.mime.nonmultipart import MIMENonMultipart
+from pathlib import Path
 
 from django.test import TestCase
 
@@ -50,6 +54,63 @@ class TestTupleBaseConverter(TestCase):
             base64.b64encode(att_file[1]).decode(),
         )
 
+    def test_memoryview_content(self):
+        content = b'file content'
+        converter = attachment.TupleBaseConverter(
+            ('file.txt', memoryview(content), 'application/octet-stream'),
+        )
+        self.assertEqual(
+            converter.get_content(),
+            base64.b64encode(content).decode(),
+        )
+
+    def test_file_path_content(self):
+        content = os.urandom(attachment._CHUNK_SIZE + 10)
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        converter = attachment.TupleBaseConverter(
+            ('file.bin', Path(file.name), 'application/octet-stream'),
+        )
+
+        self.assertEqual(
+            converter.get_encoded_size(),
+            len(base64.b64encode(content)),
+        )
+        self.assertEqual(
+            converter.get_content(),
+            base64.b64encode(content).decode(),
+        )
+
+    def test_file_like_content(self):
+        content = os.urandom(attachment._CHUNK_SIZE * 2 + 1)
+        file = io.BytesIO(content)
+        converter = attachment.TupleBaseConverter(
+            ('file.bin', file, 'application/octet-stream'),
+        )
+
+        self.assertEqual(
+            converter.get_encoded_size(),
+            len(base64.b64encode(content)),
+        )
+        self.assertEqual(file.tell(), 0)
+        self.assertEqual(
+            converter.get_content(),
+            base64.b64encode(content).decode(),
+        )
+        # the file can be read again for another request
+        self.assertEqual(file.tell(), 0)
+
+    def test_encoded_size(self):
+        for content in ['', 'a', 'ab', 'abc', 'ąčę', b'abcd']:
+            converter = attachment.TupleBaseConverter(
+                ('file.txt', content, 'text/plain'),
+            )
+            self.assertEqual(
+                converter.get_encoded_size(),
+                len(converter.get_content()),
+            )
+
 
 class TestMimeBaseConverter(TestCase):
     """attachment.MIMEBaseConverter()"""
@@ -86,3 +147,71 @@ class TestMimeBaseConverter(TestCase):
         self.assertEqual(converter.get_filename(), 'untitled')
         self.assertEqual(converter.get_filetype(), filetype)
         self.assertEqual(converter.get_content(), payload.decode())
+        self.assertEqual(converter.get_encoded_size(), len(payload))
+
+    def test_encoded_size(self):
+        msg = MIMENonMultipart('text', 'plain')
+        msg.set_payload('file content')
+        converter = attachment.MIMEBaseConverter(msg)
+
+        self.assertEqual(
+            converter.get_encoded_size(),
+            len(converter.get_content()),
+        )
+
+
+class TestEncodedContentCache(TestCase):
+    """attachment.EncodedContentCache()"""
+
+    def test_content_is_encoded_once(self):
+        cache = attachment.EncodedContentCache(1024)
+        content = b'file content'
+
+        encoded = cache.get_or_encode(content)
+        self.assertEqual(encoded, base64.b64encode(content).decode())
+        self.assertIs(cache.get_or_encode(bytes(content)), encoded)
+        self.assertEqual(cache.size, len(encoded))
+
+    def test_least_recently_used_content_is_evicted(self):
+        cache = attachment.EncodedContentCache(20)
+        first = cache.get_or_encode(b'first12')  # 12 chars encoded
+        cache.get_or_encode(b'second')  # 8 chars encoded
+        cache.get_or_encode(b'first12')
+        cache.get_or_encode(b'third')  # 8 chars encoded, evicts 'second'
+
+        self.assertEqual(cache.size, 20)
+        self.assertIs(cache.get_or_encode(b'first12'), first)
+        self.assertNotIn(
+            base64.b64encode(b'second').decode(),
+            cache._items.values(),
+        )
+
+    def test_too_large_content_is_not_cached(self):
+        cache = attachment.EncodedContentCache(4)
+        cache.get_or_encode(b'file content')
+        self.assertEqual(cache.size, 0)
+
+    def test_converters_use_cache(self):
+        cache = attachment.EncodedContentCache(1024)
+        tuple_converter = attachment.TupleBaseConverter(
+            ('file.txt', 'file content', 'text/plain'),
+        )
+        msg = MIMENonMultipart('text', 'plain')
+        msg.set_payload('file content')
+        mime_converter = attachment.MIMEBaseConverter(msg)
+
+        self.assertIs(
+            tuple_converter.get_content(cache),
+            mime_converter.get_content(cache),
+        )
+
+
+class TestGetContentCache(TestCase):
+    """attachment.get_content_cache()"""
+
+    def test_disabled(self):
+        self.assertIsNone(attachment.get_content_cache(0))
+
+    def test_cache_is_shared(self):
+        cache = attachment.get_content_cache(1024)
+        self.assertIs(attachment.get_content_cache(1024), cache)
@@ -1,25 +1,20 @@
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from azure.core.pipeline.policies import RetryPolicy
+from azure.core.rest import HttpRequest
 
 from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.test import TestCase
 
-from django_azure_communication_email import EmailBackend
-
-
-class EmailClientStub:
-    """Behaves like `azure.communication.email.EmailClient`."""
-
-    def __init__(self):
-        self.messages = []
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, *args, **kwargs):  # noqa
-        pass
-
-    def begin_send(self, message):
-        self.messages.append(message)
+from benchmarks.fake_acs import FakeACSServer
+from django_azure_communication_email import (
+    EmailBackend, clients, dispatcher, throttle,
+)
+from django_azure_communication_email.exceptions import PayloadTooLarge
+from tests.helpers import EmailClientStub
 
 
 class TestEmailBackend(TestCase):
@@ -173,3 +168,225 @@ class TestEmailBackend(TestCase):
             },
         )
         self.assertIsNone(self.backend._client)
+
+    def test_send_messages_concurrently(self):
+        backend = EmailBackend(max_workers=4)
+        client = backend._client = EmailClientStub()
+        messages = [
+            EmailMessage(
+                subject=f'Subject {i}',
+                body='plain text',
+                from_email='support@company.com',
+                to=['foo@company.com'],
+            )
+            for i in range(20)
+        ]
+
+        self.assertEqual(backend.send_messages(messages), 20)
+        self.assertEqual(len(client.messages), 20)
+        self.assertEqual(
+            sorted(msg['content']['subject'] for msg in client.messages),
+            sorted(msg.subject for msg in messages),
+        )
+        self.assertIsNone(backend._client)
+
+    def test_send_messages_concurrently_fail_silently(self):
+        backend = EmailBackend(max_workers=4, fail_silently=True)
+        client = backend._client = EmailClientStub()
+        messages = [
+            EmailMessage(
+                subject=subject,
+                body='plain text',
+                from_email='support@company.com',
+                to=['foo@company.com'],
+            )
+            for subject in ['ok', 'fail', 'ok', 'fail', 'ok']
+        ]
+
+        self.assertEqual(backend.send_messages(messages), 3)
+        self.assertEqual(len(client.messages), 3)
+
+    def test_send_messages_concurrently_fail_not_silently(self):
+        backend = EmailBackend(max_workers=4)
+        backend._client = EmailClientStub()
+        message = EmailMessage(
+            subject='fail',
+            body='plain text',
+            from_email='support@company.com',
+            to=['foo@company.com'],
+        )
+
+        with self.assertRaises(RuntimeError):
+            backend.send_messages([message])
+
+    def test_persistent_client_is_shared(self):
+        config = {
+            'endpoint': 'https://endpoint',
+            'key_credential': '1234',
+            'persistent_client': True,
+        }
+        backend_1 = EmailBackend(**config)
+        backend_2 = EmailBackend(**config)
+        self.addCleanup(clients.close_clients)
+
+        backend_1.open()
+        client = backend_1._client
+        backend_1.close()
+        backend_2.open()
+
+        self.assertIsNotNone(client)
+        self.assertIs(backend_2._client, client)
+
+    def test_persistent_client_stays_open(self):
+        backend = EmailBackend(persistent_client=True)
+        client = backend._client = EmailClientStub()
+        message = EmailMessage(
+            subject='Subject',
+            body='plain text',
+            from_email='support@company.com',
+            to=['foo@company.com'],
+        )
+
+        self.assertEqual(backend.send_messages([message]), 1)
+        self.assertEqual(len(client.messages), 1)
+        self.assertFalse(client.closed)
+        self.assertIsNone(backend._client)
+
+    def test_concurrent_calls_are_independent(self):
+        backend = EmailBackend(persistent_client=True)
+        self.addCleanup(clients.close_clients)
+        started, release = threading.Event(), threading.Event()
+        options = {}
+
+        class Client(EmailClientStub):
+            def begin_send(self, message, **kwargs):
+                subject = message['content']['subject']
+                if subject == 'slow':
+                    started.set()
+                    release.wait(5)
+                options[subject] = kwargs
+                super().begin_send(message, **kwargs)
+
+        def send(*subjects, **kwargs):
+            messages = [
+                EmailMessage(
+                    subject=subject,
+                    body='plain text',
+                    from_email='support@company.com',
+                    to=['foo@company.com'],
+                )
+                for subject in subjects
+            ]
+            return backend.send_messages(messages, **kwargs)
+
+        client = Client()
+        with mock.patch.object(backend, '_create_client', return_value=client):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                slow = executor.submit(send, 'slow', 'next')
+                started.wait(5)
+                self.assertEqual(send('fast', timeout=10), 1)
+                release.set()
+                # the fast call neither closed the client of the slow one
+                # nor changed its deadline
+                self.assertEqual(slow.result(), 2)
+
+        self.assertIn('deadline', options['fast'])
+        self.assertNotIn('deadline', options['next'])
+        self.assertEqual(len(client.messages), 3)
+
+    def test_clients_have_their_own_retry_policy(self):
+        with FakeACSServer() as server:
+            backend = EmailBackend(
+                connection_string=server.connection_string,
+                retry_policy=RetryPolicy.no_retries(),
+            )
+            client = backend._create_client()
+            with backend._create_client():
+                pass
+
+            # the closed client's transport isn't used
+            response = client.send_request(
+                HttpRequest('GET', '/emails/operations/1'),
+            )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_send_messages_in_background(self):
+        backend = EmailBackend(
+            endpoint='https://endpoint',
+            key_credential='1234',
+            background=True,
+        )
+        self.addCleanup(clients.close_clients)
+        self.addCleanup(dispatcher.shutdown_dispatchers, 1)
+        client = EmailClientStub()
+        clients.get_client(backend._get_client_key(), lambda: client)
+        messages = [
+            EmailMessage(
+                subject=f'Subject {i}',
+                body='plain text',
+                from_email='support@company.com',
+                to=['foo@company.com'],
+            )
+            for i in range(5)
+        ]
+
+        self.assertEqual(backend.send_messages(messages), 5)
+        self.assertIsNone(backend._client)
+
+        dispatcher.shutdown_dispatchers(1)
+        self.assertEqual(len(client.messages), 5)
+        self.assertFalse(client.closed)
+
+    def test_rate_limited_client(self):
+        backend = EmailBackend(
+            endpoint='https://endpoint',
+            key_credential='1234',
+            rate_limit_per_minute=30,
+        )
+        client = backend._create_client()
+
+        policies = [
+            policy for policy in client._client._pipeline._impl_policies
+            if isinstance(policy, throttle.ThrottlePolicy)
+        ]
+        self.assertEqual(len(policies), 1)
+        self.assertIs(policies[0].limiter, backend._rate_limiter)
+
+    def test_payload_too_large(self):
+        message = EmailMessage(
+            subject='Subject',
+            body='plain text',
+            from_email='support@company.com',
+            to=['foo@company.com'],
+        )
+        message.attach('file.bin', b'0' * 300, 'application/octet-stream')
+
+        with self.settings(AZURE_COMMUNICATION_MAX_PAYLOAD_SIZE=400):
+            with self.assertRaises(PayloadTooLarge):
+                self.backend.convert_message(message)
+
+            backend = EmailBackend(fail_silently=True)
+            client = backend._client = EmailClientStub()
+            self.assertEqual(backend.send_messages([message]), 0)
+            self.assertEqual(client.messages, [])
+
+    def test_send_coalesced_messages(self):
+        backend = EmailBackend(coalesce=True)
+        client = backend._client = EmailClientStub()
+        messages = [
+            EmailMessage(
+                subject='Newsletter',
+                body='plain text',
+                from_email='support@company.com',
+                to=[f'user{i}@company.com'],
+            )
+            for i in range(120)
+        ]
+
+        self.assertEqual(backend.send_messages(messages), 120)
+        self.assertEqual(len(client.messages), 3)
+        self.assertEqual(
+            [len(msg['recipients']['bcc']) for msg in client.messages],
+            [50, 50, 20],
+        )
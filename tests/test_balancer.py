@@ -0,0 +1,164 @@
+from azure.core.pipeline.policies import RetryPolicy
+
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import (
+    AsyncEmailBackend, EmailBackend, balancer, circuit,
+)
+from tests.helpers import FakeACSMixin, make_messages, requires_aiohttp
+
+
+class TestBalancer(SimpleTestCase):
+    """balancer.Balancer()"""
+
+    def make_balancer(self, *weights):
+        return balancer.Balancer(
+            [
+                balancer.Resource(endpoint=f'https://{i}', weight=weight)
+                for i, weight in enumerate(weights)
+            ],
+            cooldown=30,
+        )
+
+    def pick(self, resources_balancer, times):
+        return [
+            resources_balancer.get_resources()[0].options['endpoint']
+            for _ in range(times)
+        ]
+
+    def test_round_robin(self):
+        self.assertEqual(
+            self.pick(self.make_balancer(1, 1, 1), 6),
+            ['https://0', 'https://1', 'https://2'] * 2,
+        )
+
+    def test_weights(self):
+        self.assertEqual(
+            self.pick(self.make_balancer(2, 1), 6),
+            ['https://0', 'https://1', 'https://0'] * 2,
+        )
+
+    def test_unhealthy_resources_go_last(self):
+        resources_balancer = self.make_balancer(1, 1, 1)
+        resources_balancer.mark_failed(resources_balancer.resources[0])
+
+        self.assertEqual(
+            self.pick(resources_balancer, 4),
+            ['https://1', 'https://2'] * 2,
+        )
+        self.assertIs(
+            resources_balancer.get_resources()[-1],
+            resources_balancer.resources[0],
+        )
+
+    def test_invalid_resource(self):
+        with self.assertRaises(ValueError):
+            balancer.Resource(endpoint='https://0', weight=0)
+        with self.assertRaises(ValueError):
+            balancer.Resource(endpoint='https://0', access_key='key')
+
+    def test_get_balancer(self):
+        resources = [{'endpoint': 'https://0'}, {'endpoint': 'https://1'}]
+        self.assertIs(
+            balancer.get_balancer(resources, 30),
+            balancer.get_balancer(resources, 30),
+        )
+        self.assertIsNot(
+            balancer.get_balancer(resources, 30),
+            balancer.get_balancer(resources[:1], 30),
+        )
+
+
+class TestEmailBackendResources(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with several resources"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.servers = [self.server, self.start_server()]
+        self.addCleanup(balancer._balancers.clear)
+
+        self.messages = make_messages(4)
+
+    def make_backend(self, backend_class=EmailBackend, **kwargs):
+        return super().make_backend(
+            backend_class,
+            connection_string=None,
+            resources=[
+                {'connection_string': server.connection_string}
+                for server in self.servers
+            ],
+            **kwargs,
+        )
+
+    def test_sends_are_spread(self):
+        self.assertEqual(self.make_backend().send_messages(self.messages), 4)
+
+        self.assertEqual(self.servers[0].stats['sent'], 2)
+        self.assertEqual(self.servers[1].stats['sent'], 2)
+
+    def test_failover(self):
+        self.servers[0].throttle_rate = 1
+
+        self.assertEqual(self.make_backend().send_messages(self.messages), 4)
+
+        # the throttling resource is skipped during the cooldown
+        self.assertEqual(self.servers[0].stats['throttled'], 1)
+        self.assertEqual(self.servers[1].stats['sent'], 4)
+
+    def test_failover_skips_the_status_retries(self):
+        for server in self.servers:
+            server.throttle_rate = 1
+            server.retry_after = 0
+        backend = self.make_backend(
+            fail_silently=True,
+            retry_policy=RetryPolicy(retry_total=2, retry_backoff_factor=0),
+        )
+
+        self.assertEqual(backend.send_messages(self.messages[:1]), 0)
+
+        # retried on the last resource only
+        self.assertEqual(self.servers[0].stats['throttled'], 1)
+        self.assertEqual(self.servers[1].stats['throttled'], 3)
+
+    def test_all_resources_fail(self):
+        for server in self.servers:
+            server.error_rate = 1
+        backend = self.make_backend(fail_silently=True)
+
+        self.assertEqual(backend.send_messages(self.messages[:1]), 0)
+
+        self.assertEqual(self.servers[0].stats['errors'], 1)
+        self.assertEqual(self.servers[1].stats['errors'], 1)
+
+    @override_settings(
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_THRESHOLD=1,
+        AZURE_COMMUNICATION_FAILOVER_COOLDOWN=0,
+    )
+    def test_open_circuit_is_skipped(self):
+        self.addCleanup(circuit._breakers.clear)
+        self.servers[0].error_rate = 1
+
+        self.assertEqual(self.make_backend().send_messages(self.messages), 4)
+
+        # the resource isn't tried again while its circuit is open
+        self.assertEqual(self.servers[0].stats['errors'], 1)
+        self.assertEqual(self.servers[1].stats['sent'], 4)
+
+    def test_settings(self):
+        resources = [{'connection_string': self.servers[1].connection_string}]
+        with self.settings(AZURE_COMMUNICATION_RESOURCES=resources):
+            backend = EmailBackend(retry_policy=RetryPolicy.no_retries())
+
+        self.assertEqual(backend.send_messages(self.messages), 4)
+        self.assertEqual(self.servers[1].stats['sent'], 4)
+
+    @requires_aiohttp
+    def test_async_failover(self):
+        self.servers[0].error_rate = 1
+        backend = self.make_backend(AsyncEmailBackend)
+
+        self.assertEqual(backend.send_messages(self.messages), 4)
+
+        # the concurrent sends may all try the failing resource first
+        self.assertGreaterEqual(self.servers[0].stats['errors'], 1)
+        self.assertEqual(self.servers[1].stats['sent'], 4)
@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase
+
+from benchmarks.run import build_messages, run_scenario
+from tests.helpers import FakeACSMixin
+
+
+class _Options:
+    attachment_size = 1024
+    recipients = 5
+
+
+class TestFakeACSServer(FakeACSMixin, SimpleTestCase):
+    """benchmarks.fake_acs.FakeACSServer()"""
+
+    def test_messages_are_sent_over_http(self):
+        for scenario in ['plain', 'html', 'attachment', 'recipients']:
+            messages = build_messages(scenario, 3, _Options())
+            result = run_scenario(self.make_backend, messages)
+            self.assertEqual(result['sent'], 3, scenario)
+            self.assertIsNotNone(result['p50'])
+
+        self.assertEqual(self.server.stats['sent'], 12)
+
+    def test_throttled_request(self):
+        self.server.throttle_rate = 1
+        backend = self.make_backend(fail_silently=True)
+
+        messages = build_messages('plain', 1, _Options())
+        self.assertEqual(backend.send_messages(messages), 0)
+        self.assertEqual(self.server.stats['throttled'], 1)
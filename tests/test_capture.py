@@ -0,0 +1,159 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from django_azure_communication_email import lanes
+from django_azure_communication_email.capture import (
+    EmailBackend as CaptureEmailBackend, replay, writer,
+)
+from tests.helpers import FakeACSMixin, make_messages
+
+
+class TestCaptureEmailBackend(SimpleTestCase):
+    """capture.backend.CaptureEmailBackend()"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(writer.close_writers)
+
+    def read_files(self):
+        writer.close_writers()
+        paths = sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+        )
+        return paths, list(replay.read_payloads(paths))
+
+    def test_send_messages(self):
+        backend = CaptureEmailBackend(capture_dir=self.directory)
+
+        self.assertEqual(backend.send_messages(make_messages(3)), 3)
+
+        paths, payloads = self.read_files()
+        self.assertEqual(len(paths), 1)
+        self.assertRegex(
+            os.path.basename(paths[0]),
+            r'^emails-\d{8}T\d{6}-\d+-1\.jsonl$',
+        )
+        self.assertEqual(
+            [payload['content']['subject'] for payload in payloads],
+            ['Subject 0', 'Subject 1', 'Subject 2'],
+        )
+        self.assertEqual(
+            payloads[0]['recipients'],
+            {'to': [{'displayName': '', 'address': 'to@company.com'}]},
+        )
+
+    def test_headers_are_kept(self):
+        backend = CaptureEmailBackend(
+            capture_dir=self.directory,
+            idempotent=True,
+        )
+        messages = make_messages(1) * 2
+        messages[0].extra_headers['Idempotency-Key'] = 'order-1'
+
+        self.assertEqual(
+            backend.send_messages(messages, priority=lanes.HIGH),
+            2,
+        )
+
+        # the repeated message isn't skipped as already accepted
+        payloads = self.read_files()[1]
+        self.assertEqual(len(payloads), 2)
+        self.assertEqual(
+            payloads[0]['headers'],
+            {'Idempotency-Key': 'order-1', 'X-Email-Priority': lanes.HIGH},
+        )
+
+    def test_rotation(self):
+        backend = CaptureEmailBackend(
+            capture_dir=self.directory,
+            capture_max_bytes=1,
+        )
+
+        backend.send_messages(make_messages(3))
+
+        paths, payloads = self.read_files()
+        self.assertEqual(len(paths), 3)
+        self.assertEqual(len(payloads), 3)
+
+    def test_gzip(self):
+        backend = CaptureEmailBackend(
+            capture_dir=self.directory,
+            capture_gzip=True,
+        )
+
+        backend.send_messages(make_messages(2))
+
+        paths, payloads = self.read_files()
+        self.assertTrue(paths[0].endswith('.jsonl.gz'))
+        with gzip.open(paths[0], 'rb') as file:
+            self.assertEqual(len(file.read().splitlines()), 2)
+        self.assertEqual(len(payloads), 2)
+
+    def test_missing_directory(self):
+        backend = CaptureEmailBackend(capture_dir=None)
+
+        with self.assertRaises(ValueError):
+            backend.send_messages(make_messages(1))
+        self.assertEqual(
+            CaptureEmailBackend(
+                capture_dir=None,
+                fail_silently=True,
+            ).send_messages(make_messages(1)),
+            0,
+        )
+
+
+class TestReplay(FakeACSMixin, SimpleTestCase):
+    """capture.replay.replay()"""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'emails.jsonl')
+        with open(self.path, 'w') as file:
+            for i in range(3):
+                file.write(json.dumps({
+                    'senderAddress': 'sender@company.com',
+                    'recipients': {'to': [{'address': 'to@company.com'}]},
+                    'content': {'subject': f'Subject {i}'},
+                }) + '\n\n')
+
+    def make_backend(self):
+        return super().make_backend(outbox=False, background=False)
+
+    def test_replay(self):
+        self.assertEqual(
+            replay.replay([self.path], backend=self.make_backend()),
+            (3, 0),
+        )
+        self.assertEqual(self.server.stats['sent'], 3)
+
+    def test_replay_failures(self):
+        self.server.error_rate = 1
+
+        self.assertEqual(
+            replay.replay([self.path], backend=self.make_backend()),
+            (0, 3),
+        )
+
+    def test_command(self):
+        stdout = io.StringIO()
+        connection_string = self.server.connection_string
+        with self.settings(
+            AZURE_COMMUNICATION_CONNECTION_STRING=connection_string,
+        ):
+            call_command(
+                'replay_email_capture',
+                self.path,
+                '--rate', '1000',
+                stdout=stdout,
+            )
+        self.assertIn('Sent 3 emails, 0 failed.', stdout.getvalue())
@@ -0,0 +1,197 @@
+import asyncio
+from unittest import mock
+
+from azure.core.exceptions import HttpResponseError, ServiceRequestError
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import circuit, exceptions
+from tests.helpers import FakeACSMixin, make_messages
+
+
+def http_error(status_code):
+    error = HttpResponseError()
+    error.status_code = status_code
+    return error
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    """circuit.CircuitBreaker()"""
+
+    def fail(self, breaker, times=1):
+        for _ in range(times):
+            with self.assertRaises(HttpResponseError):
+                with breaker.guard():
+                    raise http_error(503)
+
+    def succeed(self, breaker):
+        with breaker.guard():
+            pass
+
+    def test_failure_threshold(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=3)
+
+        self.fail(breaker, 2)
+        self.succeed(breaker)
+        self.fail(breaker, 2)
+        self.assertEqual(breaker.state, circuit.CLOSED)
+
+        self.fail(breaker)
+        self.assertEqual(breaker.state, circuit.OPEN)
+        with self.assertRaises(exceptions.CircuitOpen):
+            breaker.check()
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.succeed(breaker)
+
+    def test_failure_rate(self):
+        breaker = circuit.CircuitBreaker(failure_rate=0.5, min_requests=4)
+
+        self.fail(breaker)
+        self.succeed(breaker)
+        self.fail(breaker)
+        self.assertEqual(breaker.state, circuit.CLOSED)
+
+        self.succeed(breaker)
+        self.assertEqual(breaker.state, circuit.OPEN)
+
+    def test_client_errors_are_not_failures(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=1)
+
+        with self.assertRaises(HttpResponseError):
+            with breaker.guard():
+                raise http_error(400)
+
+        self.assertEqual(breaker.state, circuit.CLOSED)
+
+    def test_client_errors_are_not_counted(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=2)
+
+        self.fail(breaker)
+        with self.assertRaises(HttpResponseError):
+            with breaker.guard():
+                raise http_error(400)
+        self.fail(breaker)
+
+        self.assertEqual(breaker.state, circuit.OPEN)
+
+    def test_probe(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        self.fail(breaker)
+        self.assertEqual(breaker.state, circuit.HALF_OPEN)
+        breaker.check()
+
+        # a single probe at a time
+        probe = breaker.guard()
+        probe.__enter__()
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.succeed(breaker)
+        probe.__exit__(None, None, None)
+
+        self.assertEqual(breaker.state, circuit.CLOSED)
+
+    def test_failed_probe(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        self.fail(breaker)
+
+        with mock.patch.object(breaker, 'reset_timeout', 60):
+            self.fail(breaker)
+
+        self.assertEqual(breaker.state, circuit.OPEN)
+
+    def test_cancelled_probe(self):
+        breaker = circuit.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        self.fail(breaker)
+
+        async def probe():
+            with breaker.guard():
+                await asyncio.sleep(10)
+
+        async def cancel():
+            task = asyncio.ensure_future(probe())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+
+        # the next send is let through as a probe
+        self.assertEqual(breaker.state, circuit.HALF_OPEN)
+        self.succeed(breaker)
+        self.assertEqual(breaker.state, circuit.CLOSED)
+
+    def test_state_is_shared_through_cache(self):
+        self.addCleanup(caches['default'].clear)
+        breaker = circuit.CircuitBreaker(
+            name='endpoint',
+            failure_threshold=1,
+            reset_timeout=0,
+            cache_alias='default',
+        )
+        other = circuit.CircuitBreaker(
+            name='endpoint',
+            failure_threshold=1,
+            cache_alias='default',
+        )
+
+        self.fail(breaker)
+        self.assertEqual(other.state, circuit.HALF_OPEN)
+
+        probe = breaker.guard()
+        probe.__enter__()
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.succeed(other)
+        probe.__exit__(None, None, None)
+
+        self.assertEqual(other.state, circuit.CLOSED)
+
+    def test_is_failure(self):
+        self.assertTrue(circuit.is_failure(http_error(429)))
+        self.assertTrue(circuit.is_failure(http_error(500)))
+        self.assertTrue(circuit.is_failure(ServiceRequestError('timeout')))
+        self.assertFalse(circuit.is_failure(http_error(401)))
+        self.assertFalse(circuit.is_failure(ValueError()))
+
+    def test_get_circuit_breaker(self):
+        self.assertIsNone(circuit.get_circuit_breaker())
+        self.assertIs(
+            circuit.get_circuit_breaker(name='a', failure_threshold=5),
+            circuit.get_circuit_breaker(name='a', failure_threshold=5),
+        )
+        self.assertIsNot(
+            circuit.get_circuit_breaker(name='a', failure_threshold=5),
+            circuit.get_circuit_breaker(name='b', failure_threshold=5),
+        )
+
+
+@override_settings(AZURE_COMMUNICATION_CIRCUIT_BREAKER_THRESHOLD=2)
+class TestEmailBackendCircuitBreaker(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with a circuit breaker"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(circuit._breakers.clear)
+
+        self.server.error_rate = 1
+        self.messages = make_messages(5)
+
+    def test_fail_fast(self):
+        backend = self.make_backend(fail_silently=True)
+
+        self.assertEqual(backend.send_messages(self.messages), 0)
+        self.assertEqual(self.server.stats['requests'], 2)
+
+        self.assertEqual(backend.send_messages(self.messages), 0)
+        self.assertEqual(self.server.stats['requests'], 2)
+
+    def test_raise(self):
+        backend = self.make_backend()
+
+        for _ in range(2):
+            with self.assertRaises(HttpResponseError):
+                backend.send_messages(self.messages[:1])
+        with self.assertRaises(exceptions.CircuitOpen):
+            backend.send_messages(self.messages)
+
+        self.assertEqual(self.server.stats['requests'], 2)
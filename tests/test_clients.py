@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from django_azure_communication_email import clients
+from tests.helpers import EmailClientStub
+
+
+class TestGetClient(TestCase):
+    """clients.get_client()"""
+
+    def tearDown(self) -> None:
+        clients.close_clients()
+
+    def test_client_is_created_once(self):
+        created = []
+
+        def factory():
+            created.append(EmailClientStub())
+            return created[-1]
+
+        client = clients.get_client('key', factory)
+        self.assertIs(clients.get_client('key', factory), client)
+        self.assertEqual(created, [client])
+
+    def test_clients_are_keyed_by_configuration(self):
+        client_1 = clients.get_client('key-1', EmailClientStub)
+        client_2 = clients.get_client('key-2', EmailClientStub)
+        self.assertIsNot(client_1, client_2)
+
+    def test_close_clients(self):
+        client = clients.get_client('key', EmailClientStub)
+        clients.close_clients()
+
+        self.assertTrue(client.closed)
+        self.assertIsNot(clients.get_client('key', EmailClientStub), client)
+
+    def test_registry_is_dropped_after_fork(self):
+        client = clients.get_client('key', EmailClientStub)
+        clients._clients._reset_after_fork()
+
+        self.assertFalse(client.closed)
+        self.assertIsNot(clients.get_client('key', EmailClientStub), client)
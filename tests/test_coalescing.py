@@ -0,0 +1,92 @@
+from django.core.mail import EmailMessage
+from django.test import TestCase
+
+from django_azure_communication_email import coalescing
+
+
+def _make_message(to=(), cc=(), bcc=(), subject='Subject'):
+    return EmailMessage(
+        subject=subject,
+        body='plain text',
+        from_email='support@company.com',
+        to=list(to),
+        cc=list(cc),
+        bcc=list(bcc),
+    )
+
+
+class TestCoalesce(TestCase):
+    """coalescing.coalesce()"""
+
+    def test_same_messages_are_merged_into_bcc(self):
+        messages = [_make_message(to=[f'{i}@company.com']) for i in range(3)]
+
+        parts = coalescing.coalesce(messages, 50)
+        self.assertEqual(len(parts), 1)
+        self.assertEqual(parts[0].sources, (0, 1, 2))
+        self.assertEqual(parts[0].message.to, [])
+        self.assertEqual(
+            parts[0].message.bcc,
+            ['0@company.com', '1@company.com', '2@company.com'],
+        )
+        self.assertEqual(messages[0].to, ['0@company.com'])
+
+    def test_different_messages_are_not_merged(self):
+        messages = [
+            _make_message(to=['foo@company.com'], subject='First'),
+            _make_message(to=['bar@company.com'], subject='Second'),
+        ]
+
+        parts = coalescing.coalesce(messages, 50)
+        self.assertEqual([part.message for part in parts], messages)
+        self.assertEqual([part.sources for part in parts], [(0,), (1,)])
+
+    def test_messages_with_cc_are_not_merged(self):
+        messages = [
+            _make_message(to=['foo@company.com'], cc=['cc@company.com']),
+            _make_message(to=['bar@company.com'], cc=['cc@company.com']),
+        ]
+        self.assertEqual(len(coalescing.coalesce(messages, 50)), 2)
+
+    def test_merged_recipients_are_chunked(self):
+        messages = [_make_message(to=[f'{i}@company.com']) for i in range(5)]
+
+        parts = coalescing.coalesce(messages, 2)
+        self.assertEqual(
+            [part.sources for part in parts],
+            [(0, 1), (2, 3), (4,)],
+        )
+        self.assertEqual(parts[2].message.bcc, ['4@company.com'])
+
+    def test_oversized_message_is_split(self):
+        message = _make_message(
+            to=['to1@company.com', 'to2@company.com'],
+            cc=['cc@company.com'],
+            bcc=['bcc@company.com'],
+        )
+
+        parts = coalescing.coalesce([message], 3)
+        self.assertEqual(len(parts), 2)
+        self.assertEqual(parts[0].message.to, message.to)
+        self.assertEqual(parts[0].message.cc, ['cc@company.com'])
+        self.assertEqual(parts[0].message.bcc, [])
+        self.assertEqual(parts[1].message.to, [])
+        self.assertEqual(parts[1].message.bcc, ['bcc@company.com'])
+        self.assertEqual([part.sources for part in parts], [(0,), (0,)])
+
+
+class TestGetResults(TestCase):
+    """coalescing.get_results()"""
+
+    def test_message_is_sent_if_all_its_parts_are_sent(self):
+        message = _make_message()
+        parts = [
+            coalescing.Part(message, (0, 1)),
+            coalescing.Part(message, (1, 2)),
+            coalescing.Part(message, (3,)),
+            coalescing.Part(message, (2, 4)),
+        ]
+        self.assertEqual(
+            coalescing.get_results(parts, [True, False, True, None], 5),
+            [True, False, False, True, None],
+        )
@@ -0,0 +1,149 @@
+import time
+
+from azure.core.credentials import AccessToken, AzureKeyCredential
+from azure.identity import ClientSecretCredential
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from django_azure_communication_email import credentials
+
+
+class TokenCredentialStub:
+    """Behaves like `azure.identity.DefaultAzureCredential`."""
+
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.calls = 0
+        self.error = None
+
+    def get_token(self, *scopes, **kwargs):
+        if self.error:
+            raise self.error
+        self.calls += 1
+        return AccessToken(
+            f'token-{self.calls}',
+            int(time.time()) + self.expires_in,
+        )
+
+    def close(self):
+        pass
+
+
+class TestCachedTokenCredential(TestCase):
+    """credentials.CachedTokenCredential()"""
+
+    def test_token_is_cached(self):
+        stub = TokenCredentialStub()
+        credential = credentials.CachedTokenCredential(stub, 300)
+
+        token = credential.get_token('scope')
+        self.assertIs(credential.get_token('scope'), token)
+        self.assertEqual(stub.calls, 1)
+
+    def test_token_is_refreshed_ahead_of_expiry(self):
+        stub = TokenCredentialStub(expires_in=200)
+        credential = credentials.CachedTokenCredential(stub, 300)
+
+        credential.get_token('scope')
+        self.assertEqual(credential.get_token('scope').token, 'token-2')
+
+    def test_old_token_is_used_when_refresh_fails(self):
+        stub = TokenCredentialStub(expires_in=200)
+        credential = credentials.CachedTokenCredential(stub, 300)
+
+        token = credential.get_token('scope')
+        stub.error = RuntimeError('Failed to get token')
+        self.assertIs(credential.get_token('scope'), token)
+
+    def test_refresh_error_without_usable_token(self):
+        stub = TokenCredentialStub()
+        stub.error = RuntimeError('Failed to get token')
+        credential = credentials.CachedTokenCredential(stub, 300)
+
+        with self.assertRaises(RuntimeError):
+            credential.get_token('scope')
+
+    def test_claims_bypass_cache(self):
+        stub = TokenCredentialStub()
+        credential = credentials.CachedTokenCredential(stub, 300)
+
+        credential.get_token('scope')
+        credential.get_token('scope', claims='claims')
+        self.assertEqual(stub.calls, 2)
+
+    async def test_async_wrapper(self):
+        stub = TokenCredentialStub()
+        credential = credentials.AsyncCachedTokenCredential(
+            credentials.CachedTokenCredential(stub, 300),
+        )
+
+        token = await credential.get_token('scope')
+        self.assertIs(await credential.get_token('scope'), token)
+        self.assertEqual(stub.calls, 1)
+
+
+class TestGetCredential(TestCase):
+    """credentials.get_credential()"""
+
+    def tearDown(self) -> None:
+        credentials.clear_credentials()
+
+    def test_connection_string(self):
+        endpoint, credential = credentials.get_credential(
+            connection_string='endpoint=https://endpoint/;accesskey=1234',
+        )
+        self.assertEqual(endpoint, 'https://endpoint')
+        self.assertIsInstance(credential, AzureKeyCredential)
+        self.assertEqual(credential.key, '1234')
+
+    def test_invalid_connection_string(self):
+        with self.assertRaises(ValueError):
+            credentials.get_credential(connection_string='endpoint=foo')
+
+    def test_key_credential(self):
+        endpoint, credential = credentials.get_credential(
+            endpoint='https://endpoint',
+            key_credential='1234',
+        )
+        self.assertEqual(endpoint, 'https://endpoint')
+        self.assertIsInstance(credential, AzureKeyCredential)
+
+    def test_aad_credential_is_shared(self):
+        options = {'tenant_id': '1234', 'endpoint': 'https://endpoint'}
+        _, credential = credentials.get_credential(**options)
+
+        self.assertIsInstance(credential, credentials.CachedTokenCredential)
+        self.assertIs(credentials.get_credential(**options)[1], credential)
+
+    def test_client_secret_credential(self):
+        _, credential = credentials.get_credential(
+            tenant_id='1234',
+            client_id='5678',
+            client_secret='secret',
+            endpoint='https://endpoint',
+        )
+        self.assertIsInstance(credential.credential, ClientSecretCredential)
+
+    def test_client_id_without_secret(self):
+        with self.assertRaises(ImproperlyConfigured):
+            credentials.get_credential(
+                tenant_id='1234',
+                client_id='5678',
+                endpoint='https://endpoint',
+            )
+
+    def test_async_aad_credential(self):
+        _, credential = credentials.get_credential(
+            tenant_id='1234',
+            endpoint='https://endpoint',
+            is_async=True,
+        )
+        self.assertIsInstance(
+            credential,
+            credentials.AsyncCachedTokenCredential,
+        )
+
+    def test_not_configured(self):
+        with self.assertRaises(ImproperlyConfigured):
+            credentials.get_credential()
@@ -0,0 +1,174 @@
+import time
+
+from azure.core.exceptions import ServiceResponseTimeoutError
+from azure.core.pipeline.policies import RetryPolicy
+
+from django.test import SimpleTestCase
+
+from django_azure_communication_email import AsyncEmailBackend, deadline
+from django_azure_communication_email.exceptions import DeadlineExceeded
+from tests.helpers import (
+    FakeACSMixin, NextPolicyStub, make_messages, make_request,
+    requires_aiohttp,
+)
+
+
+class TestGetOptions(SimpleTestCase):
+    """deadline.get_options()"""
+
+    def test_no_deadline(self):
+        self.assertEqual(deadline.get_options(None), {})
+
+    def test_deadline(self):
+        options = deadline.get_options(time.monotonic() + 10)
+
+        self.assertLessEqual(options['timeout'], 10)
+        self.assertEqual(options['timeout'], options['read_timeout'])
+        self.assertEqual(options['timeout'], options['connection_timeout'])
+
+    def test_deadline_is_over(self):
+        with self.assertRaises(DeadlineExceeded):
+            deadline.get_options(time.monotonic())
+
+    def test_is_over(self):
+        future = time.monotonic() + 10
+        self.assertFalse(deadline.is_over(None, DeadlineExceeded()))
+        self.assertFalse(deadline.is_over(future, ValueError()))
+        self.assertTrue(deadline.is_over(future, DeadlineExceeded()))
+        self.assertTrue(deadline.is_over(
+            future,
+            ServiceResponseTimeoutError('Read timed out'),
+        ))
+        self.assertTrue(deadline.is_over(time.monotonic(), ValueError()))
+
+
+class TestDeadlinePolicy(SimpleTestCase):
+    """deadline.DeadlinePolicy()"""
+
+    def make_policy(self, **kwargs):
+        policy = deadline.DeadlinePolicy()
+        policy.next = NextPolicyStub(**kwargs)
+        return policy
+
+    def test_no_deadline(self):
+        policy = self.make_policy()
+        request = make_request()
+
+        self.assertIs(policy.send(request), policy.next.response)
+
+    def test_deadline_is_kept_out_of_the_transport_options(self):
+        policy = self.make_policy()
+        request = make_request(deadline=time.monotonic() + 10)
+
+        policy.send(request)
+
+        self.assertNotIn('deadline', request.context.options)
+        # the retries still see it
+        policy.send(request)
+        self.assertIn('deadline', request.context)
+
+    def test_deadline_is_over(self):
+        policy = self.make_policy()
+
+        with self.assertRaises(DeadlineExceeded):
+            policy.send(make_request(deadline=time.monotonic()))
+        self.assertEqual(policy.next.requests, [])
+
+    def test_retry_after_past_the_deadline(self):
+        policy = self.make_policy(
+            status_code=429,
+            headers={'retry-after': '60'},
+        )
+
+        with self.assertRaises(DeadlineExceeded):
+            policy.send(make_request(deadline=time.monotonic() + 10))
+
+    def test_retry_after_within_the_deadline(self):
+        policy = self.make_policy(
+            status_code=429,
+            headers={'retry-after': '1'},
+        )
+
+        policy.send(make_request(deadline=time.monotonic() + 10))
+
+
+class TestEmailBackendDeadline(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with a timeout"""
+
+    retry_policy = RetryPolicy(retry_backoff_factor=0)
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.messages = make_messages(3)
+
+    def test_within_the_deadline(self):
+        backend = self.make_backend(timeout=10)
+        self.assertEqual(backend.send_messages(self.messages), 3)
+
+    def test_unsent_messages_are_reported(self):
+        self.server.latency = 0.2
+        backend = self.make_backend()
+
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded) as context:
+            backend.send_messages(self.messages, timeout=0.3)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(context.exception.sent, self.messages[:1])
+        self.assertEqual(context.exception.unsent, self.messages[1:])
+
+    def test_retries_stop_at_the_deadline(self):
+        self.server.error_rate = 1
+        backend = self.make_backend(
+            retry_policy=RetryPolicy(retry_total=10, retry_backoff_factor=0.1),
+            timeout=0.3,
+        )
+
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded) as context:
+            backend.send_messages(self.messages[:1])
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(context.exception.unsent, self.messages[:1])
+
+    def test_throttled_past_the_deadline(self):
+        self.server.throttle_rate = 1
+        self.server.retry_after = 60
+
+        with self.assertRaises(DeadlineExceeded):
+            self.make_backend(timeout=5).send_messages(self.messages[:1])
+        self.assertEqual(self.server.stats['throttled'], 1)
+
+    def test_fail_silently(self):
+        self.server.latency = 0.2
+        backend = self.make_backend(timeout=0.3, fail_silently=True)
+
+        with self.assertLogs('django_azure_communication_email', 'WARNING'):
+            self.assertEqual(backend.send_messages(self.messages), 1)
+
+    def test_failures_are_not_reported_as_unsent(self):
+        self.server.error_rate = 1
+        backend = self.make_backend(
+            retry_policy=RetryPolicy.no_retries(),
+            timeout=10,
+            fail_silently=True,
+        )
+
+        with self.assertLogs('django_azure_communication_email') as logs:
+            self.assertEqual(backend.send_messages(self.messages), 0)
+
+        self.assertFalse(any(
+            isinstance(record.exc_info[1], DeadlineExceeded)
+            for record in logs.records
+        ))
+
+    @requires_aiohttp
+    def test_async(self):
+        self.server.latency = 0.2
+        backend = self.make_backend(AsyncEmailBackend, max_concurrency=1)
+
+        with self.assertRaises(DeadlineExceeded) as context:
+            backend.send_messages(self.messages, timeout=0.3)
+
+        self.assertEqual(context.exception.sent, self.messages[:1])
+        self.assertEqual(context.exception.unsent, self.messages[1:])
@@ -0,0 +1,182 @@
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import (
+    AsyncEmailBackend, EmailBackend, balancer, delivery,
+)
+from tests.helpers import FakeACSMixin, make_messages, requires_aiohttp
+
+
+@override_settings(
+    AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL=0.01,
+    AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL_MAX=0.02,
+)
+class TestDeliveryTracking(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with delivery tracking"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(delivery.stop_trackers)
+
+        self.reports = []
+        self.condition = threading.Condition()
+        delivery.delivery_status.connect(self.on_delivery_status)
+        self.addCleanup(
+            delivery.delivery_status.disconnect,
+            self.on_delivery_status,
+        )
+
+        self.messages = make_messages(5)
+
+    def on_delivery_status(self, **kwargs):
+        with self.condition:
+            self.reports.append(kwargs)
+            self.condition.notify_all()
+
+    def wait_for_reports(self, count):
+        with self.condition:
+            self.assertTrue(self.condition.wait_for(
+                lambda: len(self.reports) >= count,
+                timeout=5,
+            ))
+        return self.reports
+
+    def test_not_tracked_by_default(self):
+        self.make_backend().send_messages(self.messages)
+        time.sleep(0.05)
+
+        # the SDK pollers don't poll either
+        self.assertEqual(self.server.stats['polls'], 0)
+        self.assertEqual(self.reports, [])
+
+    def test_succeeded(self):
+        self.server.running_polls = 2
+        backend = self.make_backend(track_delivery=True)
+
+        self.assertEqual(backend.send_messages(self.messages), 5)
+
+        reports = self.wait_for_reports(5)
+        self.assertEqual(
+            {report['operation_id'] for report in reports},
+            self.server.operation_ids,
+        )
+        self.assertEqual(
+            {report['status'] for report in reports},
+            {delivery.SUCCEEDED},
+        )
+        self.assertEqual(reports[0]['sender'], EmailBackend)
+        self.assertEqual(self.server.stats['polls'], 15)
+
+    def test_failed(self):
+        self.server.final_status = delivery.FAILED
+
+        self.make_backend(track_delivery=True).send_messages(self.messages[:1])
+
+        report, = self.wait_for_reports(1)
+        self.assertEqual(report['status'], delivery.FAILED)
+        self.assertEqual(report['error'], {'code': 'Bounced'})
+
+    def test_message_details(self):
+        messages = make_messages(
+            1,
+            bcc=['bcc@company.com'],
+            headers={'X-Email-Reference': 'order-1'},
+        )
+
+        self.make_backend(track_delivery=True).send_messages(messages)
+
+        report, = self.wait_for_reports(1)
+        self.assertEqual(
+            report['recipients'],
+            ['to@company.com', 'bcc@company.com'],
+        )
+        self.assertEqual(report['subject'], 'Subject 0')
+        self.assertEqual(report['reference'], 'order-1')
+
+        self.reports.clear()
+        self.make_backend(track_delivery=True).send_messages(self.messages[:1])
+        report, = self.wait_for_reports(1)
+        self.assertIsNone(report['reference'])
+
+    @override_settings(AZURE_COMMUNICATION_DELIVERY_TIMEOUT=0.05)
+    def test_timed_out(self):
+        self.server.running_polls = 1000
+
+        self.make_backend(track_delivery=True).send_messages(self.messages[:1])
+
+        report, = self.wait_for_reports(1)
+        self.assertEqual(report['status'], delivery.TIMED_OUT)
+        self.assertGreaterEqual(report['duration'], 0.05)
+
+    @requires_aiohttp
+    def test_async(self):
+        backend = self.make_backend(AsyncEmailBackend, track_delivery=True)
+
+        self.assertEqual(backend.send_messages(self.messages), 5)
+
+        reports = self.wait_for_reports(5)
+        self.assertEqual(
+            {report['operation_id'] for report in reports},
+            self.server.operation_ids,
+        )
+
+    def test_several_resources(self):
+        other_server = self.start_server()
+        self.addCleanup(balancer._balancers.clear)
+        backend = EmailBackend(
+            resources=[
+                {'connection_string': server.connection_string}
+                for server in (self.server, other_server)
+            ],
+            track_delivery=True,
+        )
+
+        backend.send_messages(self.messages[:2])
+
+        reports = self.wait_for_reports(2)
+        self.assertEqual(
+            {report['status'] for report in reports},
+            {delivery.SUCCEEDED},
+        )
+        # each operation is polled on the resource that accepted it
+        self.assertEqual(self.server.stats['polls'], 1)
+        self.assertEqual(other_server.stats['polls'], 1)
+
+
+class TestTracker(SimpleTestCase):
+    """delivery.Tracker()"""
+
+    def test_poll_errors_are_retried(self):
+        polls = []
+
+        class Client:
+            def send_request(self, request):
+                polls.append(request.url)
+                raise ConnectionError()
+
+        tracker = delivery.Tracker(
+            Client,
+            workers=1,
+            interval=0.01,
+            max_interval=0.01,
+            timeout=0.05,
+        )
+        self.addCleanup(tracker.stop)
+        reports = []
+
+        def receiver(**kwargs):
+            reports.append(kwargs)
+
+        delivery.delivery_status.connect(receiver)
+        self.addCleanup(delivery.delivery_status.disconnect, receiver)
+
+        with self.assertLogs('django_azure_communication_email', 'WARNING'):
+            tracker.track('http://acs/emails/operations/1?api-version=1')
+            time.sleep(0.2)
+
+        self.assertGreater(len(polls), 1)
+        self.assertEqual(reports[0]['operation_id'], '1')
+        self.assertEqual(reports[0]['status'], delivery.TIMED_OUT)
+        self.assertEqual(len(tracker), 0)
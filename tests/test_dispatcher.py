@@ -0,0 +1,108 @@
+import threading
+
+from django.test import TestCase
+
+from django_azure_communication_email import dispatcher
+from django_azure_communication_email.exceptions import QueueFull
+
+
+class TestDispatcher(TestCase):
+    """dispatcher.Dispatcher()"""
+
+    def setUp(self) -> None:
+        self.sent = []
+        self.taken = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, payload):
+        self.taken.set()
+        self.release.wait()
+        if payload == 'fail':
+            raise RuntimeError('Failed to send')
+        self.sent.append(payload)
+
+    def make_dispatcher(self, **kwargs):
+        options = {'workers': 2, 'queue_size': 10, 'full_policy': 'block'}
+        options.update(kwargs)
+        found = dispatcher.Dispatcher(self.send, **options)
+        self.addCleanup(found.shutdown, 1)
+        return found
+
+    def test_payloads_are_sent_in_background(self):
+        found = self.make_dispatcher()
+        for i in range(5):
+            self.assertTrue(found.put(i))
+
+        self.assertTrue(found.flush(1))
+        self.assertEqual(sorted(self.sent), list(range(5)))
+
+    def test_failed_send_does_not_stop_workers(self):
+        found = self.make_dispatcher(workers=1)
+        found.put('fail')
+        found.put('ok')
+
+        self.assertTrue(found.flush(1))
+        self.assertEqual(self.sent, ['ok'])
+
+    def test_drop_policy(self):
+        self.release.clear()
+        found = self.make_dispatcher(
+            workers=1,
+            queue_size=1,
+            full_policy='drop',
+        )
+        found.put(1)
+        self.taken.wait(1)  # the worker is busy with the first payload
+        found.put(2)
+        self.assertFalse(found.flush(0))
+
+        with self.assertLogs('django_azure_communication_email', 'WARNING'):
+            self.assertFalse(found.put(3))
+        self.release.set()
+
+    def test_raise_policy(self):
+        self.release.clear()
+        found = self.make_dispatcher(
+            workers=1,
+            queue_size=1,
+            full_policy='raise',
+        )
+        found.put(1)
+        self.taken.wait(1)
+        found.put(2)
+
+        with self.assertRaises(QueueFull):
+            found.put(3)
+        self.release.set()
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            self.make_dispatcher(full_policy='unknown')
+
+    def test_shutdown_flushes_queue(self):
+        found = self.make_dispatcher()
+        for i in range(5):
+            found.put(i)
+
+        self.assertTrue(found.shutdown(1))
+        self.assertEqual(len(self.sent), 5)
+
+
+class TestGetDispatcher(TestCase):
+    """dispatcher.get_dispatcher()"""
+
+    def tearDown(self) -> None:
+        dispatcher.shutdown_dispatchers(1)
+
+    def test_dispatcher_is_created_once(self):
+        def factory():
+            return dispatcher.Dispatcher(
+                print,
+                workers=1,
+                queue_size=1,
+                full_policy='block',
+            )
+
+        found = dispatcher.get_dispatcher('key', factory)
+        self.assertIs(dispatcher.get_dispatcher('key', factory), found)
@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import AsyncEmailBackend, idempotency
+from tests.helpers import FakeACSMixin, make_messages, requires_aiohttp
+
+
+HEADER = 'Idempotency-Key'
+
+
+def make_payload(**kwargs):
+    return {
+        'senderAddress': 'sender@company.com',
+        'content': {'subject': 'Subject'},
+        'recipients': {'to': [{'address': 'to@company.com'}]},
+        **kwargs,
+    }
+
+
+class TestPrepare(SimpleTestCase):
+    """idempotency.prepare()"""
+
+    def test_no_id(self):
+        payload = make_payload()
+        self.assertEqual(idempotency.prepare(payload, HEADER), (None, payload))
+
+    def test_derived_id(self):
+        operation_id, payload = idempotency.prepare(
+            make_payload(),
+            HEADER,
+            True,
+        )
+
+        self.assertEqual(payload, make_payload())
+        self.assertEqual(
+            idempotency.prepare(make_payload(), HEADER, True)[0],
+            operation_id,
+        )
+        self.assertNotEqual(
+            idempotency.prepare(
+                make_payload(content={'subject': 'Other'}),
+                HEADER,
+                True,
+            )[0],
+            operation_id,
+        )
+
+    def test_header(self):
+        operation_id, payload = idempotency.prepare(make_payload(
+            headers={'idempotency-key': 'key', 'X-Custom': '1'},
+        ), HEADER)
+
+        self.assertIsNotNone(operation_id)
+        self.assertEqual(payload['headers'], {'X-Custom': '1'})
+        self.assertEqual(
+            idempotency.prepare(make_payload(
+                headers={'Idempotency-Key': 'key'},
+                content={'subject': 'Other'},
+            ), HEADER),
+            (operation_id, make_payload(content={'subject': 'Other'})),
+        )
+
+    def test_header_with_other_recipients(self):
+        # the parts of a split message keep their own ids
+        self.assertNotEqual(
+            idempotency.prepare(make_payload(
+                headers={'Idempotency-Key': 'key'},
+            ), HEADER)[0],
+            idempotency.prepare(make_payload(
+                headers={'Idempotency-Key': 'key'},
+                recipients={'bcc': [{'address': 'bcc@company.com'}]},
+            ), HEADER)[0],
+        )
+
+
+class TestAccepted(SimpleTestCase):
+    """idempotency.accept()"""
+
+    def setUp(self) -> None:
+        self.addCleanup(idempotency.clear)
+
+    def test_accept(self):
+        idempotency.accept('1', 60)
+
+        self.assertTrue(idempotency.is_accepted('1'))
+        self.assertFalse(idempotency.is_accepted('2'))
+
+    def test_expiry(self):
+        with mock.patch('time.monotonic', return_value=0):
+            idempotency.accept('1', 60)
+        with mock.patch('time.monotonic', return_value=60):
+            self.assertFalse(idempotency.is_accepted('1'))
+            idempotency.accept('2', 60)
+        self.assertNotIn('1', idempotency._accepted.objects)
+
+    def test_no_ttl(self):
+        idempotency.accept('1', 0)
+        self.assertFalse(idempotency.is_accepted('1'))
+
+    def test_max_size(self):
+        with mock.patch.object(idempotency, '_MAX_ACCEPTED', 2):
+            for operation_id in '123':
+                idempotency.accept(operation_id, 60)
+
+        self.assertEqual(list(idempotency._accepted.objects), ['2', '3'])
+
+
+class TestEmailBackendIdempotency(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with operation ids"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(idempotency.clear)
+
+        self.message, = make_messages(
+            1,
+            headers={'Idempotency-Key': 'welcome-1'},
+        )
+
+    def test_accepted_ids_are_skipped(self):
+        backend = self.make_backend()
+
+        self.assertEqual(backend.send_messages([self.message]), 1)
+        self.assertEqual(backend.send_messages([self.message]), 1)
+
+        self.assertEqual(self.server.stats['sent'], 1)
+        self.assertEqual(self.server.stats['duplicates'], 0)
+
+    def test_azure_drops_duplicates(self):
+        backend = self.make_backend()
+
+        with self.settings(AZURE_COMMUNICATION_IDEMPOTENCY_TTL=0):
+            backend.send_messages([self.message])
+            backend.send_messages([self.message])
+
+        self.assertEqual(self.server.stats['sent'], 1)
+        self.assertEqual(self.server.stats['duplicates'], 1)
+
+    @override_settings(AZURE_COMMUNICATION_IDEMPOTENCY_HEADER='X-Order')
+    def test_custom_header(self):
+        message, = make_messages(1, headers={'X-Order': 'order-1'})
+        backend = self.make_backend()
+
+        backend.send_messages([message])
+        backend.send_messages([message])
+
+        self.assertEqual(self.server.stats['sent'], 1)
+
+    def test_derived_ids(self):
+        del self.message.extra_headers['Idempotency-Key']
+
+        self.make_backend().send_messages([self.message])
+        self.make_backend(idempotent=True).send_messages([self.message] * 2)
+
+        self.assertEqual(self.server.stats['sent'], 2)
+        self.assertEqual(self.server.stats['duplicates'], 0)
+
+    @requires_aiohttp
+    def test_async(self):
+        backend = self.make_backend(AsyncEmailBackend)
+
+        self.assertEqual(backend.send_messages([self.message]), 1)
+        self.assertEqual(backend.send_messages([self.message]), 1)
+
+        self.assertEqual(self.server.stats['sent'], 1)
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+import django_azure_communication_email
+from django_azure_communication_email.aio import AsyncACEmailBackend
+from django_azure_communication_email.backend import ACEmailBackend
+
+
+class TestPackage(SimpleTestCase):
+    """django_azure_communication_email"""
+
+    def test_backends(self):
+        self.assertIs(
+            django_azure_communication_email.EmailBackend,
+            ACEmailBackend,
+        )
+        self.assertIs(
+            django_azure_communication_email.AsyncEmailBackend,
+            AsyncACEmailBackend,
+        )
+        with self.assertRaises(AttributeError):
+            django_azure_communication_email.UnknownBackend
+
+    def test_azure_sdk_is_not_imported(self):
+        # a fresh interpreter, without Django settings
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, django_azure_communication_email;'
+            ' print(any(name.startswith("azure") for name in sys.modules))',
+        ], text=True)
+        self.assertEqual(output.strip(), 'False')
@@ -0,0 +1,173 @@
+from unittest import mock, skipUnless
+
+from azure.core.pipeline.policies import RetryPolicy
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import instrumentation
+from tests.helpers import FakeACSMixin
+
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+except ImportError:
+    TracerProvider = None
+
+
+SIGNALS = [
+    instrumentation.client_opened,
+    instrumentation.message_converted,
+    instrumentation.message_sent,
+    instrumentation.batch_sent,
+]
+
+
+class TestInstrumentation(FakeACSMixin, SimpleTestCase):
+    """instrumentation signals and spans"""
+
+    retry_policy = None
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.events = []
+        for signal in SIGNALS:
+            signal.connect(self.receiver)
+            self.addCleanup(signal.disconnect, self.receiver)
+
+        self.message = EmailMessage(
+            subject='Subject',
+            body='Body',
+            from_email='sender@company.com',
+            to=['to@company.com', 'other@company.com'],
+            bcc=['bcc@company.com'],
+        )
+        self.message.attach('file.txt', b'content', 'text/plain')
+
+    def receiver(self, signal, sender, **kwargs):
+        self.events.append((signal, kwargs))
+
+    def get_event(self, signal):
+        return next(kwargs for found, kwargs in self.events if found is signal)
+
+    def test_is_enabled(self):
+        self.assertTrue(instrumentation.is_enabled())
+
+        for signal in SIGNALS:
+            signal.disconnect(self.receiver)
+        self.assertFalse(instrumentation.is_enabled())
+
+    def test_send(self):
+        backend = self.make_backend()
+
+        self.assertEqual(backend.send_messages([self.message]), 1)
+
+        self.assertEqual(
+            [signal for signal, _ in self.events],
+            SIGNALS,
+        )
+        self.assertIs(
+            self.get_event(instrumentation.client_opened)['backend'],
+            backend,
+        )
+
+        converted = self.get_event(instrumentation.message_converted)
+        self.assertIs(converted['message'], self.message)
+        self.assertEqual(converted['recipient_count'], 3)
+        self.assertEqual(converted['attachment_size'], len('Y29udGVudA=='))
+        self.assertGreaterEqual(converted['duration'], 0)
+
+        sent = self.get_event(instrumentation.message_sent)
+        self.assertIs(sent['payload'], converted['payload'])
+        self.assertEqual(sent['payload_size'], self.server.stats['bytes'])
+        self.assertEqual(sent['retries'], 0)
+        self.assertIn(sent['operation_id'], self.server.operation_ids)
+        self.assertEqual(sent['throttled'], 0)
+        self.assertIsNone(sent['exception'])
+        self.assertGreater(sent['duration'], 0)
+
+        batch = self.get_event(instrumentation.batch_sent)
+        self.assertEqual(batch['size'], 1)
+        self.assertEqual(batch['sent'], 1)
+        self.assertIsNone(batch['exception'])
+
+    def test_send_retries(self):
+        self.server.error_rate = 1
+        backend = self.make_backend(
+            retry_policy=RetryPolicy(retry_total=2, retry_backoff_factor=0),
+            fail_silently=True,
+        )
+
+        self.assertEqual(backend.send_messages([self.message]), 0)
+
+        sent = self.get_event(instrumentation.message_sent)
+        self.assertEqual(sent['retries'], 2)
+        self.assertIsNone(sent['operation_id'])
+        self.assertIsNotNone(sent['exception'])
+        self.assertEqual(self.server.stats['errors'], 3)
+
+    def test_send_throttled(self):
+        self.server.throttle_rate = 1
+        self.server.retry_after = 0
+        backend = self.make_backend(
+            retry_policy=RetryPolicy(retry_total=1, retry_backoff_factor=0),
+            fail_silently=True,
+        )
+
+        self.assertEqual(backend.send_messages([self.message]), 0)
+
+        sent = self.get_event(instrumentation.message_sent)
+        self.assertEqual(sent['retries'], 1)
+        self.assertEqual(sent['throttled'], 2)
+        self.assertEqual(self.get_event(instrumentation.batch_sent)['sent'], 0)
+
+    def test_receiver_errors_are_logged(self):
+        def receiver(**kwargs):
+            raise ValueError()
+
+        instrumentation.message_sent.connect(receiver)
+        self.addCleanup(instrumentation.message_sent.disconnect, receiver)
+
+        with self.assertLogs('django_azure_communication_email', 'WARNING'):
+            sent = self.make_backend().send_messages([self.message])
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(
+            [signal for signal, _ in self.events],
+            SIGNALS,
+        )
+
+    @skipUnless(TracerProvider, 'requires opentelemetry-sdk')
+    @override_settings(AZURE_COMMUNICATION_OPENTELEMETRY=True)
+    def test_spans(self):
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        patcher = mock.patch(
+            'opentelemetry.trace.get_tracer', provider.get_tracer,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.make_backend().send_messages([self.message])
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        self.assertEqual(sorted(spans), [
+            'azure_communication_email.begin_send',
+            'azure_communication_email.convert_message',
+            'azure_communication_email.open',
+            'azure_communication_email.send_messages',
+        ])
+        converted = spans['azure_communication_email.convert_message']
+        self.assertEqual(converted.attributes['email.recipient_count'], 3)
+        sent = spans['azure_communication_email.begin_send']
+        self.assertEqual(sent.attributes['email.retries'], 0)
+        self.assertIn(
+            sent.attributes['email.operation_id'],
+            self.server.operation_ids,
+        )
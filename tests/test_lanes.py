@@ -0,0 +1,242 @@
+import threading
+import time
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_azure_communication_email import (
+    EmailBackend, clients, dispatcher, lanes, throttle,
+)
+from django_azure_communication_email.outbox.models import OutboxMessage
+from tests.helpers import EmailClientStub
+
+
+def _make_message(priority=None):
+    return EmailMessage(
+        subject='Subject',
+        body='plain text',
+        from_email='support@company.com',
+        to=['foo@company.com'],
+        headers={'X-Email-Priority': priority} if priority else None,
+    )
+
+
+def _make_payload(headers=None):
+    payload = {'senderAddress': 'support@company.com'}
+    if headers:
+        payload['headers'] = headers
+    return payload
+
+
+class TestPrepare(SimpleTestCase):
+    """lanes.prepare()"""
+
+    def test_header(self):
+        priority, payload = lanes.prepare(
+            _make_payload({'x-email-priority': 'HIGH', 'X-Other': 'value'}),
+            'X-Email-Priority',
+            lanes.NORMAL,
+        )
+
+        self.assertEqual(priority, lanes.HIGH)
+        self.assertEqual(payload['headers'], {'X-Other': 'value'})
+
+    def test_default(self):
+        self.assertEqual(
+            lanes.prepare(_make_payload(), 'X-Email-Priority', lanes.BULK),
+            (lanes.BULK, _make_payload()),
+        )
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            lanes.prepare(
+                _make_payload({'X-Email-Priority': 'urgent'}),
+                'X-Email-Priority',
+                lanes.NORMAL,
+            )
+
+    def test_mark(self):
+        self.assertEqual(
+            lanes.mark(_make_payload(), 'X-Email-Priority', lanes.BULK),
+            _make_payload({'X-Email-Priority': lanes.BULK}),
+        )
+        marked = _make_payload({'x-email-priority': lanes.HIGH})
+        self.assertIs(
+            lanes.mark(marked, 'X-Email-Priority', lanes.BULK),
+            marked,
+        )
+
+
+class TestLanes(SimpleTestCase):
+    """lanes.Lanes()"""
+
+    def start(self, found, priority, started, release):
+        def run():
+            with found.slot(priority):
+                started.append(priority)
+                release.wait()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return thread
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 1
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_budget(self):
+        found = lanes.Lanes({lanes.BULK: 1}, connections=3)
+        started, release = [], threading.Event()
+
+        self.start(found, lanes.BULK, started, release)
+        self.start(found, lanes.BULK, started, release)
+        self.start(found, lanes.HIGH, started, release)
+        self.wait_for(lambda: len(started) == 2)
+        time.sleep(0.05)
+
+        self.assertEqual(sorted(started), [lanes.BULK, lanes.HIGH])
+
+    def test_higher_priority_goes_first(self):
+        found = lanes.Lanes({}, connections=1)
+        started, release = [], threading.Event()
+        first = threading.Event()
+
+        self.start(found, lanes.NORMAL, started, first)
+        self.wait_for(lambda: started)
+        self.start(found, lanes.BULK, started, release)
+        time.sleep(0.05)
+        self.start(found, lanes.HIGH, started, release)
+        self.wait_for(lambda: found._waiting[lanes.HIGH])
+        first.set()
+        self.wait_for(lambda: len(started) == 2)
+
+        self.assertEqual(started, [lanes.NORMAL, lanes.HIGH])
+
+    def test_get_lanes(self):
+        self.assertIs(
+            lanes.get_lanes({lanes.BULK: 1}, 10),
+            lanes.get_lanes({lanes.BULK: 1}, 10),
+        )
+
+
+class TestRateLimiterPriority(SimpleTestCase):
+    """throttle.RateLimiter.take()"""
+
+    def test_tokens_are_left_to_higher_priorities(self):
+        limiter = throttle.RateLimiter(per_minute=60)
+
+        with limiter._queue(lanes.HIGH):
+            self.assertGreater(limiter.take(lanes.BULK), 0)
+            self.assertEqual(limiter.take(lanes.HIGH), 0)
+        self.assertEqual(limiter.take(lanes.BULK), 0)
+
+    def test_empty_bucket(self):
+        limiter = throttle.RateLimiter(per_minute=1)
+
+        self.assertEqual(limiter.take(lanes.HIGH), 0)
+        self.assertAlmostEqual(limiter.take(lanes.HIGH), 60, delta=0.1)
+        # the token was not taken
+        self.assertAlmostEqual(limiter.take(lanes.HIGH), 60, delta=0.1)
+
+
+class TestEmailBackendPriority(SimpleTestCase):
+    """backend.ACEmailBackend() with priorities"""
+
+    def setUp(self) -> None:
+        self.backend = EmailBackend()
+        self.client = self.backend._client = EmailClientStub()
+
+    def test_default(self):
+        self.backend.send_messages([_make_message()])
+
+        self.assertEqual(self.client.priorities, [lanes.NORMAL])
+        self.assertIsNone(lanes.get_current())
+
+    def test_header(self):
+        self.backend.send_messages([_make_message(lanes.HIGH)])
+
+        self.assertEqual(self.client.priorities, [lanes.HIGH])
+        self.assertNotIn('headers', self.client.messages[0])
+
+    def test_keyword(self):
+        self.backend.send_messages(
+            [_make_message(), _make_message(lanes.HIGH)],
+            priority=lanes.BULK,
+        )
+
+        self.assertEqual(self.client.priorities, [lanes.BULK, lanes.HIGH])
+        self.assertEqual(self.backend._priority, lanes.NORMAL)
+
+    def test_keyword_is_not_shared(self):
+        # another call on the same backend keeps its own priority
+        seen = []
+        self.client.begin_send = \
+            lambda message, **kwargs: seen.append(self.backend._priority)
+
+        self.backend.send_messages([_make_message()], priority=lanes.BULK)
+
+        self.assertEqual(seen, [lanes.NORMAL])
+
+    def test_backend_priority(self):
+        backend = EmailBackend(priority=lanes.BULK)
+        client = backend._client = EmailClientStub()
+
+        backend.send_messages([_make_message()])
+
+        self.assertEqual(client.priorities, [lanes.BULK])
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            EmailBackend(priority='urgent')
+        with self.assertRaises(ValueError):
+            self.backend.send_messages([_make_message()], priority='urgent')
+
+    @override_settings(
+        AZURE_COMMUNICATION_PRIORITY_LANES={lanes.BULK: 1},
+        AZURE_COMMUNICATION_PRIORITY_CONNECTIONS=2,
+    )
+    def test_lanes(self):
+        self.addCleanup(lanes._lanes.clear)
+
+        self.backend.send_messages([_make_message()] * 3)
+
+        found = lanes.get_lanes({lanes.BULK: 1}, 2)
+        self.assertEqual(found._running, dict.fromkeys(lanes.PRIORITIES, 0))
+        self.assertEqual(len(self.client.messages), 3)
+
+    def test_background(self):
+        backend = EmailBackend(
+            endpoint='https://endpoint',
+            key_credential='1234',
+            background=True,
+        )
+        self.addCleanup(clients.close_clients)
+        self.addCleanup(dispatcher.shutdown_dispatchers, 1)
+        client = EmailClientStub()
+        clients.get_client(backend._get_client_key(), lambda: client)
+
+        backend.send_messages([_make_message(lanes.HIGH), _make_message()])
+        dispatcher.shutdown_dispatchers(1)
+
+        self.assertEqual(
+            sorted(client.priorities),
+            [lanes.HIGH, lanes.NORMAL],
+        )
+
+
+class TestOutboxPriority(TestCase):
+    """backend.ACEmailBackend(outbox=True) with priorities"""
+
+    def test_priority_is_stored(self):
+        backend = EmailBackend(outbox=True)
+
+        backend.send_messages([_make_message()], priority=lanes.HIGH)
+
+        self.assertEqual(
+            OutboxMessage.objects.get().payload['headers'],
+            {'X-Email-Priority': lanes.HIGH},
+        )
+        self.assertEqual(OutboxMessage.objects.get().priority, 0)
@@ -0,0 +1,91 @@
+from unittest import skipUnless
+
+from azure.core.pipeline.policies import RetryPolicy
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase
+
+from django_azure_communication_email import metrics
+from tests.helpers import FakeACSMixin
+
+
+try:
+    from prometheus_client import CollectorRegistry
+except ImportError:
+    CollectorRegistry = None
+
+
+@skipUnless(CollectorRegistry, 'requires prometheus_client')
+class TestMetrics(FakeACSMixin, SimpleTestCase):
+    """metrics.install()"""
+
+    retry_policy = RetryPolicy(retry_total=1, retry_backoff_factor=0)
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.registry = CollectorRegistry()
+        self.metrics = metrics.install(self.registry)
+        self.addCleanup(metrics._metrics.objects.pop, self.registry)
+        self.addCleanup(self.metrics.disconnect)
+
+    def make_backend(self, **kwargs):
+        return super().make_backend(fail_silently=True, **kwargs)
+
+    def make_message(self, subject='Subject'):
+        return EmailMessage(
+            subject=subject,
+            body='Body',
+            from_email='sender@company.com',
+            to=['to@company.com'],
+        )
+
+    def get_value(self, name, **labels):
+        return self.registry.get_sample_value(
+            f'azure_communication_email_{name}',
+            labels,
+        )
+
+    def test_install_twice(self):
+        self.assertIs(metrics.install(self.registry), self.metrics)
+
+    def test_sent(self):
+        backend = self.make_backend()
+
+        self.assertEqual(backend.send_messages([self.make_message()] * 3), 3)
+
+        self.assertEqual(self.get_value('sent_total'), 3)
+        self.assertEqual(self.get_value('send_duration_seconds_count'), 3)
+        self.assertEqual(
+            self.get_value('payload_size_bytes_sum'),
+            self.server.stats['bytes'],
+        )
+        self.assertEqual(self.get_value('batch_size_sum'), 3)
+        self.assertEqual(self.get_value('open_duration_seconds_count'), 1)
+        self.assertEqual(self.get_value('convert_duration_seconds_count'), 3)
+
+    def test_failed(self):
+        self.server.throttle_rate = 1
+        self.server.retry_after = 0
+        backend = self.make_backend()
+
+        self.assertEqual(backend.send_messages([self.make_message()]), 0)
+
+        self.assertEqual(self.get_value('sent_total'), 0)
+        self.assertEqual(
+            self.get_value('failed_total', exception='HttpResponseError'),
+            1,
+        )
+        self.assertEqual(self.get_value('throttled_total'), 2)
+
+    def test_conversion_failed(self):
+        backend = self.make_backend()
+
+        with self.settings(AZURE_COMMUNICATION_MAX_PAYLOAD_SIZE=10):
+            self.assertEqual(backend.send_messages([self.make_message()]), 0)
+
+        self.assertEqual(
+            self.get_value('failed_total', exception='PayloadTooLarge'),
+            1,
+        )
+        self.assertEqual(self.server.stats['requests'], 0)
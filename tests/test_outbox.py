@@ -0,0 +1,145 @@
+import io
+from datetime import timedelta
+
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_azure_communication_email import EmailBackend, lanes, settings
+from django_azure_communication_email.exceptions import CircuitOpen
+from django_azure_communication_email.outbox import drain
+from django_azure_communication_email.outbox.models import OutboxMessage
+from tests.helpers import EmailClientStub
+
+
+def _make_message(subject='Subject'):
+    return EmailMessage(
+        subject=subject,
+        body='plain text',
+        from_email='support@company.com',
+        to=['foo@company.com'],
+    )
+
+
+class TestOutboxBackend(TestCase):
+    """backend.ACEmailBackend(outbox=True)"""
+
+    def test_messages_are_stored(self):
+        backend = EmailBackend(outbox=True)
+        messages = [_make_message(), _make_message()]
+
+        self.assertEqual(backend.send_messages(messages), 2)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+        self.assertEqual(
+            OutboxMessage.objects.first().payload,
+            backend.convert_message(messages[0]),
+        )
+        self.assertIsNone(backend._client)
+
+
+class TestDrain(TestCase):
+    """outbox.drain.drain()"""
+
+    def setUp(self) -> None:
+        self.client = EmailClientStub()
+        self.backend = EmailBackend(outbox=False)
+        self.backend._client = self.client
+
+    def store(self, *subjects):
+        EmailBackend(outbox=True).send_messages(map(_make_message, subjects))
+
+    def test_sent_messages_are_deleted(self):
+        self.store('first', 'second')
+
+        self.assertEqual(drain.drain(backend=self.backend), (2, 0))
+        self.assertEqual(len(self.client.messages), 2)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_batch_size(self):
+        self.store('first', 'second', 'third')
+
+        self.assertEqual(
+            drain.drain(batch_size=2, backend=self.backend),
+            (2, 0),
+        )
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_higher_priority_is_claimed_first(self):
+        EmailBackend(outbox=True).send_messages(
+            [_make_message('bulk'), _make_message('bulk')],
+            priority=lanes.BULK,
+        )
+        EmailBackend(outbox=True).send_messages(
+            [_make_message('high')],
+            priority=lanes.HIGH,
+        )
+
+        self.assertEqual(
+            drain.drain(batch_size=1, backend=self.backend),
+            (1, 0),
+        )
+        self.assertEqual(self.client.messages[0]['content']['subject'], 'high')
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_failed_message_is_retried_later(self):
+        self.store('fail')
+
+        self.assertEqual(drain.drain(backend=self.backend), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertFalse(message.failed)
+        self.assertIn('Failed to send', message.last_error)
+        self.assertGreater(
+            message.next_attempt_at,
+            timezone.now() + timedelta(seconds=30),
+        )
+        # not due yet
+        self.assertEqual(drain.drain(backend=self.backend), (0, 0))
+
+    def test_claimed_messages_are_leased(self):
+        self.store('first')
+
+        claimed = drain._claim(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertGreater(
+            OutboxMessage.objects.get().next_attempt_at,
+            timezone.now() + timedelta(seconds=settings.OUTBOX_LEASE - 10),
+        )
+        # in flight
+        self.assertEqual(drain._claim(10), [])
+
+    def test_lease_runs_out(self):
+        self.store('first')
+        drain._claim(10)
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(drain.drain(backend=self.backend), (1, 0))
+
+    def test_circuit_open_does_not_use_up_attempts(self):
+        self.store('first')
+
+        class Client(EmailClientStub):
+            def begin_send(self, message, **kwargs):
+                raise CircuitOpen('Azure is failing')
+
+        self.backend._client = Client()
+        self.assertEqual(drain.drain(backend=self.backend), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 0)
+        self.assertIn('Azure is failing', message.last_error)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+    def test_message_gives_up_after_max_attempts(self):
+        self.store('fail')
+        OutboxMessage.objects.update(
+            attempts=settings.OUTBOX_MAX_ATTEMPTS - 1,
+        )
+
+        self.assertEqual(drain.drain(backend=self.backend), (0, 1))
+        self.assertTrue(OutboxMessage.objects.get().failed)
+
+    def test_command_with_empty_outbox(self):
+        stdout = io.StringIO()
+        call_command('drain_email_outbox', stdout=stdout)
+        self.assertIn('Sent 0 emails, 0 failed.', stdout.getvalue())
@@ -0,0 +1,294 @@
+import time
+from unittest import mock
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import (
+    AsyncEmailBackend, EmailBackend, circuit, routing,
+)
+from tests.helpers import FakeACSMixin, requires_aiohttp
+
+
+def _make_payload(sender='support@company.com', headers=None):
+    payload = {
+        'senderAddress': sender,
+        'content': {'subject': 'Subject'},
+        'recipients': {'to': [{'address': 'foo@company.com'}]},
+    }
+    if headers:
+        payload['headers'] = headers
+    return payload
+
+
+class ClientStub:
+
+    def __init__(self):
+        self.closed = False
+        self.messages = []
+
+    def close(self):
+        self.closed = True
+
+    def begin_send(self, message, **kwargs):
+        time.sleep(0.001)
+        if self.closed:
+            raise RuntimeError('The client is closed')
+        self.messages.append(message)
+
+
+class TestRouter(SimpleTestCase):
+    """routing.Router()"""
+
+    def setUp(self) -> None:
+        self.router = routing.Router(
+            {
+                'acme': {'endpoint': 'https://acme', 'domains': ['acme.com']},
+                'initech': {'endpoint': 'https://initech'},
+            },
+            header='X-Email-Tenant',
+        )
+
+    def test_header(self):
+        resource, payload = self.router.route(_make_payload(
+            sender='support@acme.com',
+            headers={'x-email-tenant': 'initech', 'X-Other': 'value'},
+        ))
+
+        self.assertIs(resource, self.router.resources['initech'])
+        self.assertEqual(payload['headers'], {'X-Other': 'value'})
+
+    def test_header_is_removed(self):
+        _, payload = self.router.route(_make_payload(
+            headers={'X-Email-Tenant': 'initech'},
+        ))
+
+        self.assertNotIn('headers', payload)
+
+    def test_domain(self):
+        resource, _ = self.router.route(_make_payload('support@ACME.com'))
+
+        self.assertIs(resource, self.router.resources['acme'])
+
+    def test_default(self):
+        self.assertIsNone(self.router.route(_make_payload())[0])
+
+    def test_unknown_tenant(self):
+        with self.assertRaises(ValueError):
+            self.router.route(_make_payload(
+                headers={'X-Email-Tenant': 'unknown'},
+            ))
+
+    def test_resolver(self):
+        self.router.resolver = lambda payload: 'initech'
+        resource, _ = self.router.route(_make_payload('support@acme.com'))
+        self.assertIs(resource, self.router.resources['initech'])
+
+        self.router.resolver = lambda payload: {'endpoint': 'https://other'}
+        resource, _ = self.router.route(_make_payload())
+        self.assertEqual(resource.endpoint, 'https://other')
+
+        self.router.resolver = lambda payload: None
+        resource, _ = self.router.route(_make_payload('support@acme.com'))
+        self.assertIs(resource, self.router.resources['acme'])
+
+    def test_get_router(self):
+        tenants = {'acme': {'endpoint': 'https://acme', 'domains': ['a']}}
+        self.assertIs(
+            routing.get_router(tenants, header='X'),
+            routing.get_router(tenants, header='X'),
+        )
+        self.assertIsNot(
+            routing.get_router(tenants, header='X'),
+            routing.get_router(tenants, header='Y'),
+        )
+
+
+class TestHoldClient(SimpleTestCase):
+    """routing.hold_client()"""
+
+    def setUp(self) -> None:
+        self.addCleanup(routing.close_clients)
+
+    def hold_client(self, name, **kwargs):
+        resource = routing.Resource(endpoint=f'https://{name}')
+        return routing.hold_client(
+            name,
+            resource,
+            ClientStub,
+            **{'max_size': 2, **kwargs},
+        )
+
+    def get_client(self, name, **kwargs):
+        with self.hold_client(name, **kwargs) as client:
+            return client
+
+    def test_reuse(self):
+        self.assertIs(self.get_client('a'), self.get_client('a'))
+
+    def test_least_recently_used_are_closed(self):
+        a = self.get_client('a')
+        b = self.get_client('b')
+        self.get_client('a')
+        self.get_client('c')
+
+        self.assertTrue(b.closed)
+        self.assertFalse(a.closed)
+        self.assertIsNot(self.get_client('b'), b)
+
+    def test_idle_are_closed(self):
+        a = self.get_client('a')
+        with mock.patch('time.monotonic', return_value=1e9):
+            b = self.get_client('b', idle_timeout=60)
+
+        self.assertTrue(a.closed)
+        self.assertFalse(b.closed)
+
+    def test_held_clients_are_closed_once_released(self):
+        with self.hold_client('a', max_size=1) as a:
+            self.get_client('b', max_size=1)
+            self.assertFalse(a.closed)
+
+        self.assertTrue(a.closed)
+        self.assertIsNot(self.get_client('a', max_size=1), a)
+
+    def test_find_client(self):
+        a = self.get_client('a')
+
+        with routing.find_client('a') as found:
+            self.assertIs(found, a)
+        with routing.find_client('b') as found:
+            self.assertIsNone(found)
+
+
+class TestEmailBackendTenants(FakeACSMixin, SimpleTestCase):
+    """backend.ACEmailBackend() with several tenants"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.servers = [self.start_server(), self.start_server(), self.server]
+        self.addCleanup(routing.close_clients)
+        self.addCleanup(routing._routers.clear)
+
+        self.messages = [
+            EmailMessage(
+                subject='Subject',
+                body='Body',
+                from_email='support@acme.com',
+                to=['to@company.com'],
+            ),
+            EmailMessage(
+                subject='Subject',
+                body='Body',
+                from_email='support@company.com',
+                to=['to@company.com'],
+                headers={'X-Email-Tenant': 'initech'},
+            ),
+            EmailMessage(
+                subject='Subject',
+                body='Body',
+                from_email='support@company.com',
+                to=['to@company.com'],
+            ),
+        ]
+
+    def make_backend(self, backend_class=EmailBackend, **kwargs):
+        return super().make_backend(
+            backend_class,
+            tenants={
+                'acme': {
+                    'connection_string': self.servers[0].connection_string,
+                    'domains': ['acme.com'],
+                },
+                'initech': {
+                    'connection_string': self.servers[1].connection_string,
+                },
+            },
+            **kwargs,
+        )
+
+    def test_mixed_batch(self):
+        self.assertEqual(self.make_backend().send_messages(self.messages), 3)
+
+        self.assertEqual(
+            [server.stats['sent'] for server in self.servers],
+            [1, 1, 1],
+        )
+
+    def test_clients_are_reused(self):
+        self.make_backend().send_messages(self.messages)
+        tenant_clients = {
+            entry.client for entry in routing._clients.objects.values()
+        }
+
+        self.make_backend().send_messages(self.messages)
+
+        self.assertEqual(
+            {entry.client for entry in routing._clients.objects.values()},
+            tenant_clients,
+        )
+        self.assertEqual(len(tenant_clients), 2)
+
+    def test_resolver(self):
+        backend = self.make_backend(
+            tenant_resolver=lambda payload: 'initech',
+        )
+
+        self.assertEqual(backend.send_messages(self.messages), 3)
+        self.assertEqual(self.servers[1].stats['sent'], 3)
+
+    @override_settings(AZURE_COMMUNICATION_CIRCUIT_BREAKER_THRESHOLD=1)
+    def test_circuit_breaker_per_tenant(self):
+        self.addCleanup(circuit._breakers.clear)
+        self.servers[0].error_rate = 1
+        backend = self.make_backend(fail_silently=True)
+
+        self.assertEqual(backend.send_messages(self.messages), 2)
+        self.assertEqual(backend.send_messages(self.messages), 2)
+
+        # only the failing tenant is held back
+        self.assertEqual(self.servers[0].stats['errors'], 1)
+        self.assertEqual(self.servers[1].stats['sent'], 2)
+        self.assertEqual(self.servers[2].stats['sent'], 2)
+
+    @override_settings(AZURE_COMMUNICATION_TENANT_CACHE_SIZE=1)
+    def test_concurrent_sends_with_evictions(self):
+        backend = self.make_backend(max_workers=4)
+        created = []
+
+        def create_client(*args):
+            created.append(ClientStub())
+            return created[-1]
+
+        messages = [
+            EmailMessage(
+                subject='Subject',
+                body='Body',
+                from_email='support@company.com',
+                to=['to@company.com'],
+                headers={'X-Email-Tenant': name},
+            )
+            for name in ('acme', 'initech') * 20
+        ]
+        with mock.patch.object(
+            backend,
+            '_create_email_client',
+            create_client,
+        ):
+            self.assertEqual(backend.send_messages(messages), 40)
+
+        self.assertGreater(len(created), 2)
+        self.assertEqual(
+            sum(len(client.messages) for client in created),
+            40,
+        )
+
+    @requires_aiohttp
+    def test_async(self):
+        backend = self.make_backend(AsyncEmailBackend)
+
+        self.assertEqual(backend.send_messages(self.messages), 3)
+        self.assertEqual(
+            [server.stats['sent'] for server in self.servers],
+            [1, 1, 1],
+        )
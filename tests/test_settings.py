@@ -1,6 +1,5 @@
-import sys
-
 from azure.core.pipeline.policies import RetryPolicy
+
 from django.test import TestCase, override_settings
 
 
@@ -18,10 +17,6 @@ _key_credential = '1234'
 
 class TestSettings(TestCase):
 
-    def setUp(self) -> None:
-        del sys.modules['django_azure_communication_email.settings']
-        del sys.modules['django_azure_communication_email']
-
     @override_settings(AZURE_COMMUNICATION_CONNECTION_STRING=_connection_str)
     def test_connection_string(self):
         from django_azure_communication_email import settings
@@ -62,6 +57,230 @@ class TestSettings(TestCase):
         from django_azure_communication_email import settings
         self.assertEqual(settings.TRACKING_DISABLED, False)
 
+    @override_settings(AZURE_COMMUNICATION_MAX_WORKERS=8)
+    def test_max_workers(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.MAX_WORKERS, 8)
+
+    def test_max_workers_default(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.MAX_WORKERS, 1)
+
+    @override_settings(AZURE_COMMUNICATION_MAX_CONCURRENCY=10)
+    def test_max_concurrency(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.MAX_CONCURRENCY, 10)
+
+    @override_settings(AZURE_COMMUNICATION_PERSISTENT_CLIENT=True)
+    def test_persistent_client(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.PERSISTENT_CLIENT, True)
+
+    @override_settings(AZURE_COMMUNICATION_TOKEN_REFRESH_MARGIN=60)
+    def test_token_refresh_margin(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.TOKEN_REFRESH_MARGIN, 60)
+
+    @override_settings(
+        AZURE_COMMUNICATION_BACKGROUND=True,
+        AZURE_COMMUNICATION_BACKGROUND_WORKERS=4,
+        AZURE_COMMUNICATION_BACKGROUND_QUEUE_SIZE=100,
+        AZURE_COMMUNICATION_BACKGROUND_QUEUE_FULL_POLICY='drop',
+        AZURE_COMMUNICATION_BACKGROUND_FLUSH_TIMEOUT=5,
+    )
+    def test_background(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.BACKGROUND, True)
+        self.assertEqual(settings.BACKGROUND_WORKERS, 4)
+        self.assertEqual(settings.BACKGROUND_QUEUE_SIZE, 100)
+        self.assertEqual(settings.BACKGROUND_QUEUE_FULL_POLICY, 'drop')
+        self.assertEqual(settings.BACKGROUND_FLUSH_TIMEOUT, 5)
+
+    @override_settings(
+        AZURE_COMMUNICATION_OUTBOX=True,
+        AZURE_COMMUNICATION_OUTBOX_BATCH_SIZE=50,
+        AZURE_COMMUNICATION_OUTBOX_MAX_ATTEMPTS=3,
+        AZURE_COMMUNICATION_OUTBOX_RETRY_DELAY=10,
+        AZURE_COMMUNICATION_OUTBOX_RETRY_DELAY_MAX=100,
+        AZURE_COMMUNICATION_OUTBOX_LEASE=60,
+    )
+    def test_outbox(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.OUTBOX, True)
+        self.assertEqual(settings.OUTBOX_BATCH_SIZE, 50)
+        self.assertEqual(settings.OUTBOX_MAX_ATTEMPTS, 3)
+        self.assertEqual(settings.OUTBOX_RETRY_DELAY, 10)
+        self.assertEqual(settings.OUTBOX_RETRY_DELAY_MAX, 100)
+        self.assertEqual(settings.OUTBOX_LEASE, 60)
+
+    @override_settings(
+        AZURE_COMMUNICATION_RATE_LIMIT_PER_MINUTE=30,
+        AZURE_COMMUNICATION_RATE_LIMIT_PER_HOUR=100,
+        AZURE_COMMUNICATION_RATE_LIMIT_CACHE='default',
+    )
+    def test_rate_limit(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.RATE_LIMIT_PER_MINUTE, 30)
+        self.assertEqual(settings.RATE_LIMIT_PER_HOUR, 100)
+        self.assertEqual(settings.RATE_LIMIT_CACHE, 'default')
+
+    @override_settings(AZURE_COMMUNICATION_ATTACHMENT_CACHE_SIZE=1024)
+    def test_attachment_cache_size(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.ATTACHMENT_CACHE_SIZE, 1024)
+
+    @override_settings(AZURE_COMMUNICATION_MAX_PAYLOAD_SIZE=1024)
+    def test_max_payload_size(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.MAX_PAYLOAD_SIZE, 1024)
+
+    @override_settings(
+        AZURE_COMMUNICATION_COALESCE=True,
+        AZURE_COMMUNICATION_MAX_RECIPIENTS=10,
+    )
+    def test_coalesce(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.COALESCE, True)
+        self.assertEqual(settings.MAX_RECIPIENTS, 10)
+
+    @override_settings(AZURE_COMMUNICATION_OPENTELEMETRY=True)
+    def test_opentelemetry(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.OPENTELEMETRY, True)
+
+    @override_settings(AZURE_COMMUNICATION_METRICS=True)
+    def test_metrics(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.METRICS, True)
+
+    @override_settings(
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_THRESHOLD=5,
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_FAILURE_RATE=0.5,
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_WINDOW=30,
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_MIN_REQUESTS=10,
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_RESET_TIMEOUT=60,
+        AZURE_COMMUNICATION_CIRCUIT_BREAKER_CACHE='default',
+    )
+    def test_circuit_breaker(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.CIRCUIT_BREAKER_THRESHOLD, 5)
+        self.assertEqual(settings.CIRCUIT_BREAKER_FAILURE_RATE, 0.5)
+        self.assertEqual(settings.CIRCUIT_BREAKER_WINDOW, 30)
+        self.assertEqual(settings.CIRCUIT_BREAKER_MIN_REQUESTS, 10)
+        self.assertEqual(settings.CIRCUIT_BREAKER_RESET_TIMEOUT, 60)
+        self.assertEqual(settings.CIRCUIT_BREAKER_CACHE, 'default')
+
+    @override_settings(
+        AZURE_COMMUNICATION_RESOURCES=[{'endpoint': 'https://resource'}],
+        AZURE_COMMUNICATION_FAILOVER_COOLDOWN=10,
+    )
+    def test_resources(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(
+            settings.RESOURCES,
+            [{'endpoint': 'https://resource'}],
+        )
+        self.assertEqual(settings.FAILOVER_COOLDOWN, 10)
+
+    @override_settings(
+        AZURE_COMMUNICATION_IDEMPOTENT=True,
+        AZURE_COMMUNICATION_IDEMPOTENCY_TTL=60,
+        AZURE_COMMUNICATION_IDEMPOTENCY_HEADER='X-Order',
+    )
+    def test_idempotency(self):
+        from django_azure_communication_email import settings
+        self.assertTrue(settings.IDEMPOTENT)
+        self.assertEqual(settings.IDEMPOTENCY_TTL, 60)
+        self.assertEqual(settings.IDEMPOTENCY_HEADER, 'X-Order')
+
+    @override_settings(
+        AZURE_COMMUNICATION_DELIVERY_TRACKING=True,
+        AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL=5,
+        AZURE_COMMUNICATION_DELIVERY_POLL_INTERVAL_MAX=120,
+        AZURE_COMMUNICATION_DELIVERY_POLL_WORKERS=8,
+        AZURE_COMMUNICATION_DELIVERY_TIMEOUT=600,
+        AZURE_COMMUNICATION_DELIVERY_REFERENCE_HEADER='X-Order',
+    )
+    def test_delivery_tracking(self):
+        from django_azure_communication_email import settings
+        self.assertTrue(settings.DELIVERY_TRACKING)
+        self.assertEqual(settings.DELIVERY_POLL_INTERVAL, 5)
+        self.assertEqual(settings.DELIVERY_POLL_INTERVAL_MAX, 120)
+        self.assertEqual(settings.DELIVERY_POLL_WORKERS, 8)
+        self.assertEqual(settings.DELIVERY_TIMEOUT, 600)
+        self.assertEqual(settings.DELIVERY_REFERENCE_HEADER, 'X-Order')
+
+    @override_settings(
+        AZURE_COMMUNICATION_CAPTURE_DIR='/var/mail',
+        AZURE_COMMUNICATION_CAPTURE_MAX_BYTES=1024,
+        AZURE_COMMUNICATION_CAPTURE_MAX_AGE=3600,
+        AZURE_COMMUNICATION_CAPTURE_GZIP=True,
+    )
+    def test_capture(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.CAPTURE_DIR, '/var/mail')
+        self.assertEqual(settings.CAPTURE_MAX_BYTES, 1024)
+        self.assertEqual(settings.CAPTURE_MAX_AGE, 3600)
+        self.assertTrue(settings.CAPTURE_GZIP)
+
+    def test_changes_are_seen(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.MAX_WORKERS, 1)
+        with self.settings(AZURE_COMMUNICATION_MAX_WORKERS=8):
+            self.assertEqual(settings.MAX_WORKERS, 8)
+        self.assertEqual(settings.MAX_WORKERS, 1)
+
+    def test_unknown_setting(self):
+        from django_azure_communication_email import settings
+        with self.assertRaises(AttributeError):
+            settings.UNKNOWN
+
+    @override_settings(AZURE_COMMUNICATION_TIMEOUT=5)
+    def test_timeout(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.TIMEOUT, 5)
+
+    @override_settings(
+        AZURE_COMMUNICATION_STREAM_MAX_PENDING=10,
+        AZURE_COMMUNICATION_STREAM_CHUNK_SIZE=5,
+    )
+    def test_stream(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.STREAM_MAX_PENDING, 10)
+        self.assertEqual(settings.STREAM_CHUNK_SIZE, 5)
+
+    @override_settings(
+        AZURE_COMMUNICATION_TENANTS={'acme': {'endpoint': 'https://acme'}},
+        AZURE_COMMUNICATION_TENANT_CACHE_SIZE=10,
+    )
+    def test_tenants(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(
+            settings.TENANTS,
+            {'acme': {'endpoint': 'https://acme'}},
+        )
+        self.assertEqual(settings.TENANT_HEADER, 'X-Email-Tenant')
+        self.assertIsNone(settings.TENANT_RESOLVER)
+        self.assertEqual(settings.TENANT_CACHE_SIZE, 10)
+        self.assertEqual(settings.TENANT_IDLE_TIMEOUT, 600)
+
+    @override_settings(
+        AZURE_COMMUNICATION_PRIORITY='bulk',
+        AZURE_COMMUNICATION_PRIORITY_LANES={'bulk': 2},
+    )
+    def test_priority(self):
+        from django_azure_communication_email import settings
+        self.assertEqual(settings.PRIORITY, 'bulk')
+        self.assertEqual(settings.PRIORITY_HEADER, 'X-Email-Priority')
+        self.assertEqual(settings.PRIORITY_LANES, {'bulk': 2})
+        self.assertEqual(settings.PRIORITY_CONNECTIONS, 10)
+
+    @override_settings(AZURE_COMMUNICATION_WARM_UP=True)
+    def test_warm_up(self):
+        from django_azure_communication_email import settings
+        self.assertTrue(settings.WARM_UP)
+        self.assertEqual(settings.WARM_UP_TIMEOUT, 10)
+
     def test_retry_policy_no_retries(self):
         retry_policy = RetryPolicy.no_retries()
         with override_settings(AZURE_COMMUNICATION_RETRY_POLICY=retry_policy):
@@ -78,5 +297,6 @@ class TestSettings(TestCase):
 
     def test_retry_policy_none(self):
         from django_azure_communication_email import settings
+
         # When not set, should default to None (uses SDK default)
         self.assertIsNone(settings.RETRY_POLICY)
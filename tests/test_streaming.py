@@ -0,0 +1,164 @@
+import threading
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import EmailBackend, streaming
+from tests.helpers import EmailClientStub
+
+
+def _make_messages(count, fail=()):
+    for index in range(count):
+        yield EmailMessage(
+            subject='fail' if index in fail else f'Subject {index}',
+            body='plain text',
+            from_email='support@company.com',
+            to=['foo@company.com'],
+        )
+
+
+class TestPeek(SimpleTestCase):
+    """streaming.peek()"""
+
+    def test_empty(self):
+        self.assertIsNone(streaming.peek(iter([])))
+
+    def test_items(self):
+        self.assertEqual(list(streaming.peek(iter([1, 2]))), [1, 2])
+
+
+class TestChunked(SimpleTestCase):
+    """streaming.chunked()"""
+
+    def test_chunks(self):
+        self.assertEqual(
+            list(streaming.chunked(range(5), 2)),
+            [[0, 1], [2, 3], [4]],
+        )
+
+
+@override_settings(
+    AZURE_COMMUNICATION_STREAM_MAX_PENDING=2,
+    AZURE_COMMUNICATION_STREAM_CHUNK_SIZE=3,
+)
+class TestStreamMessages(SimpleTestCase):
+    """backend.ACEmailBackend.stream_messages()"""
+
+    def setUp(self) -> None:
+        self.backend = EmailBackend()
+        self.client = self.backend._client = EmailClientStub()
+
+    def test_empty(self):
+        self.assertEqual(self.backend.stream_messages(iter([])), 0)
+
+    def test_send(self):
+        reports = []
+
+        sent = self.backend.stream_messages(
+            _make_messages(7),
+            progress=lambda *counts: reports.append(counts),
+        )
+
+        self.assertEqual(sent, 7)
+        self.assertEqual(
+            [m['content']['subject'] for m in self.client.messages],
+            [f'Subject {index}' for index in range(7)],
+        )
+        self.assertEqual(reports[-1], (7, 0))
+        self.assertTrue(all(
+            sent + failed < 7 for sent, failed in reports[:-1]
+        ))
+
+    def test_send_concurrently(self):
+        backend = EmailBackend(max_workers=3)
+        client = backend._client = EmailClientStub()
+
+        self.assertEqual(backend.stream_messages(_make_messages(20)), 20)
+        self.assertEqual(len(client.messages), 20)
+
+    def test_max_pending(self):
+        # the sends are held back, so the conversions stop once the
+        # converted messages fill the queue
+        self.client.block = threading.Event()
+        converted = []
+        convert = self.backend._convert
+        self.backend._convert = lambda m: converted.append(m) or convert(m)
+
+        thread = threading.Thread(
+            target=self.backend.stream_messages,
+            args=(_make_messages(10),),
+        )
+        thread.start()
+        try:
+            thread.join(0.2)
+            # one being sent, two waiting and one held by the converter
+            self.assertEqual(len(converted), 4)
+        finally:
+            self.client.block.set()
+            thread.join()
+        self.assertEqual(len(self.client.messages), 10)
+
+    def test_fail_silently(self):
+        self.backend.fail_silently = True
+        reports = []
+
+        sent = self.backend.stream_messages(
+            _make_messages(5, fail={1, 3}),
+            progress=lambda *counts: reports.append(counts),
+        )
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(reports[-1], (3, 2))
+
+    def test_fail_not_silently(self):
+        with self.assertRaises(RuntimeError):
+            self.backend.stream_messages(_make_messages(100, fail={1}))
+        self.assertLess(len(self.client.messages), 99)
+
+    def test_progress_raises(self):
+        def progress(sent, failed):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.backend.stream_messages(
+                _make_messages(100),
+                progress=progress,
+            )
+        self.assertLess(len(self.client.messages), 100)
+
+    def test_background(self):
+        backend = EmailBackend(background=True)
+        backend._enqueue_messages = lambda messages, priority: len(messages)
+        reports = []
+
+        sent = backend.stream_messages(
+            _make_messages(7),
+            progress=lambda *counts: reports.append(counts),
+        )
+
+        self.assertEqual(sent, 7)
+        self.assertEqual(reports, [(3, 0), (6, 0), (7, 0)])
+
+
+class TestSendMessages(SimpleTestCase):
+    """backend.ACEmailBackend.send_messages() of iterators"""
+
+    def test_empty_generator(self):
+        backend = EmailBackend()
+        # the client is not opened for nothing
+        backend.open = None
+
+        self.assertEqual(backend.send_messages(_make_messages(0)), 0)
+
+    def test_none(self):
+        backend = EmailBackend()
+        backend.open = None
+
+        self.assertEqual(backend.send_messages(None), 0)
+
+    def test_generator(self):
+        backend = EmailBackend()
+        client = backend._client = EmailClientStub()
+
+        self.assertEqual(backend.send_messages(_make_messages(3)), 3)
+        self.assertEqual(len(client.messages), 3)
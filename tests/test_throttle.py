@@ -0,0 +1,144 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+from django.test import TestCase
+
+from django_azure_communication_email import throttle
+from django_azure_communication_email.exceptions import DeadlineExceeded
+from tests.helpers import NextPolicyStub, make_request
+
+
+def _make_response(status_code=202, headers=None):
+    return SimpleNamespace(
+        http_response=SimpleNamespace(
+            status_code=status_code,
+            headers=headers or {},
+        ),
+    )
+
+
+class TestTokenBucket(TestCase):
+    """throttle.TokenBucket()"""
+
+    def test_requests_are_paced_once_bucket_is_empty(self):
+        bucket = throttle.TokenBucket(2, 60)
+
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 30, delta=0.1)
+        self.assertAlmostEqual(bucket.reserve(), 60, delta=0.1)
+
+
+class TestRateLimiter(TestCase):
+    """throttle.RateLimiter()"""
+
+    def test_strictest_limit_wins(self):
+        limiter = throttle.RateLimiter(per_minute=60, per_hour=1)
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertAlmostEqual(limiter.reserve(), 3600, delta=0.1)
+
+    def test_pause(self):
+        limiter = throttle.RateLimiter(per_minute=60)
+        limiter.pause(10)
+
+        self.assertAlmostEqual(limiter.reserve(), 10, delta=0.1)
+
+    def test_pause_is_shared_through_cache(self):
+        throttle.RateLimiter(cache_alias='default').pause(10)
+        limiter = throttle.RateLimiter(per_minute=60, cache_alias='default')
+        self.addCleanup(limiter._get_cache().clear)
+
+        self.assertAlmostEqual(limiter.get_pause(), 10, delta=0.1)
+
+    def test_limits_are_shared_through_cache(self):
+        limiters = [
+            throttle.RateLimiter(per_minute=3, cache_alias='default')
+            for _ in range(2)
+        ]
+        self.addCleanup(limiters[0]._get_cache().clear)
+
+        self.assertEqual(limiters[0].reserve_shared(), 0)
+        self.assertEqual(limiters[1].reserve_shared(), 0)
+        self.assertEqual(limiters[0].reserve_shared(), 0)
+        self.assertGreater(limiters[1].reserve_shared(), 0)
+        self.assertGreater(limiters[0].reserve_shared(), 0)
+
+    def test_wait_past_the_shared_limit(self):
+        limiter = throttle.RateLimiter(per_hour=1, cache_alias='default')
+        self.addCleanup(limiter._get_cache().clear)
+        limiter.wait()
+
+        # another process has a token left, but not the shared window
+        other = throttle.RateLimiter(per_hour=1, cache_alias='default')
+        with self.assertRaises(DeadlineExceeded):
+            other.wait(until=time.monotonic() + 1)
+
+
+class TestThrottlePolicy(TestCase):
+    """throttle.ThrottlePolicy()"""
+
+    def test_limiter_is_paused_on_429(self):
+        limiter = throttle.RateLimiter(per_minute=60)
+        policy = throttle.ThrottlePolicy(limiter)
+        policy.next = NextPolicyStub(429, {'retry-after': '30'})
+
+        policy.send(make_request())
+        self.assertAlmostEqual(limiter.get_pause(), 30, delta=0.1)
+
+    def test_only_send_requests_are_throttled(self):
+        limiter = throttle.RateLimiter(per_minute=1)
+        policy = throttle.ThrottlePolicy(limiter)
+        policy.next = NextPolicyStub(429)
+
+        policy.send(make_request('GET'))
+        self.assertEqual(limiter.get_pause(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_wait_past_the_deadline(self):
+        limiter = throttle.RateLimiter(per_minute=1)
+        policy = throttle.ThrottlePolicy(limiter)
+        policy.next = NextPolicyStub()
+
+        policy.send(make_request(deadline=time.monotonic() + 10))
+        with self.assertRaises(DeadlineExceeded):
+            policy.send(make_request(deadline=time.monotonic() + 10))
+
+
+class TestGetRetryAfter(TestCase):
+    """throttle.get_retry_after()"""
+
+    def test_seconds(self):
+        response = _make_response(429, {'retry-after': '12'})
+        self.assertEqual(throttle.get_retry_after(response), 12)
+
+    def test_milliseconds(self):
+        response = _make_response(429, {'retry-after-ms': '1500'})
+        self.assertEqual(throttle.get_retry_after(response), 1.5)
+
+    def test_http_date(self):
+        date = formatdate(time.time() + 120, usegmt=True)
+        response = _make_response(429, {'retry-after': date})
+        self.assertAlmostEqual(
+            throttle.get_retry_after(response),
+            120,
+            delta=2,
+        )
+
+    def test_missing_header(self):
+        self.assertEqual(throttle.get_retry_after(_make_response(429)), 60)
+
+
+class TestGetRateLimiter(TestCase):
+    """throttle.get_rate_limiter()"""
+
+    def test_no_limits(self):
+        self.assertIsNone(throttle.get_rate_limiter())
+
+    def test_limiter_is_shared(self):
+        limiter = throttle.get_rate_limiter(per_minute=30, per_hour=100)
+        self.assertIs(
+            throttle.get_rate_limiter(per_minute=30, per_hour=100),
+            limiter,
+        )
@@ -19,6 +19,45 @@ class TestGetNameAndEmail(TestCase):
         self.assertEqual(name, 'Contact')
         self.assertEqual(email, 'contact@company.com')
 
+    def test_quoted_name_with_comma(self):
+        name, email = utils.get_name_and_email(
+            '"Doe, John" <john@company.com>',
+        )
+        self.assertEqual(name, 'Doe, John')
+        self.assertEqual(email, 'john@company.com')
+
+    def test_non_ascii_name_and_domain(self):
+        name, email = utils.get_name_and_email('Jöhn Dœ <john@bücher.de>')
+        self.assertEqual(name, 'Jöhn Dœ')
+        self.assertEqual(email, 'john@xn--bcher-kva.de')
+
+    def test_encoded_name(self):
+        name, email = utils.get_name_and_email(
+            '=?utf-8?q?J=C3=B6hn?= <john@company.com>',
+        )
+        self.assertEqual(name, 'Jöhn')
+        self.assertEqual(email, 'john@company.com')
+
+    def test_invalid_address_is_kept(self):
+        for address in ['not an address', 'a@company.com, b@company.com']:
+            self.assertEqual(utils.get_name_and_email(address), ('', address))
+
+
+class TestGetMessageRecipients(TestCase):
+    """utils.get_message_recipients()"""
+
+    def test_recipients(self):
+        message = EmailMessage(
+            to=['Contact <contact@company.com>'],
+            bcc=['bcc@company.com'],
+        )
+        self.assertEqual(utils.get_message_recipients(message), {
+            'to': [
+                {'displayName': 'Contact', 'address': 'contact@company.com'},
+            ],
+            'bcc': [{'displayName': '', 'address': 'bcc@company.com'}],
+        })
+
 
 class TestGetHtmlMessage(TestCase):
     """utils.get_html_message()"""
@@ -56,3 +95,35 @@ class TestGetHtmlMessage(TestCase):
         html = '<html>Body</html>'
         message.attach_alternative(html, 'text/html')
         self.assertEqual(utils.get_html_message(message), html)
+
+
+class TestRegistry(TestCase):
+    """utils.Registry()"""
+
+    def test_object_is_created_once(self):
+        registry = utils.Registry()
+
+        found = registry.get('key', object)
+        self.assertIs(registry.get('key', object), found)
+        self.assertIsNot(registry.get('other', object), found)
+
+    def test_clear(self):
+        registry = utils.Registry()
+        found = registry.get('key', object)
+
+        self.assertEqual(registry.clear(), [found])
+        self.assertIsNot(registry.get('key', object), found)
+
+    def test_objects_are_dropped_after_fork(self):
+        registry = utils.Registry()
+        found = registry.get('key', object)
+        registry._reset_after_fork()
+
+        self.assertIsNot(registry.get('key', object), found)
+
+    def test_objects_are_kept_after_fork(self):
+        registry = utils.Registry(keep_after_fork=True)
+        found = registry.get('key', object)
+        registry._reset_after_fork()
+
+        self.assertIs(registry.get('key', object), found)
@@ -0,0 +1,127 @@
+import io
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from django_azure_communication_email import balancer, clients, routing, warmup
+from tests.helpers import FakeACSMixin
+
+
+class TestWarmUp(FakeACSMixin, SimpleTestCase):
+    """warmup.warm_up()"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(setattr, warmup, '_ready', False)
+
+    def make_backend(self, **kwargs):
+        return super().make_backend(persistent_client=True, **kwargs)
+
+    def test_warm_up(self):
+        self.assertTrue(warmup.warm_up(self.make_backend()))
+
+        self.assertTrue(warmup.is_ready())
+        self.assertEqual(self.server.stats['polls'], 1)
+
+    def test_client_is_reused(self):
+        warmup.warm_up(self.make_backend())
+        warmed = list(clients._clients.objects.values())
+
+        backend = self.make_backend()
+        backend.open()
+
+        self.assertEqual(warmed, [backend._client])
+
+    def test_needs_persistent_client(self):
+        backend = super().make_backend()
+
+        # the sends would build clients of their own
+        self.assertFalse(warmup.warm_up(backend))
+        self.assertEqual(self.server.stats['requests'], 0)
+        self.assertFalse(clients._clients.objects)
+
+    def test_resources(self):
+        other = self.start_server()
+        self.addCleanup(balancer._balancers.clear)
+        backend = super().make_backend(
+            connection_string=None,
+            resources=[
+                {'connection_string': server.connection_string}
+                for server in (self.server, other)
+            ],
+        )
+
+        self.assertTrue(warmup.warm_up(backend))
+
+        self.assertEqual(self.server.stats['polls'], 1)
+        self.assertEqual(other.stats['polls'], 1)
+
+    def test_tenants(self):
+        other = self.start_server()
+        self.addCleanup(routing.close_clients)
+        self.addCleanup(routing._routers.clear)
+        backend = self.make_backend(tenants={
+            'acme': {'connection_string': other.connection_string},
+        })
+
+        self.assertTrue(warmup.warm_up(backend))
+
+        self.assertEqual(self.server.stats['polls'], 1)
+        self.assertEqual(other.stats['polls'], 1)
+
+    def test_failure(self):
+        backend = self.make_backend()
+        self.server.stop()
+        received = []
+
+        def receiver(**kwargs):
+            received.append(kwargs)
+
+        warmup.warmed_up.connect(receiver)
+        self.addCleanup(warmup.warmed_up.disconnect, receiver)
+
+        self.assertFalse(warmup.warm_up(backend, timeout=1))
+
+        self.assertFalse(warmup.is_ready())
+        self.assertFalse(received[0]['ready'])
+        self.assertIsNotNone(received[0]['exception'])
+
+    def test_no_configuration(self):
+        self.assertFalse(warmup.warm_up())
+
+
+class TestWarmUpCommand(SimpleTestCase):
+    """warm_up_email management command"""
+
+    def setUp(self) -> None:
+        self.addCleanup(setattr, warmup, '_ready', False)
+
+    def test_success(self):
+        out = io.StringIO()
+        with mock.patch.object(warmup, 'warm_up', return_value=True) as warm:
+            call_command('warm_up_email', '--timeout', '5', stdout=out)
+
+        warm.assert_called_once_with(timeout=5)
+        self.assertIn('Warmed up', out.getvalue())
+
+    def test_failure(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_up_email')
+
+
+class TestAppConfig(SimpleTestCase):
+    """apps.AzureCommunicationEmailConfig.ready()"""
+
+    def ready(self):
+        with mock.patch.object(warmup, 'start') as start:
+            apps.get_app_config('azure_communication_email').ready()
+        return start.called
+
+    def test_disabled(self):
+        self.assertFalse(self.ready())
+
+    @override_settings(AZURE_COMMUNICATION_WARM_UP=True)
+    def test_enabled(self):
+        self.assertTrue(self.ready())